@@ -2,7 +2,9 @@ import type {
   PortfolioPlan,
   RiskProfile,
   SipPlan,
+  SocialBatchResponse,
   SocialSnapshot,
+  TrustScoreBatchResponse,
   TrustScoreResponse,
 } from '@anylical/shared-types';
 import { env } from '../config/env.js';
@@ -33,6 +35,20 @@ export async function fetchSocialSnapshot(symbol: string): Promise<SocialSnapsho
   return callIntelligence<SocialSnapshot>(`/v1/social/${encodeURIComponent(symbol)}`);
 }
 
+export async function fetchTrustScores(symbols: string[]): Promise<TrustScoreBatchResponse> {
+  return callIntelligence<TrustScoreBatchResponse>('/v1/trust-score/batch', {
+    method: 'POST',
+    body: JSON.stringify({ symbols }),
+  });
+}
+
+export async function fetchSocialSnapshots(symbols: string[]): Promise<SocialBatchResponse> {
+  return callIntelligence<SocialBatchResponse>('/v1/social/batch', {
+    method: 'POST',
+    body: JSON.stringify({ symbols }),
+  });
+}
+
 export async function generateRiskProfile(answers: unknown): Promise<RiskProfile> {
   return callIntelligence<RiskProfile>('/v1/quiz/score', {
     method: 'POST',
@@ -22,6 +22,8 @@ export type TrustScoreResponse = {
     hypePenalty: number;
   };
   explanations: string[];
+  providersCompleted?: string[];
+  providersTimedOut?: string[];
   disclaimers: string[];
 };
 
@@ -49,6 +51,21 @@ export type SocialSnapshot = {
   staleData: boolean;
 };
 
+export type BatchError = {
+  symbol: string;
+  error: string;
+};
+
+export type TrustScoreBatchResponse = {
+  results: TrustScoreResponse[];
+  errors: BatchError[];
+};
+
+export type SocialBatchResponse = {
+  results: SocialSnapshot[];
+  errors: BatchError[];
+};
+
 export type RiskPersona = 'TURTLE' | 'OWL' | 'TIGER' | 'FALCON';
 
 export type RiskProfile = {
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from collections import Counter, deque
+from time import monotonic, perf_counter
+from typing import Any
+
+import httpx
+
+from .concurrency import OVERLOAD_ERRORS
+from .config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+_LATENCY_SAMPLES = 200
+
+
+class CircuitOpen(httpx.TransportError):
+    """The provider's breaker is open, so the request was not sent."""
+
+
+class CircuitBreaker:
+    """Breaker and latency-derived timeout for one provider.
+
+    `failure_threshold` consecutive transport errors or 5xx responses open the breaker;
+    while open, requests fail at once with `CircuitOpen` and the provider falls back to
+    cached or synthetic features. After `open_seconds` one request at a time is let
+    through as a half-open probe: success closes the breaker, failure reopens it.
+
+    Once `min_samples` successes have been seen, the timeout is the p99 of recent
+    latencies times `multiplier`, clamped between `floor` and the request's own timeout.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        open_seconds: float,
+        multiplier: float,
+        floor: float,
+        min_samples: int,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.open_seconds = open_seconds
+        self.multiplier = multiplier
+        self.floor = floor
+        self.min_samples = min_samples
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._p99: float | None = None
+        self._counters: Counter[str] = Counter()
+
+    def allow(self) -> bool:
+        """Whether a request may go out now; claims the probe slot when half-open."""
+        if self.state == OPEN:
+            if monotonic() - self._opened_at < self.open_seconds:
+                self._counters["short_circuited"] += 1
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self._counters["short_circuited"] += 1
+                return False
+            self._probing = True
+            self._counters["probes"] += 1
+        return True
+
+    def timeout(self, ceiling: float | None) -> float | None:
+        if self._p99 is None or len(self._latencies) < self.min_samples:
+            return ceiling
+        adaptive = max(self._p99 * self.multiplier, self.floor)
+        return adaptive if ceiling is None else min(adaptive, ceiling)
+
+    def record_success(self, latency: float) -> None:
+        self._latencies.append(latency)
+        ordered = sorted(self._latencies)
+        self._p99 = ordered[int(0.99 * (len(ordered) - 1))]
+        self.failures = 0
+        self._probing = False
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self._counters["closed"] += 1
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._counters["failures"] += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self._counters["opened"] += 1
+            self.state = OPEN
+            self._opened_at = monotonic()
+        self._probing = False
+
+    def release_probe(self) -> None:
+        # A probe that was cancelled proved nothing either way; let the next caller probe.
+        self._probing = False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.failures,
+            "opened": self._counters["opened"],
+            "closed": self._counters["closed"],
+            "probes": self._counters["probes"],
+            "shortCircuited": self._counters["short_circuited"],
+            "p99Ms": round(self._p99 * 1000, 1) if self._p99 is not None else None,
+            "timeoutSeconds": self.timeout(None),
+        }
+
+
+class CircuitBreakers:
+    """Per-provider `CircuitBreaker`s, created on first use from the current settings."""
+
+    def __init__(self) -> None:
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=settings.circuit_failure_threshold,
+                open_seconds=settings.circuit_open_seconds,
+                multiplier=settings.circuit_timeout_multiplier,
+                floor=settings.circuit_timeout_floor_seconds,
+                min_samples=settings.circuit_timeout_min_samples,
+            )
+            self._breakers[name] = breaker
+        return breaker
+
+    def clear(self) -> None:
+        self._breakers.clear()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {name: breaker.stats() for name, breaker in sorted(self._breakers.items())}
+
+
+circuit_breakers = CircuitBreakers()
+
+
+def _with_timeout(request: httpx.Request, breaker: CircuitBreaker) -> None:
+    timeouts = dict(request.extensions.get("timeout") or {})
+    ceiling = timeouts.get("read")
+    adaptive = breaker.timeout(ceiling)
+    if adaptive is None or adaptive == ceiling:
+        return
+    for phase in ("connect", "read", "write"):
+        timeouts[phase] = adaptive
+    request.extensions["timeout"] = timeouts
+
+
+class CircuitBreakerTransport(httpx.AsyncBaseTransport):
+    """Fail fast while the provider's breaker is open and size timeouts from its p99."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, name: str, breakers: CircuitBreakers | None = None) -> None:
+        self.transport = transport
+        self.name = name
+        self.breakers = breakers or circuit_breakers
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        breaker = self.breakers.get(self.name)
+        if not breaker.allow():
+            raise CircuitOpen(f"{self.name} circuit is open", request=request)
+
+        probe = breaker.state == HALF_OPEN
+        _with_timeout(request, breaker)
+        started = perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except OVERLOAD_ERRORS:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            if probe:
+                breaker.release_probe()
+            raise
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success(perf_counter() - started)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
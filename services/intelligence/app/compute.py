@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class StageTimings:
+    """Seconds a job spent in CPU stages versus waiting on I/O, summed over its tasks.
+
+    Tasks overlap, so either total can exceed the job's wall-clock duration.
+    """
+
+    cpu_seconds: float = 0.0
+    io_seconds: float = 0.0
+    compute_batches: int = 0
+
+    def summary(self) -> dict[str, float | int]:
+        return {
+            "cpuSeconds": round(self.cpu_seconds, 3),
+            "ioSeconds": round(self.io_seconds, 3),
+            "computeBatches": self.compute_batches,
+        }
+
+
+current_timings: ContextVar[StageTimings | None] = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def stage_timings() -> Iterator[StageTimings]:
+    """Collect CPU/I-O timings for the block, including tasks it starts."""
+    timings = StageTimings()
+    token = current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        current_timings.reset(token)
+
+
+@contextmanager
+def io_stage() -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.io_seconds += time.perf_counter() - started
+
+
+def _timed(fn: Callable[..., T], *args: Any) -> tuple[T, float]:
+    started = time.process_time()
+    result = fn(*args)
+    return result, time.process_time() - started
+
+
+class ComputePool:
+    """Process pool for the pure, CPU-bound stages of ingest (decode, hash, score, bucket).
+
+    Callers submit one whole payload per call so the pickling cost is paid once per
+    upstream response rather than once per post. `fn` must be a module-level function.
+    With `workers` set to 0 the stage runs inline on the event loop.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned, not forked: a forked child would inherit the parent's event loop.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.workers <= 0:
+            result, cpu_seconds = _timed(fn, *args)
+        else:
+            try:
+                result, cpu_seconds = await asyncio.get_running_loop().run_in_executor(
+                    self._pool(), _timed, fn, *args
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); start a fresh pool for later calls.
+                self.shutdown()
+                result, cpu_seconds = _timed(fn, *args)
+
+        timings = current_timings.get()
+        if timings is not None:
+            timings.cpu_seconds += cpu_seconds
+            timings.compute_batches += 1
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+compute_pool = ComputePool(settings.compute_pool_workers)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from time import perf_counter
+
+import httpx
+
+from .config import settings
+
+# Responses that mean the upstream is shedding load, not that the request was wrong.
+OVERLOAD_STATUS = {429, 502, 503, 504}
+OVERLOAD_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+_LATENCY_SMOOTHING = 0.2
+# The latency baseline creeps toward the smoothed latency so it can recover after a
+# route change instead of pinning the fastest response ever seen.
+_BASELINE_DRIFT = 0.01
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit for one upstream host.
+
+    Each healthy response adds `1 / limit`, i.e. about one slot per round of requests.
+    A 429, 5xx overload status, timeout or connection error cuts the limit by `backoff`;
+    smoothed latency above `latency_tolerance` times the baseline cuts it by a gentler
+    10%. Only requests started after the previous cut can cut again, so one burst of
+    failures counts as one congestion signal.
+    """
+
+    def __init__(
+        self,
+        floor: int,
+        ceiling: int,
+        initial: int,
+        backoff: float,
+        latency_tolerance: float,
+    ) -> None:
+        self.floor = max(floor, 1)
+        self.ceiling = max(ceiling, self.floor)
+        self.limit = float(min(max(initial, self.floor), self.ceiling))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._baseline: float | None = None
+        self._smoothed: float | None = None
+        self._last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self) -> None:
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller gave up; pass it on.
+                self.release()
+            elif waiter in self._waiters:
+                # `_wake` may already have dropped the cancelled future from the queue.
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _decrease(self, started_at: float, factor: float) -> None:
+        if started_at < self._last_decrease:
+            return
+        self.limit = max(float(self.floor), self.limit * factor)
+        self._last_decrease = perf_counter()
+        self.decreases += 1
+
+    def record(self, started_at: float, latency: float, overloaded: bool) -> None:
+        if overloaded:
+            self._decrease(started_at, self.backoff)
+            return
+
+        self._smoothed = (
+            latency
+            if self._smoothed is None
+            else self._smoothed + (latency - self._smoothed) * _LATENCY_SMOOTHING
+        )
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline += (self._smoothed - self._baseline) * _BASELINE_DRIFT
+
+        if self._smoothed > self._baseline * self.latency_tolerance:
+            self._decrease(started_at, 0.9)
+            return
+
+        if self.limit < self.ceiling:
+            self.limit = min(float(self.ceiling), self.limit + 1 / self.limit)
+            self.increases += 1
+            self._wake()
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "limit": round(self.limit, 2),
+            "inFlight": self.in_flight,
+            "queued": len(self._waiters),
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "latencyMs": round((self._smoothed or 0.0) * 1000, 1),
+            "baselineMs": round((self._baseline or 0.0) * 1000, 1),
+        }
+
+
+class AdaptiveLimits:
+    """Per-host `AdaptiveLimit`s, created on first use from the current settings."""
+
+    def __init__(self) -> None:
+        self._limits: dict[str, AdaptiveLimit] = {}
+
+    def get(self, host: str) -> AdaptiveLimit:
+        limit = self._limits.get(host)
+        if limit is None:
+            limit = AdaptiveLimit(
+                floor=settings.adaptive_concurrency_floor,
+                ceiling=settings.adaptive_concurrency_ceiling,
+                initial=settings.adaptive_concurrency_initial,
+                backoff=settings.adaptive_concurrency_backoff,
+                latency_tolerance=settings.adaptive_concurrency_latency_tolerance,
+            )
+            self._limits[host] = limit
+        return limit
+
+    def clear(self) -> None:
+        self._limits.clear()
+
+    def stats(self) -> dict[str, dict[str, float | int]]:
+        return {host: limit.stats() for host, limit in sorted(self._limits.items())}
+
+
+adaptive_limits = AdaptiveLimits()
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that gives the concurrency slot back once it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release: Callable[[], None] | None = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release, release = None, self._release
+                release()
+
+
+class AdaptiveLimitTransport(httpx.AsyncBaseTransport):
+    """Hold a slot of the host's `AdaptiveLimit` from send until the body is read or closed.
+
+    Latency is measured to the response headers, which is what the upstream controls.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limits: AdaptiveLimits | None = None) -> None:
+        self.transport = transport
+        self.limits = limits or adaptive_limits
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limit = self.limits.get(request.url.host)
+        await limit.acquire()
+        started = perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except OVERLOAD_ERRORS:
+            limit.record(started, perf_counter() - started, overloaded=True)
+            limit.release()
+            raise
+        except BaseException:
+            limit.release()
+            raise
+
+        limit.record(started, perf_counter() - started, overloaded=response.status_code in OVERLOAD_STATUS)
+        if isinstance(response.stream, httpx.ByteStream):
+            # The body is already in memory (e.g. `MockTransport`), and httpx never reads or
+            # closes a stream whose content it already has, so nothing would release the slot.
+            limit.release()
+            return response
+        response.stream = _ReleasingStream(response.stream, limit.release)  # type: ignore[arg-type]
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
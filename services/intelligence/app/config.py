@@ -1,3 +1,9 @@
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -21,8 +27,104 @@ class Settings(BaseSettings):
     sentry_dsn: str | None = None
     posthog_key: str | None = None
     posthog_host: str = "https://app.posthog.com"
+    http2_enabled: bool = True
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30.0
+    http_pool_limits: dict[str, int] = {}
+    http_cache_enabled: bool = True
+    http_cache_max_bytes: int = 256 * 1024 * 1024
+    http_cache_max_age_seconds: int = 14 * 86_400
+    trust_score_deadline_seconds: float = 6.0
+    batch_max_symbols: int = 100
+    batch_concurrency: int = 8
+    local_data_dir: str = ""
+    feature_cache_max_entries: int = 4096
+    feature_cache_ttl_seconds: dict[str, int] = {"market": 3600, "news": 300, "social": 600}
+    feature_cache_stale_grace_seconds: int = 1800
+    feature_cache_last_known_good_seconds: int = 7 * 86_400
+    history_years: int = 5
+    history_sync_concurrency: int = 8
+    history_backfill_upsert_window: int = 5000
+    benchmark_symbol: str = "^NSEI"
+    market_sync_quote_batch_size: int = 150
+    market_sync_quote_concurrency: int = 4
+    market_sync_quote_retries: int = 2
+    market_sync_quote_backoff_seconds: float = 1.0
+    market_sync_queue_size: int = 8
+    market_sync_upsert_window: int = 1000
+    supabase_upsert_chunk_size: int = 500
+    supabase_upsert_concurrency: int = 4
+    supabase_upsert_retries: int = 3
+    supabase_upsert_backoff_seconds: float = 0.5
+    supabase_upsert_timeout: float = 30.0
+    supabase_upsert_gzip: bool = True
+    supabase_page_size: int = 1000
+    supabase_read_chunk_size: int = 150
+    supabase_rpc_chunk_size: int = 1000
+    supabase_read_concurrency: int = 4
+    news_dedup_retention_hours: int = 96
+    near_duplicate_threshold: float = 0.75
+    near_duplicate_num_perm: int = 128
+    near_duplicate_window_hours: int = 96
+    job_shard_count: int = 4
+    job_shard_workers: int = 2
+    job_lease_ttl_seconds: int = 1800
+    compute_pool_workers: int = 2
+    trust_recompute_upsert_window: int = 250
+    trust_recompute_concurrency: int = 8
+    portfolio_sector_top_k: int = 10
+    portfolio_index_refresh_seconds: int = 3600
+    adaptive_concurrency_enabled: bool = True
+    adaptive_concurrency_floor: int = 1
+    adaptive_concurrency_ceiling: int = 16
+    adaptive_concurrency_initial: int = 4
+    adaptive_concurrency_backoff: float = 0.5
+    adaptive_concurrency_latency_tolerance: float = 2.0
+    rate_limit_per_minute: dict[str, float] = {"newsapi": 60, "reddit": 60}
+    rate_limit_burst: int = 10
+    rate_limit_interactive_reserve: float = 0.3
+    rate_limit_max_wait_seconds: float = 30.0
+    rate_limit_lease_tokens: int = 5
+    circuit_breaker_enabled: bool = True
+    circuit_failure_threshold: int = 5
+    circuit_open_seconds: float = 30.0
+    circuit_timeout_multiplier: float = 1.5
+    circuit_timeout_floor_seconds: float = 1.0
+    circuit_timeout_min_samples: int = 20
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
 settings = Settings()
+
+
+def local_data_path(*parts: str) -> Path:
+    base = (
+        Path(settings.local_data_dir)
+        if settings.local_data_dir
+        else Path(tempfile.gettempdir()) / "anylical-intelligence"
+    )
+    return base.joinpath(*parts)
+
+
+@contextmanager
+def atomic_path(path: Path) -> Iterator[Path]:
+    """Yield a temp path beside `path` that replaces it only if the block completes.
+
+    Readers in other processes see either the old file or the new one, never a partial
+    write. The temp name keeps `path`'s suffix, so writers such as `np.savez` that add
+    one keep the name intact.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp{path.suffix}")
+    try:
+        yield tmp_path
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_atomic(path: Path, payload: bytes) -> None:
+    with atomic_path(path) as tmp_path:
+        tmp_path.write_bytes(payload)
@@ -1,15 +1,113 @@
 from __future__ import annotations
 
 import hashlib
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+# Salts the fallback paths pass with a universe symbol; other salts (and symbols outside
+# the loaded universe) are hashed per call as before. The social ones follow
+# `reddit._fallback_posts`, which draws five posts per symbol.
+FALLBACK_SALTS: tuple[str, ...] = (
+    "close",
+    "volume",
+    "credibility",
+    "roe",
+    "de",
+    "revenue-growth",
+    "op-margin",
+    "interest-coverage",
+    "news",
+    "news-confidence",
+    "news-spike",
+    "bullish",
+    "velocity",
+    "social-confidence",
+    "meme-risk",
+    "latest-close",
+    "trend",
+    "historical",
+    "market",
+    "volatility",
+    "years",
+    "portfolio-trust",
+    "financial",
+    "previous-day",
+    *(f"social-fallback-{kind}-{idx}" for kind in ("sentiment", "karma", "age") for idx in range(5)),
+)
 
 
 def stable_unit(symbol: str, salt: str = "") -> float:
-    digest = hashlib.sha256(f"{symbol}:{salt}".encode("utf-8")).hexdigest()
-    value = int(digest[:8], 16)
+    # The first 4 digest bytes are the first 8 hex digits, without formatting the hexdigest.
+    value = int.from_bytes(hashlib.sha256(f"{symbol}:{salt}".encode("utf-8")).digest()[:4], "big")
     return (value % 10000) / 10000.0
 
 
+def fallback_units(symbols: Sequence[str], salts: Sequence[str] = FALLBACK_SALTS) -> np.ndarray:
+    """`stable_unit` for every (symbol, salt), as a symbols x salts array; pure, so it
+    can run in a worker."""
+    units = np.fromiter(
+        (stable_unit(symbol, salt) for symbol in symbols for salt in salts),
+        dtype=np.float64,
+        count=len(symbols) * len(salts),
+    )
+    return units.reshape(len(symbols), len(salts))
+
+
+class FallbackTable:
+    """Precomputed `stable_unit` values for the loaded universe.
+
+    Rows are symbols and columns are `FALLBACK_SALTS`. `score` answers `stable_score`
+    from the table. The rounded scores of one (salt, floor, ceiling) column are
+    computed for all symbols on first use, so a hot path does two dict lookups instead
+    of a sha256. Values are exactly those of the hashing path: the same float
+    arithmetic runs on the same units.
+    """
+
+    def __init__(self) -> None:
+        self._rows: dict[str, int] = {}
+        self._salts: dict[str, int] = {}
+        self._units = np.empty((0, 0), dtype=np.float64)
+        self._columns: dict[tuple[str, float, float], list[float]] = {}
+
+    def load(self, symbols: Sequence[str], units: np.ndarray, salts: Sequence[str] = FALLBACK_SALTS) -> None:
+        self._rows = {symbol: row for row, symbol in enumerate(symbols)}
+        self._salts = {salt: column for column, salt in enumerate(salts)}
+        self._units = units
+        self._columns = {}
+
+    def build(self, symbols: Sequence[str], salts: Sequence[str] = FALLBACK_SALTS) -> None:
+        self.load(symbols, fallback_units(symbols, salts), salts)
+
+    def score(self, symbol: str, floor: float, ceiling: float, salt: str) -> float | None:
+        row = self._rows.get(symbol)
+        if row is None:
+            return None
+        key = (salt, floor, ceiling)
+        column = self._columns.get(key)
+        if column is None:
+            index = self._salts.get(salt)
+            if index is None:
+                return None
+            column = [round(floor + (ceiling - floor) * unit, 2) for unit in self._units[:, index].tolist()]
+            self._columns[key] = column
+        return column[row]
+
+    def clear(self) -> None:
+        self.load([], np.empty((0, 0), dtype=np.float64), [])
+
+    def stats(self) -> dict[str, Any]:
+        return {"symbols": len(self._rows), "salts": len(self._salts), "columns": len(self._columns)}
+
+
+fallback_table = FallbackTable()
+
+
 def stable_score(symbol: str, floor: float, ceiling: float, salt: str = "") -> float:
+    score = fallback_table.score(symbol, floor, ceiling, salt)
+    if score is not None:
+        return score
     unit = stable_unit(symbol, salt)
     return round(floor + (ceiling - floor) * unit, 2)
 
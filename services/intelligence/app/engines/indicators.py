@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from ..config import settings
+from ..providers.history import PriceHistoryStore, price_history
+
+TRADING_DAYS_PER_YEAR = 252
+WINDOWS = {"vol_30d": 30, "vol_90d": 90, "vol_1y": TRADING_DAYS_PER_YEAR}
+MIN_OBSERVATIONS = 50
+# Symbols per close matrix when scanning a whole universe, to bound its memory.
+UNIVERSE_CHUNK = 500
+
+Indicators = dict[str, float | int]
+# (bar count, synced_through) of the benchmark series a cached row was computed against.
+BenchmarkVersion = tuple[int, date | None]
+
+
+def _day_index(ts: np.ndarray) -> np.ndarray:
+    return ts // 86_400
+
+
+def price_matrix(
+    symbols: list[str],
+    store: PriceHistoryStore,
+    start_ts: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Align closes for `symbols` on a shared day axis, padding missing sessions with NaN.
+
+    Returns (days, closes[n_symbols, n_days], bars_per_symbol).
+    """
+    series: list[np.ndarray] = []
+    counts = np.zeros(len(symbols), dtype=np.int64)
+    for row, symbol in enumerate(symbols):
+        bars = store.read(symbol)
+        counts[row] = len(bars)
+        series.append(bars[(bars["ts"] >= start_ts) & np.isfinite(bars["close"])])
+
+    days = np.unique(np.concatenate([_day_index(item["ts"]) for item in series] or [np.empty(0, np.int64)]))
+    closes = np.full((len(symbols), len(days)), np.nan)
+    for row, bars in enumerate(series):
+        closes[row, np.searchsorted(days, _day_index(bars["ts"]))] = bars["close"]
+    return days, closes, counts
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    return values[np.arange(values.shape[0])[:, None], index]
+
+
+def _nan_std(values: np.ndarray) -> np.ndarray:
+    count = np.sum(~np.isnan(values), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(values, axis=1) / count
+        variance = np.nansum((values - mean[:, None]) ** 2, axis=1) / np.maximum(count - 1, 1)
+    return np.where(count >= 2, np.sqrt(variance), np.nan)
+
+
+def compute_indicators(
+    days: np.ndarray,
+    closes: np.ndarray,
+    benchmark: np.ndarray | None,
+    now_day: int,
+) -> dict[str, np.ndarray]:
+    """Compute every indicator for every row of a ragged (NaN-padded) close matrix at once."""
+    n_rows, n_days = closes.shape
+    rows = np.arange(n_rows)
+    valid = ~np.isnan(closes)
+    observations = valid.sum(axis=1)
+    has_data = observations > 0
+
+    # Returns between consecutive valid closes, so gaps never produce a return.
+    filled = _forward_fill(closes)
+    previous = np.concatenate([np.full((n_rows, 1), np.nan), filled[:, :-1]], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.where(valid & (previous > 0), closes / previous - 1, np.nan)
+
+    daily_vol = np.nan_to_num(_nan_std(returns), nan=0.0)
+    windowed = {
+        name: _nan_std(returns[:, -window:]) * np.sqrt(TRADING_DAYS_PER_YEAR)
+        for name, window in WINDOWS.items()
+    }
+
+    first_index = np.argmax(valid, axis=1)
+    last_index = n_days - 1 - np.argmax(valid[:, ::-1], axis=1) if n_days else first_index
+    first_close = closes[rows, first_index] if n_days else np.full(n_rows, np.nan)
+    last_close = closes[rows, last_index] if n_days else np.full(n_rows, np.nan)
+
+    without_last = valid.copy()
+    if n_days:
+        without_last[rows, last_index] = False
+    previous_index = n_days - 1 - np.argmax(without_last[:, ::-1], axis=1) if n_days else first_index
+    previous_close = np.where(
+        without_last.any(axis=1),
+        closes[rows, previous_index] if n_days else np.nan,
+        last_close,
+    )
+
+    first_day = days[first_index] if n_days else np.zeros(n_rows, dtype=np.int64)
+    last_day = days[last_index] if n_days else np.zeros(n_rows, dtype=np.int64)
+    span_years = (last_day - first_day) / 365.25
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total_return = last_close / first_close - 1
+        cagr = np.where(span_years > 0, np.power(last_close / first_close, 1 / span_years) - 1, np.nan)
+        max_drawdown = np.nanmin(filled / np.fmax.accumulate(filled, axis=1) - 1, axis=1, initial=0.0)
+
+    beta = np.full(n_rows, np.nan)
+    if benchmark is not None and n_days:
+        bench_valid = ~np.isnan(benchmark)
+        bench_filled = _forward_fill(benchmark[None, :])[0]
+        bench_previous = np.concatenate([[np.nan], bench_filled[:-1]])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bench_returns = np.where(bench_valid & (bench_previous > 0), benchmark / bench_previous - 1, np.nan)
+        paired = ~np.isnan(returns) & ~np.isnan(bench_returns)[None, :]
+        count = paired.sum(axis=1)
+        asset = np.where(paired, returns, 0.0)
+        market = np.where(paired, bench_returns[None, :], 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            asset_mean = asset.sum(axis=1) / count
+            market_mean = market.sum(axis=1) / count
+            asset_dev = np.where(paired, asset - asset_mean[:, None], 0.0)
+            market_dev = np.where(paired, market - market_mean[:, None], 0.0)
+            covariance = (asset_dev * market_dev).sum(axis=1)
+            market_variance = (market_dev**2).sum(axis=1)
+            beta = np.where((count >= 2) & (market_variance > 0), covariance / market_variance, np.nan)
+
+    history_years = np.maximum((now_day - first_day) / 365.0, 0.0)
+    historical_score = np.clip(50 + np.nan_to_num(total_return) * 40 - daily_vol * 200, 0, 100)
+    market_score = np.clip(80 - daily_vol * 400, 0, 100)
+
+    return {
+        "observations": np.where(has_data, observations, 0),
+        "daily_volatility": daily_vol,
+        **windowed,
+        "max_drawdown": np.where(has_data, max_drawdown, np.nan),
+        "total_return": total_return,
+        "cagr": cagr,
+        "beta": beta,
+        "history_years": history_years,
+        "historical_score": historical_score,
+        "market_score": market_score,
+        "latest_close": last_close,
+        "previous_close": previous_close,
+    }
+
+
+class IndicatorEngine:
+    """Universe-wide indicator tables computed in one vectorized pass and cached per as-of date.
+
+    A cached row is reused while the symbol's bar count and the benchmark series (its bar
+    count and `synced_through`, which beta depends on) are unchanged.
+    """
+
+    def __init__(self, store: PriceHistoryStore, max_dates: int = 3) -> None:
+        self.store = store
+        self.max_dates = max_dates
+        self._tables: OrderedDict[date, dict[str, tuple[int, BenchmarkVersion, Indicators]]] = OrderedDict()
+
+    def _benchmark_version(self) -> BenchmarkVersion:
+        symbol = settings.benchmark_symbol
+        return len(self.store.read(symbol)), self.store.synced_through(symbol)
+
+    def refresh(self, symbols: list[str], as_of: date | None = None) -> dict[str, Indicators]:
+        as_of = as_of or datetime.now(timezone.utc).date()
+        now = datetime.combine(as_of, datetime.min.time(), timezone.utc)
+        window_start = now - timedelta(days=365 * settings.history_years)
+        benchmark_symbol = settings.benchmark_symbol
+        ordered = list(dict.fromkeys(symbols))
+
+        days, closes, counts = price_matrix(
+            [*ordered, benchmark_symbol],
+            self.store,
+            int(window_start.timestamp()),
+        )
+        benchmark = closes[-1] if counts[-1] else None
+        computed = compute_indicators(days, closes[:-1], benchmark, int(now.timestamp()) // 86_400)
+        benchmark_version = (int(counts[-1]), self.store.synced_through(benchmark_symbol))
+
+        table = self._tables.setdefault(as_of, {})
+        self._tables.move_to_end(as_of)
+        while len(self._tables) > self.max_dates:
+            self._tables.popitem(last=False)
+
+        results: dict[str, Indicators] = {}
+        for row, symbol in enumerate(ordered):
+            indicators = {name: values[row].item() for name, values in computed.items()}
+            table[symbol] = (int(counts[row]), benchmark_version, indicators)
+            results[symbol] = indicators
+        return results
+
+    def lookup_many(self, symbols: list[str], as_of: date | None = None) -> dict[str, Indicators]:
+        """Indicators for `symbols`, recomputing every stale or missing one in a single pass."""
+        as_of = as_of or datetime.now(timezone.utc).date()
+        table = self._tables.get(as_of, {})
+        benchmark_version = self._benchmark_version()
+        results: dict[str, Indicators] = {}
+        misses: list[str] = []
+        for symbol in dict.fromkeys(symbols):
+            cached = table.get(symbol)
+            if cached is not None and cached[:2] == (len(self.store.read(symbol)), benchmark_version):
+                results[symbol] = cached[2]
+            else:
+                misses.append(symbol)
+        if misses:
+            results.update(self.refresh(misses, as_of))
+        return results
+
+    def lookup(self, symbol: str, as_of: date | None = None) -> Indicators:
+        return self.lookup_many([symbol], as_of)[symbol]
+
+    def clear(self) -> None:
+        self._tables.clear()
+
+
+def realized_volatilities(symbols: list[str], store: PriceHistoryStore) -> dict[str, float]:
+    """Annualized realized volatility in percent (1y, else 90d) of every symbol with at
+    least `MIN_OBSERVATIONS` stored closes; pure over the store, so it can run in a worker."""
+    engine = IndicatorEngine(store, max_dates=1)
+    held = [symbol for symbol in dict.fromkeys(symbols) if len(store.read(symbol))]
+    volatilities: dict[str, float] = {}
+    for start in range(0, len(held), UNIVERSE_CHUNK):
+        for symbol, indicators in engine.refresh(held[start : start + UNIVERSE_CHUNK]).items():
+            if int(indicators["observations"]) < MIN_OBSERVATIONS:
+                continue
+            for name in ("vol_1y", "vol_90d"):
+                if math.isfinite(indicators[name]):
+                    volatilities[symbol] = round(float(indicators[name]) * 100, 2)
+                    break
+    return volatilities
+
+
+indicator_engine = IndicatorEngine(price_history)
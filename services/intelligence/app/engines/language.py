@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+import re
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from typing import Any
+
 FORBIDDEN_PHRASES = [
     "you should buy",
     "guaranteed profit",
@@ -7,11 +12,97 @@ FORBIDDEN_PHRASES = [
     "best stock to buy now",
     "sure shot",
 ]
+REPLACEMENT = "[removed-for-compliance]"
+
+
+class ComplianceFilter:
+    """Forbidden phrases compiled into one case-insensitive pattern.
+
+    Each text is scanned once, whatever the number of phrases, and every match is
+    replaced with `REPLACEMENT`. Matches are counted per phrase for auditing. The counts
+    are totals since the last `clear`, and `stats` reports them.
+    """
+
+    def __init__(self, phrases: Iterable[str], replacement: str = REPLACEMENT) -> None:
+        unique = {phrase.lower() for phrase in phrases if phrase}
+        self.phrases = sorted(unique, key=lambda phrase: (-len(phrase), phrase))
+        self.replacement = replacement
+        self.longest = len(self.phrases[0]) if self.phrases else 0
+        # ASCII folding only, so every match lowercases back to exactly one phrase.
+        self._pattern = re.compile("|".join(map(re.escape, self.phrases)), re.IGNORECASE | re.ASCII)
+        self.counts: Counter[str] = Counter()
+        self._texts = 0
+
+    def _replace(self, text: str, limit: int, counts: Counter[str]) -> tuple[str, int]:
+        """Replace matches starting before `limit`; returns the output and how much of
+        `text` it covers. Text from there on may still begin a match."""
+        parts: list[str] = []
+        position = 0
+        if self.phrases:
+            for match in self._pattern.finditer(text):
+                if match.start() >= limit:
+                    break
+                parts.append(text[position : match.start()])
+                parts.append(self.replacement)
+                counts[match.group().lower()] += 1
+                position = match.end()
+        consumed = max(position, min(limit, len(text)))
+        parts.append(text[position:consumed])
+        return "".join(parts), consumed
+
+    def sanitize(self, text: str) -> str:
+        self._texts += 1
+        return self._replace(text, len(text), self.counts)[0]
+
+    def sanitize_batch(self, texts: Sequence[str]) -> list[str]:
+        return [self.sanitize(text) for text in texts]
+
+    def stream(self) -> ComplianceStream:
+        return ComplianceStream(self)
+
+    def clear(self) -> None:
+        self.counts.clear()
+        self._texts = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {"texts": self._texts, "matches": dict(sorted(self.counts.items()))}
+
+
+class ComplianceStream:
+    """Incremental `ComplianceFilter.sanitize` for text that arrives in chunks.
+
+    `feed` returns the sanitized text that can no longer be part of a match and holds
+    back at most the longest phrase's length. `close` flushes the rest. Together they
+    output exactly what `sanitize` would for the joined chunks, even when a phrase is
+    split across chunks. `counts` holds this stream's matches; the filter's totals are
+    updated as well.
+    """
+
+    def __init__(self, owner: ComplianceFilter) -> None:
+        self.owner = owner
+        self.counts: Counter[str] = Counter()
+        self._buffer = ""
+
+    def _emit(self, limit: int) -> str:
+        counts: Counter[str] = Counter()
+        output, consumed = self.owner._replace(self._buffer, limit, counts)
+        self._buffer = self._buffer[consumed:]
+        self.counts.update(counts)
+        self.owner.counts.update(counts)
+        return output
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        # A match starting before this point fits entirely in the buffer.
+        return self._emit(len(self._buffer) - self.owner.longest + 1)
+
+    def close(self) -> str:
+        self.owner._texts += 1
+        return self._emit(len(self._buffer))
+
+
+compliance_filter = ComplianceFilter(FORBIDDEN_PHRASES)
 
 
 def sanitize_text(text: str) -> str:
-    output = text
-    for phrase in FORBIDDEN_PHRASES:
-        output = output.replace(phrase, "[removed-for-compliance]")
-        output = output.replace(phrase.title(), "[removed-for-compliance]")
-    return output
+    return compliance_filter.sanitize(text)
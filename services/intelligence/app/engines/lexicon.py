@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections.abc import Iterable, Mapping, Sequence
+
+# Below this many terms, one C-level substring search per term beats a compiled
+# pattern scan (see benchmarks/bench_lexicon.py); above it the single pass wins.
+REGEX_MIN_TERMS = 32
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Alternation factored by shared prefixes, so each position branches on one character
+    instead of trying every term. Optional tails are greedy: the longest term wins."""
+    trie: dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict[str, dict]) -> str:
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" not in node:
+            return body
+        return f"(?:{body})?" if len(branches) > 1 or len(body) > 1 else f"{body}?"
+
+    return render(trie)
+
+
+class Lexicon:
+    """Term sets compiled once and matched against a text in a single scan.
+
+    `scan` returns, per category, how many distinct terms of that category occur in the
+    lowercased text as substrings. That is exactly what `sum(term in text for term in
+    terms)` computes per set, but every set shares one pass.
+
+    Large lexicons are compiled into one prefix-factored pattern and searched from one
+    past each match's start. That visits every position where a term begins
+    and returns the longest term there. Shorter terms at the same position, and any term
+    inside a matched one, are credited through a precomputed containment map, so
+    overlapping terms are never missed. Small lexicons fall back to one `in` per term,
+    which CPython runs faster than a regex pass at that size.
+    """
+
+    def __init__(self, categories: Mapping[str, Iterable[str]], *, compiled: bool | None = None) -> None:
+        owners: dict[str, set[str]] = {}
+        for category, terms in categories.items():
+            for term in filter(None, terms):
+                owners.setdefault(term.lower(), set()).add(category)
+        self.categories = tuple(categories)
+        self._owners = {term: tuple(sorted(names)) for term, names in owners.items()}
+        self.compiled = len(owners) >= REGEX_MIN_TERMS if compiled is None else compiled
+
+        self._pattern = re.compile(_trie_pattern(owners)) if owners else None
+        self._contains = {term: tuple(other for other in owners if other in term) for term in owners}
+
+    def _found(self, text: str) -> set[str]:
+        if not self.compiled:
+            return {term for term in self._owners if term in text}
+        found: set[str] = set()
+        if self._pattern is None:
+            return found
+        search = self._pattern.search
+        position = 0
+        while (match := search(text, position)) is not None:
+            term = match.group()
+            if term not in found:
+                found.update(self._contains[term])
+            position = match.start() + 1
+        return found
+
+    def scan(self, text: str) -> Counter[str]:
+        hits: Counter[str] = Counter()
+        for term in self._found(text.lower()):
+            hits.update(self._owners[term])
+        return hits
+
+    def scan_batch(self, texts: Sequence[str]) -> list[Counter[str]]:
+        """`scan` for a whole payload's texts, in order."""
+        return [self.scan(text) for text in texts]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import re
+import time
+from collections import deque
+from functools import lru_cache
+from hashlib import blake2b
+from pathlib import Path
+
+import numpy as np
+
+from ..config import atomic_path, local_data_path, settings
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_HASH_SHIFT = np.uint64(32)
+
+
+def tokens(text: str) -> set[str]:
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+
+def _token_hashes(text: str) -> np.ndarray:
+    hashes = [blake2b(token.encode("utf-8"), digest_size=4).digest() for token in tokens(text)]
+    return np.array([int.from_bytes(value, "little") for value in hashes], dtype=np.uint64)
+
+
+@lru_cache(maxsize=8)
+def _permutations(num_perm: int) -> tuple[np.ndarray, np.ndarray]:
+    # Fixed seed: signatures persisted by one run must stay comparable with the next.
+    generator = np.random.default_rng(0x5EED)
+    multipliers = generator.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    offsets = generator.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    return multipliers, offsets
+
+
+@lru_cache(maxsize=32)
+def lsh_bands(threshold: float, num_perm: int, recall: float = 0.95) -> tuple[int, int]:
+    """(bands, rows) with the widest bands that still surface a pair at `threshold` with
+    probability `recall`; wider bands mean fewer unrelated candidates per bucket."""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold**rows) ** bands < recall:
+            break
+        best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index of recent texts for near-duplicate lookups.
+
+    Each text is reduced to a `num_perm` MinHash signature over its word tokens and
+    filed under one bucket per LSH band, so a lookup touches `bands` buckets no matter
+    how many texts the window holds. Bucket candidates are confirmed by the estimated
+    Jaccard similarity, which must reach `threshold`. Entries are scoped (e.g. by
+    symbol), so the same syndicated story under two tickers is not a duplicate.
+
+    A saved window records `synced_at`, when it last took in the texts stored upstream,
+    so a job can top it up with only what was stored since.
+    """
+
+    def __init__(
+        self,
+        threshold: float | None = None,
+        num_perm: int | None = None,
+        window_seconds: float | None = None,
+        path: Path | None = None,
+    ) -> None:
+        self.threshold = settings.near_duplicate_threshold if threshold is None else threshold
+        self.num_perm = num_perm or settings.near_duplicate_num_perm
+        self.window_seconds = (
+            settings.near_duplicate_window_hours * 3600 if window_seconds is None else window_seconds
+        )
+        self.path = path
+        self.bands, self.rows = lsh_bands(self.threshold, self.num_perm)
+        self._multipliers, self._offsets = _permutations(self.num_perm)
+        self._buckets: list[dict[tuple[str, bytes], set[str]]] = [{} for _ in range(self.bands)]
+        self._entries: dict[str, tuple[str, float, np.ndarray]] = {}
+        self._order: deque[tuple[str, float]] = deque()
+        self.synced_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> np.ndarray | None:
+        hashes = _token_hashes(text)
+        if not len(hashes):
+            return None
+        # Multiply-shift hashing; uint64 arithmetic wraps, which the family relies on.
+        permuted = (hashes[:, None] * self._multipliers[None, :] + self._offsets[None, :]) >> _HASH_SHIFT
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, scope: str, signature: np.ndarray) -> list[tuple[str, bytes]]:
+        return [
+            (scope, signature[band * self.rows : (band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _match(self, scope: str, signature: np.ndarray, exclude: str | None) -> str | None:
+        candidates: set[str] = set()
+        for band, key in enumerate(self._band_keys(scope, signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+        candidates.discard(exclude or "")
+
+        best: tuple[float, str] | None = None
+        for candidate in candidates:
+            _scope, _added_at, other = self._entries[candidate]
+            similarity = float(np.mean(other == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = (similarity, candidate)
+        return best[1] if best else None
+
+    def query(self, text: str, scope: str = "", exclude: str | None = None) -> str | None:
+        """Key of the most similar indexed text in `scope`, if any reaches the threshold."""
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        return self._match(scope, signature, exclude)
+
+    def add(self, key: str, text: str, scope: str = "", added_at: float | None = None) -> None:
+        signature = self.signature(text)
+        if signature is not None:
+            self._insert(key, scope, added_at or time.time(), signature)
+
+    def _insert(self, key: str, scope: str, added_at: float, signature: np.ndarray) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (scope, added_at, signature)
+        self._order.append((key, added_at))
+        for band, band_key in enumerate(self._band_keys(scope, signature)):
+            self._buckets[band].setdefault(band_key, set()).add(key)
+
+    def check_and_add(
+        self,
+        key: str,
+        text: str,
+        scope: str = "",
+        added_at: float | None = None,
+    ) -> str | None:
+        """Look `text` up, then index it; returns the earlier near-duplicate's key, if any."""
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        match = self._match(scope, signature, exclude=key)
+        self._insert(key, scope, added_at or time.time(), signature)
+        return match
+
+    def _remove(self, key: str) -> None:
+        scope, _added_at, signature = self._entries.pop(key)
+        for band, band_key in enumerate(self._band_keys(scope, signature)):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def expire(self, now: float | None = None) -> int:
+        cutoff = (now or time.time()) - self.window_seconds
+        removed = 0
+        while self._order and self._order[0][1] < cutoff:
+            key, added_at = self._order.popleft()
+            entry = self._entries.get(key)
+            # A re-added key leaves an older queue position behind; only the latest counts.
+            if entry is not None and entry[1] == added_at:
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def load(self) -> bool:
+        if self.path is None:
+            return False
+        try:
+            with np.load(self.path) as payload:
+                keys = payload["keys"].tolist()
+                scopes = payload["scopes"].tolist()
+                added = payload["added_at"].tolist()
+                signatures = payload["signatures"]
+                synced_at = float(payload["synced_at"]) if "synced_at" in payload else None
+        except (OSError, ValueError, KeyError):
+            return False
+        if signatures.ndim != 2 or signatures.shape[1] != self.num_perm:
+            return False
+
+        for key, scope, added_at, signature in zip(keys, scopes, added, signatures):
+            self._insert(str(key), str(scope), float(added_at), signature.astype(np.uint32))
+        self.synced_at = None if synced_at is None or np.isnan(synced_at) else synced_at
+        self.expire()
+        return True
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.expire()
+        keys = list(self._entries)
+        with atomic_path(self.path) as tmp_path:
+            np.savez(
+                tmp_path,
+                keys=np.array(keys, dtype=str),
+                scopes=np.array([self._entries[key][0] for key in keys], dtype=str),
+                added_at=np.array([self._entries[key][1] for key in keys], dtype=np.float64),
+                signatures=np.array(
+                    [self._entries[key][2] for key in keys] or np.empty((0, self.num_perm)),
+                    dtype=np.uint32,
+                ),
+                synced_at=np.float64(np.nan if self.synced_at is None else self.synced_at),
+            )
+
+
+def persistent_index(name: str) -> NearDuplicateIndex:
+    """Window index stored under `LOCAL_DATA_DIR/near-duplicates`, for ingest jobs."""
+    index = NearDuplicateIndex(path=local_data_path("near-duplicates", f"{name}.npz"))
+    index.load()
+    return index
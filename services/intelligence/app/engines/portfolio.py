@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import time
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
+from typing import Any
 
+import numpy as np
+
+from ..config import settings
 from .common import clamp, stable_score
 
 
@@ -12,7 +18,8 @@ class Asset:
     sector: str
 
 
-UNIVERSE = [
+# Serves plans until the first refresh from the synced universe (and without Supabase).
+SEED_UNIVERSE = [
     Asset("NIFTYBEES.NS", "Nippon India ETF Nifty 50", "ETF"),
     Asset("RELIANCE.NS", "Reliance Industries", "Energy"),
     Asset("TCS.NS", "Tata Consultancy Services", "Information Technology"),
@@ -38,79 +45,242 @@ PERSONA_TARGET_RISK = {
     "FALCON": 85.0,
 }
 
+SECTOR_CAP = 35.0
+# Flat prior (annualized %) for symbols with no measured volatility yet: the same for all
+# of them, so it neither ranks them nor lets the risk limit pick among them.
+UNMEASURED_VOLATILITY = 24.0
+_RISK_BISECTIONS = 40
 
-def _base_assets_for_persona(persona: str) -> list[Asset]:
-    if persona == "TURTLE":
-        return [UNIVERSE[0], UNIVERSE[4], UNIVERSE[6], UNIVERSE[7]]
-    if persona == "OWL":
-        return [UNIVERSE[0], UNIVERSE[1], UNIVERSE[4], UNIVERSE[6], UNIVERSE[8]]
-    if persona == "TIGER":
-        return [UNIVERSE[0], UNIVERSE[1], UNIVERSE[2], UNIVERSE[4], UNIVERSE[8]]
-    return [UNIVERSE[0], UNIVERSE[1], UNIVERSE[2], UNIVERSE[3], UNIVERSE[8]]
 
+def _fallback_trust(symbol: str) -> float:
+    return stable_score(symbol, 55, 90, "portfolio-trust")
 
-def _score_asset(symbol: str) -> tuple[float, float]:
-    trust = stable_score(symbol, 55, 90, "portfolio-trust")
-    volatility = stable_score(symbol, 12, 36, "portfolio-vol")
-    return trust, volatility
 
+def _group_ranks(groups: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """Rank of each element within its group when the elements are taken in `order`."""
+    ranked = order[np.argsort(groups[order], kind="stable")]
+    sorted_groups = groups[ranked]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    lengths = np.diff(np.r_[starts, len(ranked)])
+    ranks = np.empty(len(groups), dtype=np.int64)
+    ranks[ranked] = np.arange(len(ranked)) - np.repeat(starts, lengths)
+    return ranks
 
-def generate_portfolio(risk_persona: str, amount: float, horizon_months: int) -> dict:
-    assets = _base_assets_for_persona(risk_persona)
-    cap = PERSONA_CAP[risk_persona]
 
-    weighted = []
-    total_trust = 0.0
-    for asset in assets:
-        trust, volatility = _score_asset(asset.symbol)
-        # bias toward trust while penalizing excessive volatility
-        weight_signal = max(0.1, trust - volatility * 0.7)
-        total_trust += weight_signal
-        weighted.append((asset, trust, volatility, weight_signal))
-
-    allocations = []
-    sector_weight: dict[str, float] = {}
-    remaining = 100.0
-
-    for idx, (asset, trust, volatility, signal) in enumerate(weighted):
-        if idx == len(weighted) - 1:
-            weight = round(remaining, 2)
-        else:
-            proposed = round((signal / total_trust) * 100, 2)
-            proposed = min(proposed, cap)
-            # enforce 35% sector cap
-            current_sector = sector_weight.get(asset.sector, 0.0)
-            proposed = min(proposed, max(0.0, 35.0 - current_sector))
-            weight = proposed
-
-        sector_weight[asset.sector] = sector_weight.get(asset.sector, 0.0) + weight
-        remaining = round(max(0.0, remaining - weight), 2)
-
-        allocations.append(
-            {
-                "symbol": asset.symbol,
-                "label": asset.label,
-                "sector": asset.sector,
-                "weightPct": weight,
-                "expectedVolatility": round(volatility, 2),
-                "trustScore": round(trust, 2),
-            }
+def candidate_table(
+    stocks: Sequence[Mapping[str, str]],
+    trust_scores: Mapping[str, float],
+    volatilities: Mapping[str, float],
+    top_k: int,
+) -> dict[str, Any]:
+    """Per-sector top-`top_k` candidates by trust and, among symbols with a realized
+    volatility in `volatilities`, by low volatility, as arrays; pure, so it can run in a
+    worker. Other symbols carry `UNMEASURED_VOLATILITY`."""
+    unique = list({stock["symbol"]: stock for stock in stocks if stock.get("symbol")}.values())
+    sector_names = [stock.get("sector") or "Unclassified" for stock in unique]
+    names, sectors = np.unique(np.array(sector_names, dtype=object), return_inverse=True)
+
+    trust = np.array(
+        [
+            trust_scores[stock["symbol"]] if stock["symbol"] in trust_scores else _fallback_trust(stock["symbol"])
+            for stock in unique
+        ],
+        dtype=np.float64,
+    )
+    measured = np.array([stock["symbol"] in volatilities for stock in unique], dtype=bool)
+    volatility = np.array(
+        [volatilities.get(stock["symbol"], UNMEASURED_VOLATILITY) for stock in unique],
+        dtype=np.float64,
+    )
+
+    top_k = max(top_k, 1)
+    by_trust = _group_ranks(sectors, np.lexsort((volatility, -trust)))
+    # Unmeasured symbols sort after every measured one, so they never win a low-volatility slot.
+    by_volatility = _group_ranks(sectors, np.lexsort((-trust, volatility, ~measured)))
+    keep = np.flatnonzero((by_trust < top_k) | ((by_volatility < top_k) & measured))
+    return {
+        "symbols": [unique[idx]["symbol"] for idx in keep],
+        "labels": [unique[idx].get("name") or unique[idx]["symbol"] for idx in keep],
+        "sector_names": [str(name) for name in names],
+        "sectors": sectors[keep],
+        "trust": trust[keep],
+        "volatility": volatility[keep],
+        "measured": measured[keep],
+        "eligible": len(unique),
+    }
+
+
+class PortfolioIndex:
+    """Candidate index over the synced universe for portfolio generation.
+
+    Every symbol gets a trust score (the latest recomputed one, else the deterministic
+    fallback) and, when its price history has been measured, its realized volatility.
+    Per sector, only the `top_k` most trusted and the `top_k` least volatile measured
+    symbols are kept as candidates. The optimizer therefore sees at most `2 * top_k`
+    symbols per sector, however many thousand are eligible.
+    """
+
+    def __init__(self) -> None:
+        seed = [{"symbol": asset.symbol, "name": asset.label, "sector": asset.sector} for asset in SEED_UNIVERSE]
+        self.load(candidate_table(seed, {}, {}, len(seed)))
+        self.refreshed_at = 0.0
+
+    def load(self, table: Mapping[str, Any]) -> None:
+        self.symbols: list[str] = table["symbols"]
+        self.labels: list[str] = table["labels"]
+        self.sector_names: list[str] = table["sector_names"]
+        self.sectors: np.ndarray = table["sectors"]
+        self.trust: np.ndarray = table["trust"]
+        self.volatility: np.ndarray = table["volatility"]
+        self.measured: np.ndarray = table["measured"]
+        self.eligible: int = table["eligible"]
+        self.refreshed_at = time.time()
+
+    def build(
+        self,
+        stocks: Sequence[Mapping[str, str]],
+        trust_scores: Mapping[str, float] | None = None,
+        volatilities: Mapping[str, float] | None = None,
+        top_k: int | None = None,
+    ) -> None:
+        self.load(
+            candidate_table(stocks, trust_scores or {}, volatilities or {}, top_k or settings.portfolio_sector_top_k)
         )
 
-    if remaining > 0:
-        allocations[0]["weightPct"] = round(allocations[0]["weightPct"] + remaining, 2)
+    def age(self) -> float:
+        return time.time() - self.refreshed_at
 
-    # risk alignment check
-    portfolio_risk = sum(item["weightPct"] * item["expectedVolatility"] for item in allocations) / 100
+    def stats(self) -> dict[str, Any]:
+        return {
+            "eligible": self.eligible,
+            "candidates": len(self.symbols),
+            "sectors": len(self.sector_names),
+            "measuredVolatility": int(self.measured.sum()),
+            "ageSeconds": round(self.age(), 1) if self.refreshed_at else None,
+        }
+
+
+portfolio_index = PortfolioIndex()
+
+
+def _greedy_fill(priority: np.ndarray, sectors: np.ndarray, cap: float, sector_cap: float) -> np.ndarray:
+    """Weights from filling candidates in `priority` order, each up to the persona cap,
+    its sector's remaining room and the remaining 100%; vectorized over all candidates.
+
+    Per-asset, per-sector and total caps form a polymatroid, so this greedy fill is the
+    optimum of the linear objective `priority @ weights`.
+    """
+    order = np.argsort(-priority, kind="stable")
+    ranks = _group_ranks(sectors, order)
+    room = np.clip(sector_cap - ranks * cap, 0.0, cap)[order]
+    before = np.cumsum(room) - room
+    weights = np.empty(len(priority), dtype=np.float64)
+    weights[order] = np.clip(np.minimum(room, 100.0 - before), 0.0, None)
+    return weights
+
+
+def _risk(weights: np.ndarray, volatility: np.ndarray) -> float:
+    return float(weights @ volatility) / 100
+
+
+def optimize_weights(
+    signal: np.ndarray,
+    volatility: np.ndarray,
+    sectors: np.ndarray,
+    cap: float,
+    risk_limit: float,
+    sector_cap: float = SECTOR_CAP,
+) -> tuple[np.ndarray, bool]:
+    """Weights maximizing `signal @ weights` under the persona cap, the sector cap and
+    weighted volatility <= `risk_limit`; also whether the risk limit could be met.
+
+    The risk limit is priced in by a Lagrange multiplier on volatility, found by
+    bisection; the two bracketing greedy fills are then mixed to land on the limit
+    exactly. If even the least volatile fill breaks the limit, that fill is returned.
+    """
+    weights = _greedy_fill(signal, sectors, cap, sector_cap)
+    if _risk(weights, volatility) <= risk_limit:
+        return weights, True
+
+    # Ordering purely by volatility (signal as tie-break) gives the least risky fill.
+    spread = float(np.ptp(signal)) + 1.0
+    steps = np.diff(np.unique(volatility))
+    ceiling = spread / float(steps.min()) + 1.0 if len(steps) else 1.0
+    safest = _greedy_fill(signal - ceiling * volatility, sectors, cap, sector_cap)
+    if _risk(safest, volatility) > risk_limit:
+        return safest, False
+
+    low, high, risky = 0.0, ceiling, weights
+    for _ in range(_RISK_BISECTIONS):
+        middle = (low + high) / 2
+        candidate = _greedy_fill(signal - middle * volatility, sectors, cap, sector_cap)
+        if _risk(candidate, volatility) > risk_limit:
+            low, risky = middle, candidate
+        else:
+            high, safest = middle, candidate
+
+    over = _risk(risky, volatility) - risk_limit
+    under = risk_limit - _risk(safest, volatility)
+    share = over / (over + under) if over + under > 0 else 1.0
+    return (1 - share) * risky + share * safest, True
+
+
+def _rounded(weights: np.ndarray, sectors: np.ndarray, cap: float) -> np.ndarray:
+    """Weights to two decimals summing to exactly 100, the residual cent or two going to
+    the holding with the most room under its caps."""
+    rounded = np.round(weights, 2)
+    residual = round(100.0 - float(rounded.sum()), 2)
+    if residual:
+        sector_totals = np.bincount(sectors, weights=rounded)
+        headroom = np.minimum(cap - rounded, SECTOR_CAP - sector_totals[sectors])
+        headroom[rounded <= 0] = -np.inf
+        target = int(np.argmax(headroom)) if residual > 0 else int(np.argmax(rounded))
+        rounded[target] = round(float(rounded[target]) + residual, 2)
+    return rounded
+
+
+def generate_portfolio(
+    risk_persona: str,
+    amount: float,
+    horizon_months: int,
+    index: PortfolioIndex | None = None,
+) -> dict:
+    index = index or portfolio_index
+    cap = PERSONA_CAP[risk_persona]
     risk_tolerance = PERSONA_TARGET_RISK[risk_persona]
 
+    # bias toward trust while penalizing excessive volatility
+    signal = np.maximum(0.1, index.trust - index.volatility * 0.7)
+    weights, within_tolerance = optimize_weights(signal, index.volatility, index.sectors, cap, risk_tolerance)
+
     warnings: list[str] = []
-    if portfolio_risk > risk_tolerance:
-        warnings.append("Portfolio risk exceeded persona tolerance; conservative rebalancing applied.")
-        scale = risk_tolerance / max(portfolio_risk, 1e-6)
-        for item in allocations:
-            item["expectedVolatility"] = round(item["expectedVolatility"] * scale, 2)
-        portfolio_risk = risk_tolerance
+    if weights.sum() < 100.0 - 1e-6:
+        warnings.append("Too few sectors to stay within the 35% sector cap; allocation scaled up to 100%.")
+        weights = weights * (100.0 / max(float(weights.sum()), 1e-6))
+    weights = _rounded(weights, index.sectors, cap)
+
+    allocations = [
+        {
+            "symbol": index.symbols[idx],
+            "label": index.labels[idx],
+            "sector": index.sector_names[index.sectors[idx]],
+            "weightPct": float(weights[idx]),
+            "expectedVolatility": round(float(index.volatility[idx]), 2),
+            "trustScore": round(float(index.trust[idx]), 2),
+        }
+        for idx in np.argsort(-weights, kind="stable")
+        if weights[idx] > 0
+    ]
+
+    portfolio_risk = sum(item["weightPct"] * item["expectedVolatility"] for item in allocations) / 100
+    if not within_tolerance:
+        warnings.append("Portfolio risk exceeded persona tolerance; lowest-volatility allocation applied.")
+    unmeasured = int(np.count_nonzero((weights > 0) & ~index.measured))
+    if unmeasured:
+        warnings.append(
+            f"{unmeasured} holding(s) have no price history yet; "
+            f"their volatility is a flat {UNMEASURED_VOLATILITY:g}% estimate."
+        )
 
     confidence = clamp(78 - (portfolio_risk / 2.5) + min(horizon_months / 36, 10), 45, 92)
     risk_level = (
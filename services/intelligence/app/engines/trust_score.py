@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
 from datetime import date
 
 from .common import clamp, stable_score
 from .language import sanitize_text
 from .social import social_hype_penalty
-from ..providers.newsapi import fetch_news_features
-from ..providers.reddit import fetch_social_features
-from ..providers.yahoo import fetch_market_features
+from ..config import settings
+from ..providers.cache import feature_cache
+from ..providers.newsapi import fallback_news_features, fetch_news_features
+from ..providers.reddit import fallback_social_features, fetch_social_features
+from ..providers.yahoo import fallback_market_features, fetch_market_features
 from ..schemas import TrustComponents, TrustScoreResponse
 
+FeatureMap = dict[str, float | int | bool]
+
+PROVIDERS: dict[str, tuple[Callable[[str], Awaitable[FeatureMap]], Callable[[str], FeatureMap]]] = {
+    "market": (fetch_market_features, fallback_market_features),
+    "news": (fetch_news_features, fallback_news_features),
+    "social": (fetch_social_features, fallback_social_features),
+}
+
 
 def _trust_band(score: float) -> str:
     if score >= 80:
@@ -21,14 +34,70 @@ def _trust_band(score: float) -> str:
     return "AVOID"
 
 
+@dataclass
+class ProviderSnapshot:
+    """Provider features for one symbol, fetched once and shared by every consumer."""
+
+    symbol: str
+    market: FeatureMap
+    news: FeatureMap
+    social: FeatureMap
+    completed: list[str] = field(default_factory=list)
+    timed_out: list[str] = field(default_factory=list)
+
+
+async def fetch_provider_snapshot(
+    symbol: str,
+    deadline_seconds: float | None = None,
+) -> ProviderSnapshot:
+    """Fetch every provider concurrently under one deadline.
+
+    Providers that miss the deadline (or raise) are replaced by their last-known-good
+    cached features, or their synthetic fallback, both marked stale.
+    """
+    budget = settings.trust_score_deadline_seconds if deadline_seconds is None else deadline_seconds
+    tasks = {
+        name: asyncio.create_task(fetch(symbol))
+        for name, (fetch, _fallback) in PROVIDERS.items()
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=max(budget, 0.0))
+    for task in pending:
+        task.cancel()
+
+    features: dict[str, FeatureMap] = {}
+    completed: list[str] = []
+    timed_out: list[str] = []
+    for name, task in tasks.items():
+        if task in done and task.exception() is None:
+            features[name] = task.result()
+            completed.append(name)
+        else:
+            known_good = feature_cache.last_known_good(name, symbol)
+            features[name] = known_good if known_good is not None else PROVIDERS[name][1](symbol)
+            timed_out.append(name)
+
+    return ProviderSnapshot(
+        symbol=symbol,
+        market=features["market"],
+        news=features["news"],
+        social=features["social"],
+        completed=completed,
+        timed_out=timed_out,
+    )
+
+
 async def compute_trust_score(
     symbol: str,
     previous_score: float | None = None,
     as_of_date: date | None = None,
+    deadline_seconds: float | None = None,
+    snapshot: ProviderSnapshot | None = None,
 ) -> TrustScoreResponse:
-    market = await fetch_market_features(symbol)
-    news = await fetch_news_features(symbol)
-    social = await fetch_social_features(symbol)
+    if snapshot is None:
+        snapshot = await fetch_provider_snapshot(symbol, deadline_seconds)
+    market = snapshot.market
+    news = snapshot.news
+    social = snapshot.social
 
     historical_score = float(market["historical_score"])
     market_score = float(market["market_score"])
@@ -122,4 +191,6 @@ async def compute_trust_score(
             hypePenalty=round(hype_penalty, 2),
         ),
         explanations=explanations,
+        providersCompleted=list(snapshot.completed),
+        providersTimedOut=list(snapshot.timed_out),
     )
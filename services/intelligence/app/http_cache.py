@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from hashlib import sha1, sha256
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+import httpx
+
+from .config import local_data_path, settings, write_atomic
+
+# Bodies are stored as received (still content-encoded), but replayed without the origin's framing.
+_DROPPED_HEADERS = {"content-length", "transfer-encoding", "connection"}
+_CHUNK_SIZE = 64 * 1024
+# A URL carrying one of these (e.g. a chart delta ending at "now") is never requested twice.
+_VOLATILE_PARAMS = {"period1", "period2"}
+# Stores between two size/age sweeps of the cache directory.
+_PRUNE_EVERY = 32
+
+
+@dataclass
+class CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    sha256: str
+    headers: list[tuple[str, str]]
+    body_path: Path
+
+
+def _replayable_headers(headers: httpx.Headers) -> list[tuple[str, str]]:
+    return [(key, value) for key, value in headers.items() if key.lower() not in _DROPPED_HEADERS]
+
+
+def _carried_extensions(response: httpx.Response, status: str, digest: str | None) -> dict[str, Any]:
+    extensions = {
+        key: response.extensions[key] for key in ("http_version", "reason_phrase") if key in response.extensions
+    }
+    return {**extensions, "http_cache": {"status": status, "sha256": digest}}
+
+
+class _FileStream(httpx.AsyncByteStream):
+    """Replay a stored body from disk in chunks."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with self.path.open("rb") as handle:
+            while chunk := handle.read(_CHUNK_SIZE):
+                yield chunk
+
+
+class _TeeStream(httpx.AsyncByteStream):
+    """Pass the origin body through while writing it to a temp file next to the cache.
+
+    The copy is committed only once the body has been read to the end; a reader that
+    stops early (a row limit, an error) leaves nothing behind. On commit the body digest
+    is filled into the response's `http_cache` extension.
+    """
+
+    def __init__(
+        self,
+        stream: httpx.AsyncByteStream,
+        cache: HttpCache,
+        url: str,
+        response: httpx.Response,
+        info: dict[str, Any],
+    ) -> None:
+        self._stream = stream
+        self._cache = cache
+        self._url = url
+        self._response = response
+        self._info = info
+        self._tmp_path = cache.temp_body_path(url)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        digest = sha256()
+        handle = None
+        if self._tmp_path is not None:
+            try:
+                self._tmp_path.parent.mkdir(parents=True, exist_ok=True)
+                handle = self._tmp_path.open("wb")
+            except OSError:
+                handle = None
+        try:
+            async for chunk in self._stream:
+                digest.update(chunk)
+                if handle is not None:
+                    handle.write(chunk)
+                yield chunk
+        finally:
+            if handle is not None:
+                handle.close()
+        self._info["sha256"] = self._cache.commit(self._url, self._response, self._tmp_path, digest.hexdigest())
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._tmp_path is not None:
+                self._tmp_path.unlink(missing_ok=True)
+
+
+class HttpCache:
+    """On-disk store of GET response bodies and their validators (ETag / Last-Modified).
+
+    Next to the raw bodies it keeps parsed results keyed by the body's SHA-256, so callers
+    that parse a large download can skip the parse when the content has not changed.
+    Stored responses are pruned by age and total size every few stores.
+    """
+
+    def __init__(self, directory: Path | None) -> None:
+        self.directory = directory
+        self._counters: Counter[str] = Counter()
+
+    def _key(self, url: str) -> str:
+        return sha1(url.encode("utf-8")).hexdigest()
+
+    def _meta_path(self, url: str) -> Path | None:
+        if self.directory is None:
+            return None
+        return self.directory / "responses" / f"{self._key(url)}.json"
+
+    def load(self, url: str) -> CachedResponse | None:
+        """The stored validators for `url`. Bodies are named by their digest and the
+        metadata is replaced atomically after its body, so the pair cannot disagree and
+        nothing is re-hashed here."""
+        meta_path = self._meta_path(url)
+        if meta_path is None:
+            return None
+        try:
+            meta = json.loads(meta_path.read_text())
+            digest = meta["sha256"]
+        except (OSError, ValueError, KeyError):
+            return None
+        body_path = meta_path.with_name(f"{self._key(url)}.{digest}.body")
+        if not body_path.exists():
+            return None
+        return CachedResponse(
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            sha256=digest,
+            headers=[tuple(item) for item in meta.get("headers", [])],
+            body_path=body_path,
+        )
+
+    def touch(self, cached: CachedResponse) -> None:
+        """Mark an entry as used, so size pruning evicts it last."""
+        try:
+            cached.body_path.touch()
+        except OSError:
+            return
+
+    def temp_body_path(self, url: str) -> Path | None:
+        # Unique per request: concurrent GETs of one URL each write their own file.
+        meta_path = self._meta_path(url)
+        return None if meta_path is None else meta_path.with_name(f"{self._key(url)}.{uuid4().hex}.tmp")
+
+    def commit(self, url: str, response: httpx.Response, body_path: Path | None, digest: str) -> str:
+        """Move a fully received body into place and record its validators."""
+        meta_path = self._meta_path(url)
+        if meta_path is None or body_path is None:
+            return digest
+        meta = {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "sha256": digest,
+            "headers": _replayable_headers(response.headers),
+        }
+        try:
+            # Body first, under its own digest: the metadata only ever names a complete body.
+            body_path.replace(meta_path.with_name(f"{self._key(url)}.{digest}.body"))
+            write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+        except OSError:
+            return digest
+        # Older bodies of this URL are no longer referenced.
+        for stale in meta_path.parent.glob(f"{self._key(url)}.*.body"):
+            if stale.name != f"{self._key(url)}.{digest}.body":
+                stale.unlink(missing_ok=True)
+        self._counters["stored"] += 1
+        if self._counters["stored"] % _PRUNE_EVERY == 1:
+            self.prune()
+        return digest
+
+    def prune(self, max_bytes: int | None = None, max_age_seconds: float | None = None) -> int:
+        """Drop entries unused for `HTTP_CACHE_MAX_AGE_SECONDS`, then the least recently
+        used ones until the stored responses fit in `HTTP_CACHE_MAX_BYTES`. Returns how
+        many entries were removed."""
+        if self.directory is None:
+            return 0
+        max_bytes = settings.http_cache_max_bytes if max_bytes is None else max_bytes
+        max_age_seconds = settings.http_cache_max_age_seconds if max_age_seconds is None else max_age_seconds
+        entries: dict[str, list[Path]] = {}
+        try:
+            for path in (self.directory / "responses").iterdir():
+                entries.setdefault(path.name.split(".", 1)[0], []).append(path)
+        except OSError:
+            return 0
+
+        sized: list[tuple[float, int, str]] = []
+        for key, paths in entries.items():
+            try:
+                stats = [path.stat() for path in paths]
+            except OSError:
+                continue
+            sized.append((max(stat.st_mtime for stat in stats), sum(stat.st_size for stat in stats), key))
+
+        cutoff = time.time() - max_age_seconds
+        total = sum(size for _mtime, size, _key in sized)
+        removed = 0
+        for mtime, size, key in sorted(sized):
+            if mtime >= cutoff and total <= max_bytes:
+                break
+            for path in entries[key]:
+                path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._counters["evicted"] += removed
+        return removed
+
+    def load_parsed(self, name: str, digest: str | None) -> Any | None:
+        if digest is None or self.directory is None:
+            return None
+        path = self.directory / "parsed" / f"{name}.json"
+        try:
+            payload = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if payload.get("sha256") != digest:
+            return None
+        self._counters["parse_reused"] += 1
+        return payload.get("value")
+
+    def store_parsed(self, name: str, digest: str | None, value: Any) -> None:
+        if digest is None or self.directory is None:
+            return
+        try:
+            write_atomic(
+                self.directory / "parsed" / f"{name}.json",
+                json.dumps({"sha256": digest, "value": value}).encode("utf-8"),
+            )
+        except OSError:
+            return
+
+    def count(self, name: str) -> None:
+        self._counters[name] += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "conditionalRequests": self._counters["conditional"],
+            "notModified": self._counters["not_modified"],
+            "stored": self._counters["stored"],
+            "parseReused": self._counters["parse_reused"],
+            "evicted": self._counters["evicted"],
+        }
+
+
+http_cache = HttpCache(local_data_path("http-cache"))
+
+
+def response_digest(response: httpx.Response) -> str | None:
+    """SHA-256 of the body when it went through `CachingTransport` with validators.
+
+    A body being stored has no digest until it has been read to the end.
+    """
+    return response.extensions.get("http_cache", {}).get("sha256")
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """Revalidate GETs against the on-disk copy and answer a 304 from it.
+
+    Only responses that carry an ETag or Last-Modified are stored, since nothing else can
+    be revalidated. Served responses are tagged in `response.extensions["http_cache"]`
+    with whether the copy was `stored` or `revalidated` and the body digest, which for a
+    freshly stored body is filled in once it has been read to the end.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: HttpCache | None = None) -> None:
+        self.transport = transport
+        self.cache = cache or http_cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or _VOLATILE_PARAMS.intersection(request.url.params.keys()):
+            return await self.transport.handle_async_request(request)
+
+        url = str(request.url)
+        cached = self.cache.load(url)
+        if cached is not None:
+            if cached.etag and "if-none-match" not in request.headers:
+                request.headers["If-None-Match"] = cached.etag
+            if cached.last_modified and "if-modified-since" not in request.headers:
+                request.headers["If-Modified-Since"] = cached.last_modified
+            self.cache.count("conditional")
+
+        response = await self.transport.handle_async_request(request)
+
+        if response.status_code == 304 and cached is not None:
+            await response.aclose()
+            self.cache.count("not_modified")
+            self.cache.touch(cached)
+            return httpx.Response(
+                200,
+                headers=cached.headers,
+                stream=_FileStream(cached.body_path),
+                request=request,
+                extensions=_carried_extensions(response, "revalidated", cached.sha256),
+            )
+
+        has_validators = "etag" in response.headers or "last-modified" in response.headers
+        if response.status_code != 200 or not has_validators:
+            return response
+
+        # The body streams through to the caller and is written to disk on the way, so a
+        # large listing is never held in memory here.
+        extensions = _carried_extensions(response, "stored", None)
+        return httpx.Response(
+            200,
+            headers=_replayable_headers(response.headers),
+            stream=_TeeStream(response.stream, self.cache, url, response, extensions["http_cache"]),  # type: ignore[arg-type]
+            request=request,
+            extensions=extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
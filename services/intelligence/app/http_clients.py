@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+import httpx
+
+from .circuit import CircuitBreakerTransport
+from .compute import compute_pool
+from .concurrency import AdaptiveLimitTransport
+from .config import settings
+from .http_cache import CachingTransport
+from .rate_limit import RateLimitTransport, batch_traffic
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Upstream:
+    timeout: float
+    http2: bool = True
+    follow_redirects: bool = False
+    headers: dict[str, str] = field(default_factory=dict)
+    conditional_cache: bool = False
+    adaptive_concurrency: bool = False
+    rate_limited: bool = False
+    circuit_breaker: bool = False
+
+
+def _upstreams() -> dict[str, Upstream]:
+    # Built on demand so settings overrides (env, tests) are picked up when a pool opens.
+    universe_headers = {"User-Agent": settings.yahoo_user_agent}
+    return {
+        "yahoo": Upstream(
+            timeout=8.0,
+            headers={"User-Agent": settings.yahoo_user_agent},
+            conditional_cache=True,
+            adaptive_concurrency=True,
+            circuit_breaker=True,
+        ),
+        "newsapi": Upstream(
+            timeout=8.0,
+            conditional_cache=True,
+            adaptive_concurrency=True,
+            rate_limited=True,
+            circuit_breaker=True,
+        ),
+        "reddit": Upstream(
+            timeout=8.0,
+            headers={"User-Agent": settings.reddit_user_agent},
+            conditional_cache=True,
+            adaptive_concurrency=True,
+            rate_limited=True,
+            circuit_breaker=True,
+        ),
+        "supabase": Upstream(timeout=15.0),
+        "posthog": Upstream(timeout=3.0),
+        "sentry": Upstream(timeout=3.0),
+        "nse": Upstream(
+            timeout=25.0,
+            http2=False,
+            follow_redirects=True,
+            headers=universe_headers,
+            conditional_cache=True,
+        ),
+        "bse": Upstream(
+            timeout=25.0,
+            http2=False,
+            follow_redirects=True,
+            headers=universe_headers,
+            conditional_cache=True,
+        ),
+        "nyse": Upstream(
+            timeout=25.0,
+            http2=False,
+            follow_redirects=True,
+            headers=universe_headers,
+            conditional_cache=True,
+        ),
+    }
+
+
+def _limits_for(name: str) -> httpx.Limits:
+    max_connections = settings.http_pool_limits.get(name, settings.http_max_connections)
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(settings.http_max_keepalive_connections, max_connections),
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+
+class HttpClients:
+    """One pooled `httpx.AsyncClient` per upstream host, shared by providers, jobs and telemetry."""
+
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._transport: httpx.AsyncBaseTransport | None = None
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pooled connections are bound to the loop that opened them, so a new
+            # loop (CLI run, test case) starts from a fresh set of clients.
+            self._clients = {}
+            self._loop = loop
+
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build(name)
+            self._clients[name] = client
+        return client
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        upstream = _upstreams()[name]
+        transport = self._transport or httpx.AsyncHTTPTransport(
+            http2=upstream.http2 and settings.http2_enabled,
+            limits=_limits_for(name),
+        )
+        # The breaker sits next to the network so its latency samples exclude time spent
+        # waiting for a concurrency slot or a rate-limit token.
+        if upstream.circuit_breaker and settings.circuit_breaker_enabled:
+            transport = CircuitBreakerTransport(transport, name)
+        if upstream.adaptive_concurrency and settings.adaptive_concurrency_enabled:
+            transport = AdaptiveLimitTransport(transport)
+        if upstream.rate_limited:
+            transport = RateLimitTransport(transport, name)
+        if upstream.conditional_cache and settings.http_cache_enabled:
+            transport = CachingTransport(transport)
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=upstream.timeout,
+            follow_redirects=upstream.follow_redirects,
+            headers=upstream.headers,
+        )
+
+    @property
+    def transport(self) -> httpx.AsyncBaseTransport | None:
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport: httpx.AsyncBaseTransport | None) -> None:
+        self._transport = transport
+        self._clients = {}
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients = {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                continue
+
+
+http_clients = HttpClients()
+
+
+@asynccontextmanager
+async def http_client_scope(
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> AsyncIterator[HttpClients]:
+    """Open the shared pools for the app lifespan or a job run and close them on exit.
+
+    Passing `transport` routes every upstream through it, which is how tests swap in
+    `httpx.MockTransport`.
+    """
+    previous = http_clients.transport
+    if transport is not None:
+        http_clients.transport = transport
+    try:
+        yield http_clients
+    finally:
+        await http_clients.aclose()
+        if transport is not None:
+            http_clients.transport = previous
+
+
+async def run_with_clients(job: Callable[[], Awaitable[T]]) -> T:
+    # Job runs draw from the batch lane of the shared rate limits, behind API traffic.
+    with batch_traffic():
+        async with http_client_scope():
+            try:
+                return await job()
+            finally:
+                compute_pool.shutdown()
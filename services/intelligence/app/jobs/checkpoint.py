@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from ..config import local_data_path, write_atomic
+from .store import SupabaseRest, supabase_rest
+
+
+class JobCheckpoint:
+    """Symbols a job run has already persisted, plus symbols that failed and need a retry.
+
+    With Supabase configured the state is a `job_checkpoints` row, so a run on a fresh
+    scheduled runner resumes where the killed one stopped. Without it, the state lives
+    under `LOCAL_DATA_DIR/job-checkpoints`. The completed set is tied to one run key (e.g.
+    the as-of date), so a finished day never suppresses the next day's run; the retry
+    list carries over until each symbol succeeds.
+    """
+
+    def __init__(self, name: str, directory: Path | None = None, remote: SupabaseRest | None = None) -> None:
+        self.name = name
+        self.directory = directory or local_data_path("job-checkpoints")
+        self.remote = remote or supabase_rest
+        self.run_key: str | None = None
+        self.completed: set[str] = set()
+        self.retry: list[str] = []
+
+    @property
+    def _path(self) -> Path:
+        return self.directory / f"{self.name}.json"
+
+    async def load(self, run_key: str) -> None:
+        if self.remote.enabled:
+            payload = await self.remote.get_job_checkpoint(self.name)
+        else:
+            try:
+                payload = json.loads(self._path.read_text())
+            except (OSError, ValueError):
+                payload = None
+        payload = payload if isinstance(payload, dict) else {}
+
+        self.run_key = run_key
+        same_run = payload.get("run_key") == run_key
+        self.completed = set(payload.get("completed") or []) if same_run else set()
+        self.retry = [str(symbol) for symbol in payload.get("retry") or []]
+
+    async def _save(self) -> None:
+        payload: dict[str, Any] = {
+            "name": self.name,
+            "run_key": self.run_key,
+            "completed": sorted(self.completed),
+            "retry": self.retry,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if self.remote.enabled:
+            await self.remote.upsert("job_checkpoints", [payload], on_conflict="name")
+        else:
+            write_atomic(self._path, json.dumps(payload).encode("utf-8"))
+
+    async def mark_completed(self, symbols: Iterable[str], retry: Iterable[str]) -> None:
+        self.completed |= set(symbols)
+        self.retry = sorted(set(retry))
+        await self._save()
+
+    async def finish(self, retry: Iterable[str]) -> None:
+        """Close the run: nothing left to resume, only its failures carry over."""
+        self.completed = set()
+        self.retry = sorted(set(retry))
+        await self._save()
@@ -2,17 +2,20 @@ from __future__ import annotations
 
 import asyncio
 from datetime import date
+from typing import Any
 
 from ..engines.common import stable_score
+from ..http_clients import run_with_clients
 from .store import supabase_rest
 from .universe import NIFTY_UNIVERSE
 
 
-async def run() -> None:
+async def run(universe: list[dict[str, str]] | None = None) -> dict[str, Any]:
+    universe = universe or NIFTY_UNIVERSE
     rows = []
     period_end = date.today().replace(day=1).isoformat()
 
-    for row in NIFTY_UNIVERSE:
+    for row in universe:
         symbol = row["symbol"]
         rows.append(
             {
@@ -27,7 +30,8 @@ async def run() -> None:
         )
 
     await supabase_rest.upsert("financials", rows)
+    return {"status": "ok", "symbols": len(universe), "financialsUpserted": len(rows)}
 
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    print(asyncio.run(run_with_clients(run)))
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime, timezone
+from typing import Any
+
+from ..config import settings
+from ..http_clients import run_with_clients
+from ..providers.history import bar_date, price_history
+from ..providers.yahoo import sync_price_history
+from .store import supabase_rest
+from .universe import NIFTY_UNIVERSE
+
+
+def _price_rows(symbol: str, since: date | None, appended: int) -> list[dict[str, Any]]:
+    """Stored bars from `since`, or without it only the `appended` bars this run added."""
+    bars = price_history.read(symbol)
+    if since is not None:
+        since_ts = int(datetime.combine(since, datetime.min.time(), timezone.utc).timestamp())
+        bars = bars[bars["ts"] >= since_ts]
+    elif appended > 0:
+        bars = bars[-appended:]
+    else:
+        return []
+
+    return [
+        {
+            "symbol": symbol,
+            "trading_date": bar_date(int(bar["ts"])).isoformat(),
+            "open": round(float(bar["open"]), 4),
+            "high": round(float(bar["high"]), 4),
+            "low": round(float(bar["low"]), 4),
+            "close": round(float(bar["close"]), 4),
+            "adj_close": round(float(bar["adj_close"]), 4),
+            "volume": int(bar["volume"]),
+        }
+        for bar in bars
+    ]
+
+
+async def run(
+    symbols: list[str] | None = None,
+    since: date | None = None,
+    universe: list[dict[str, str]] | None = None,
+) -> dict[str, Any]:
+    symbols = symbols or [stock["symbol"] for stock in universe or NIFTY_UNIVERSE]
+    synced = await sync_price_history(symbols)
+
+    window: list[dict[str, Any]] = []
+    upserted = 0
+
+    async def flush() -> None:
+        nonlocal upserted
+        await supabase_rest.upsert("historical_prices", window, on_conflict="symbol,trading_date")
+        upserted += len(window)
+        window.clear()
+
+    for symbol in symbols:
+        window.extend(_price_rows(symbol, since, synced.get(symbol, 0)))
+        if len(window) >= settings.history_backfill_upsert_window:
+            await flush()
+    if window:
+        await flush()
+
+    return {
+        "status": "ok",
+        "symbols": len(symbols),
+        "barsAppended": sum(count for count in synced.values() if count > 0),
+        "pricesUpserted": upserted,
+        "failedSymbols": sorted(symbol for symbol, count in synced.items() if count < 0),
+    }
+
+
+if __name__ == "__main__":
+    print(asyncio.run(run_with_clients(run)))
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+from collections import Counter
 from datetime import date
+from time import perf_counter
 from typing import Any
 
+import httpx
+
+from ..config import settings
 from ..engines.common import stable_score
-from ..providers.yahoo import fetch_latest_quotes
-from .store import supabase_rest
-from .universe import load_market_universe
+from ..http_clients import run_with_clients
+from ..providers.yahoo import request_latest_quotes
+from .store import RETRYABLE_STATUS, supabase_rest
+from .universe import load_market_universe_report
+
+
+QuotedBatch = tuple[list[dict[str, str]], dict[str, dict[str, float | bool]]]
+RowBatch = tuple[list[dict[str, Any]], list[dict[str, Any]]]
 
 
 def _to_float(value: Any, fallback: float) -> float:
@@ -53,46 +63,154 @@ def _build_rows_for_symbol(
     return stock_row, prices_row
 
 
-def _chunks(items: list[str], size: int) -> list[list[str]]:
+def _chunks(items: list[Any], size: int) -> list[list[Any]]:
     return [items[index : index + size] for index in range(0, len(items), size)]
 
 
+# Statuses a single symbol in the batch can cause; only these are worth bisecting.
+SPLITTABLE_STATUS = {400, 404, 422}
+
+
+def _is_overload(exc: Exception) -> bool:
+    """Failures of the upstream itself, which splitting the batch would only multiply."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+
+def _is_splittable(exc: Exception) -> bool:
+    """Payload-level failures that smaller batches can isolate. Anything else, e.g. a
+    401/403 from a missing crumb, fails every sub-batch the same way."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in SPLITTABLE_STATUS
+    return isinstance(exc, ValueError)
+
+
+async def _fetch_quotes_bisecting(
+    symbols: list[str],
+    semaphore: asyncio.Semaphore,
+    stats: Counter[str],
+) -> dict[str, dict[str, float | bool]]:
+    """Fetch a quote batch; on failure split it in half until the bad symbols are isolated.
+
+    Only failures a symbol can cause (400/404/422, payload errors) are bisected. Throttling,
+    5xx and transport errors back off and resend the whole batch, then fall back without
+    splitting; other failures (401/403 and the like) fall back at once.
+    """
+    for attempt in range(settings.market_sync_quote_retries + 1):
+        try:
+            async with semaphore:
+                stats["quoteRequests"] += 1
+                return await request_latest_quotes(symbols)
+        except Exception as exc:
+            if _is_splittable(exc):
+                break
+            if not _is_overload(exc) or attempt == settings.market_sync_quote_retries:
+                stats["failedQuoteSymbols"] += len(symbols)
+                return {}
+            stats["quoteRetries"] += 1
+            await asyncio.sleep(settings.market_sync_quote_backoff_seconds * 2**attempt)
+
+    if len(symbols) == 1:
+        stats["failedQuoteSymbols"] += 1
+        return {}
+    stats["bisections"] += 1
+    middle = len(symbols) // 2
+    left, right = await asyncio.gather(
+        _fetch_quotes_bisecting(symbols[:middle], semaphore, stats),
+        _fetch_quotes_bisecting(symbols[middle:], semaphore, stats),
+    )
+    return {**left, **right}
+
+
 async def run() -> dict[str, Any]:
-    universe = await load_market_universe()
+    universe_load = await load_market_universe_report()
+    universe = universe_load.rows
     if not universe:
         return {
             "status": "no-data",
             "stocksUpserted": 0,
             "pricesUpserted": 0,
             "quotesResolved": 0,
+            "universe": universe_load.report(),
         }
 
+    started = perf_counter()
     trading_date = date.today().isoformat()
-    symbols = [stock["symbol"] for stock in universe]
-    quote_map: dict[str, dict[str, float | bool]] = {}
-
-    quote_batches = _chunks(symbols, 150)
-    for batch in quote_batches:
-        quote_map.update(await fetch_latest_quotes(batch))
-
-    computed = [
-        _build_rows_for_symbol(stock, trading_date, quote_map.get(stock["symbol"].upper()))
-        for stock in universe
-    ]
-    stocks_rows = [rows[0] for rows in computed]
-    prices_rows = [rows[1] for rows in computed]
-
-    await supabase_rest.upsert("stocks", stocks_rows)
-    await supabase_rest.upsert("historical_prices", prices_rows)
-
+    stats: Counter[str] = Counter()
+    semaphore = asyncio.Semaphore(settings.market_sync_quote_concurrency)
+    quoted: asyncio.Queue[QuotedBatch | None] = asyncio.Queue(maxsize=settings.market_sync_queue_size)
+    built: asyncio.Queue[RowBatch | None] = asyncio.Queue(maxsize=settings.market_sync_queue_size)
+
+    async def fetch_stage() -> None:
+        async def fetch_batch(batch: list[dict[str, str]]) -> None:
+            quotes = await _fetch_quotes_bisecting([stock["symbol"] for stock in batch], semaphore, stats)
+            await quoted.put((batch, quotes))
+
+        async with asyncio.TaskGroup() as group:
+            for batch in _chunks(universe, settings.market_sync_quote_batch_size):
+                group.create_task(fetch_batch(batch))
+        await quoted.put(None)
+
+    async def build_stage() -> None:
+        while (item := await quoted.get()) is not None:
+            batch, quotes = item
+            stock_rows: list[dict[str, Any]] = []
+            price_rows: list[dict[str, Any]] = []
+            for stock in batch:
+                quote = quotes.get(stock["symbol"].upper())
+                if quote is None:
+                    stats["fallbackSymbols"] += 1
+                else:
+                    stats["quotesResolved"] += 1
+                stock_row, price_row = _build_rows_for_symbol(stock, trading_date, quote)
+                stock_rows.append(stock_row)
+                price_rows.append(price_row)
+            await built.put((stock_rows, price_rows))
+        await built.put(None)
+
+    async def upsert_stage() -> None:
+        stock_window: list[dict[str, Any]] = []
+        price_window: list[dict[str, Any]] = []
+
+        async def flush() -> None:
+            # stocks first: historical_prices references stocks(symbol).
+            await supabase_rest.upsert("stocks", stock_window)
+            await supabase_rest.upsert("historical_prices", price_window)
+            stats["stocksUpserted"] += len(stock_window)
+            stats["pricesUpserted"] += len(price_window)
+            stock_window.clear()
+            price_window.clear()
+
+        while (item := await built.get()) is not None:
+            stock_window.extend(item[0])
+            price_window.extend(item[1])
+            if len(stock_window) >= settings.market_sync_upsert_window:
+                await flush()
+        if stock_window:
+            await flush()
+
+    async with asyncio.TaskGroup() as group:
+        group.create_task(fetch_stage())
+        group.create_task(build_stage())
+        group.create_task(upsert_stage())
+
+    duration = perf_counter() - started
     return {
         "status": "ok",
-        "stocksUpserted": len(stocks_rows),
-        "pricesUpserted": len(prices_rows),
-        "quotesResolved": len(quote_map),
+        "stocksUpserted": stats["stocksUpserted"],
+        "pricesUpserted": stats["pricesUpserted"],
+        "quotesResolved": stats["quotesResolved"],
+        "fallbackSymbols": stats["fallbackSymbols"],
+        "failedQuoteSymbols": stats["failedQuoteSymbols"],
+        "quoteRequests": stats["quoteRequests"],
+        "quoteRetries": stats["quoteRetries"],
+        "durationSeconds": round(duration, 3),
+        "symbolsPerSecond": round(len(universe) / duration, 2) if duration > 0 else float(len(universe)),
         "tradingDate": trading_date,
+        "universe": universe_load.report(),
     }
 
 
 if __name__ == "__main__":
-    print(asyncio.run(run()))
+    print(asyncio.run(run_with_clients(run)))
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable
+from datetime import datetime
+from hashlib import blake2b
+from pathlib import Path
+
+import numpy as np
+
+from ..config import atomic_path, local_data_path, settings
+
+NewsRow = dict[str, str | float | bool]
+
+
+def fingerprint(symbol: str, content_hash: str) -> int:
+    """64-bit key for a (symbol, content hash) pair."""
+    digest = blake2b(f"{symbol}\x00{content_hash}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _timestamp(value: object, default: float) -> int:
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return int(default)
+
+
+class SymbolHashes:
+    """`in`-checkable view of one symbol's hashes, so callers can treat it like a set."""
+
+    def __init__(self, index: NewsDedupIndex, symbol: str) -> None:
+        self.index = index
+        self.symbol = symbol
+
+    def __contains__(self, content_hash: object) -> bool:
+        return self.index.contains(self.symbol, str(content_hash))
+
+
+class NewsDedupIndex:
+    """Universe-wide set of recent news content hashes, synced from Supabase.
+
+    Entries are 64-bit fingerprints of (symbol, content_hash) in a sorted array next to
+    the article's publish time, so a lookup is a binary search and 100k entries take
+    under 2 MB. Entries older than the retention window are dropped on every update.
+    Supabase holds the hashes; the file on disk is only a cache that records when it
+    was last synced (`synced_at`), so a warm run reads just the rows stored since. When
+    the file is missing (a fresh runner), unreadable or older than the window, the
+    index reports itself unseeded and the caller rebuilds it from one bulk read.
+    """
+
+    def __init__(self, directory: Path, retention_hours: int, name: str = "news-hashes") -> None:
+        self.directory = directory
+        self.retention_hours = retention_hours
+        self.name = name
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._published = np.empty(0, dtype=np.int64)
+        self._updated_at: float | None = None
+        self.synced_at: float | None = None
+
+    @property
+    def _path(self) -> Path:
+        return self.directory / f"{self.name}.npz"
+
+    @property
+    def retention_seconds(self) -> int:
+        return self.retention_hours * 3600
+
+    @property
+    def seeded(self) -> bool:
+        return self._updated_at is not None and time.time() - self._updated_at <= self.retention_seconds
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def load(self) -> bool:
+        try:
+            with np.load(self._path) as payload:
+                keys = payload["keys"].astype(np.uint64)
+                published = payload["published"].astype(np.int64)
+                meta = json.loads(str(payload["meta"]))
+        except (OSError, ValueError, KeyError):
+            self._updated_at = self.synced_at = None
+            return False
+        if len(keys) != len(published):
+            self._updated_at = self.synced_at = None
+            return False
+
+        self._keys, self._published = keys, published
+        self._updated_at = float(meta.get("updated_at", 0))
+        self.synced_at = meta.get("synced_at")
+        return self.seeded
+
+    def save(self) -> None:
+        with atomic_path(self._path) as tmp_path:
+            np.savez(
+                tmp_path,
+                keys=self._keys,
+                published=self._published,
+                meta=np.array(json.dumps({"updated_at": self._updated_at, "synced_at": self.synced_at})),
+            )
+
+    def _merge(self, keys: np.ndarray, published: np.ndarray, now: float) -> None:
+        keys = np.concatenate([self._keys, keys])
+        published = np.concatenate([self._published, published])
+        live = published >= int(now) - self.retention_seconds
+        keys, published = keys[live], published[live]
+
+        # Sort by key, newest publish time first, then keep one entry per key.
+        order = np.lexsort((-published, keys))
+        keys, published = keys[order], published[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        self._keys, self._published = keys[first], published[first]
+        self._updated_at = now
+
+    def _entries(self, rows: Iterable[NewsRow], now: float) -> tuple[np.ndarray, np.ndarray]:
+        keys: list[int] = []
+        published: list[int] = []
+        for row in rows:
+            content_hash = str(row.get("content_hash") or "")
+            symbol = str(row.get("symbol") or "")
+            if not content_hash or not symbol:
+                continue
+            keys.append(fingerprint(symbol, content_hash))
+            published.append(_timestamp(row.get("published_at"), now))
+        return np.array(keys, dtype=np.uint64), np.array(published, dtype=np.int64)
+
+    def seed(self, rows: Iterable[NewsRow], synced_at: float | None = None) -> None:
+        """Replace the index with rows from a bulk read (`symbol`, `content_hash`, `published_at`)."""
+        now = time.time()
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._published = np.empty(0, dtype=np.int64)
+        self.synced_at = synced_at
+        self._merge(*self._entries(rows, now), now)
+        self.save()
+
+    def add(self, rows: Iterable[NewsRow], synced_at: float | None = None) -> None:
+        """Merge rows in; `synced_at` marks them as everything stored up to that time."""
+        now = time.time()
+        if synced_at is not None:
+            self.synced_at = synced_at
+        self._merge(*self._entries(rows, now), now)
+        self.save()
+
+    def contains(self, symbol: str, content_hash: str) -> bool:
+        if not len(self._keys):
+            return False
+        key = np.uint64(fingerprint(symbol, content_hash))
+        position = int(np.searchsorted(self._keys, key))
+        if position >= len(self._keys) or self._keys[position] != key:
+            return False
+        return int(self._published[position]) >= int(time.time()) - self.retention_seconds
+
+    def hashes_for(self, symbol: str) -> SymbolHashes:
+        return SymbolHashes(self, symbol)
+
+    def named(self, name: str) -> NewsDedupIndex:
+        """A separate index in the same directory, e.g. one per job shard."""
+        if name == self.name:
+            return self
+        return NewsDedupIndex(self.directory, self.retention_hours, name=name)
+
+
+news_dedup_index = NewsDedupIndex(
+    local_data_path("news-dedup"),
+    retention_hours=settings.news_dedup_retention_hours,
+)
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from collections.abc import Container
 from datetime import datetime, timezone
+from typing import Any
 
 from ..engines.common import stable_score
+from ..compute import io_stage, stage_timings
+from ..concurrency import adaptive_limits
+from ..config import settings
+from ..engines.language import compliance_filter
+from ..engines.near_duplicates import NearDuplicateIndex, persistent_index
+from ..http_clients import run_with_clients
 from ..providers.newsapi import SOURCE_WEIGHT, fallback_news_features, fetch_news_articles
-from .store import supabase_rest
+from .news_dedup import NewsDedupIndex, news_dedup_index
+from .runner import shard_scoped
+from .store import inserted_since, supabase_rest
 from .universe import NIFTY_UNIVERSE
 
 
@@ -32,9 +43,10 @@ def _fallback_news_row(
 
 def _mark_duplicate_hashes(
     rows: list[dict[str, str | float | bool]],
-    existing_hashes: set[str],
+    existing_hashes: Container[str],
+    near_duplicates: NearDuplicateIndex | None = None,
 ) -> list[dict[str, str | float | bool]]:
-    seen_hashes: set[str] = set(existing_hashes)
+    seen_hashes: set[str] = set()
 
     for row in rows:
         content_hash = str(row.get("content_hash") or "")
@@ -42,7 +54,14 @@ def _mark_duplicate_hashes(
             row["is_duplicate"] = False
             continue
 
-        is_duplicate = content_hash in seen_hashes
+        is_duplicate = content_hash in seen_hashes or content_hash in existing_hashes
+        if near_duplicates is not None:
+            near_match = near_duplicates.check_and_add(
+                str(row["url"]),
+                str(row.get("title") or ""),
+                scope=str(row["symbol"]),
+            )
+            is_duplicate = is_duplicate or near_match is not None
         row["is_duplicate"] = is_duplicate
         seen_hashes.add(content_hash)
 
@@ -52,22 +71,21 @@ def _mark_duplicate_hashes(
 async def _build_rows_for_stock(
     stock: dict[str, str],
     source_credibility: dict[str, float],
-    semaphore: asyncio.Semaphore,
+    existing_hashes: Container[str],
+    near_duplicates: NearDuplicateIndex,
 ) -> list[dict[str, str | float | bool]]:
     symbol = stock["symbol"]
-
-    async with semaphore:
-        provider_articles = await fetch_news_articles(symbol, source_weights=source_credibility)
+    provider_articles = await fetch_news_articles(symbol, source_weights=source_credibility)
 
     if provider_articles:
-        existing_hashes = await supabase_rest.get_recent_news_hashes(symbol)
+        titles = compliance_filter.sanitize_batch([str(article["title"]) for article in provider_articles])
         rows: list[dict[str, str | float | bool]] = []
-        for article in provider_articles:
+        for article, title in zip(provider_articles, titles):
             rows.append(
                 {
                     "symbol": symbol,
                     "source": str(article["source"]),
-                    "title": str(article["title"]),
+                    "title": title,
                     "url": str(article["url"]),
                     "published_at": str(article["published_at"]),
                     "sentiment": float(article["sentiment"]),
@@ -78,7 +96,7 @@ async def _build_rows_for_stock(
                 }
             )
 
-        return _mark_duplicate_hashes(rows, existing_hashes)
+        return _mark_duplicate_hashes(rows, existing_hashes, near_duplicates)
 
     features = fallback_news_features(symbol)
     now = datetime.now(timezone.utc)
@@ -92,20 +110,82 @@ async def _build_rows_for_stock(
     return [fallback_row]
 
 
-async def run() -> None:
+async def _sync_recent_news(
+    symbols: list[str],
+    dedup_index: NewsDedupIndex,
+    cached: bool,
+    near_duplicates: NearDuplicateIndex,
+) -> None:
+    """Top both indexes up from one read of `news_items`: the rows stored since the older
+    of their last syncs, or the whole window when either has nothing usable on disk."""
+    synced = [dedup_index.synced_at if cached else None, near_duplicates.synced_at]
+    since = None if None in synced else min(value for value in synced if value is not None)
+    synced_at = time.time()
+    recent = await supabase_rest.get_recent_news_rows(
+        symbols,
+        lookback_hours=max(dedup_index.retention_hours, settings.near_duplicate_window_hours),
+        inserted_since=inserted_since(since),
+    )
+
+    if cached:
+        dedup_index.add(recent, synced_at=synced_at)
+    else:
+        dedup_index.seed(recent, synced_at=synced_at)
+    for row in recent:
+        if row.get("url") and row.get("title") and row.get("symbol"):
+            published = datetime.fromisoformat(str(row["published_at"]))
+            near_duplicates.add(str(row["url"]), str(row["title"]), str(row["symbol"]), published.timestamp())
+    near_duplicates.synced_at = synced_at
+    near_duplicates.expire()
+
+
+async def run(universe: list[dict[str, str]] | None = None) -> dict[str, Any]:
+    universe = universe or NIFTY_UNIVERSE
     source_credibility = dict(SOURCE_WEIGHT)
     if supabase_rest.enabled:
         source_credibility.update(await supabase_rest.get_source_credibility())
     source_credibility.setdefault("unknown", 0.5)
 
-    semaphore = asyncio.Semaphore(4)
-    batches = await asyncio.gather(
-        *(_build_rows_for_stock(stock, source_credibility, semaphore) for stock in NIFTY_UNIVERSE)
-    )
-    rows = [row for batch in batches for row in batch]
+    # Duplicate checks hit in-memory indexes. Supabase is their source of truth: a fresh
+    # runner reads the whole window once, and local files only narrow the read to rows
+    # stored since they were last synced.
+    dedup_index = news_dedup_index.named(shard_scoped(news_dedup_index.name))
+    near_duplicates = persistent_index(shard_scoped("news"))
+    cached = dedup_index.load()
+    if supabase_rest.enabled:
+        await _sync_recent_news([stock["symbol"] for stock in universe], dedup_index, cached, near_duplicates)
+
+    # Upstream concurrency is set per host by the adaptive limiter on the HTTP clients.
+    with stage_timings() as timings:
+        batches = await asyncio.gather(
+            *(
+                _build_rows_for_stock(
+                    stock,
+                    source_credibility,
+                    dedup_index.hashes_for(stock["symbol"]),
+                    near_duplicates,
+                )
+                for stock in universe
+            )
+        )
+        rows = [row for batch in batches for row in batch]
+
+        with io_stage():
+            await supabase_rest.upsert("news_items", rows, on_conflict="url")
+    if supabase_rest.enabled:
+        dedup_index.add(rows)
+        near_duplicates.save()
 
-    await supabase_rest.upsert("news_items", rows, on_conflict="url")
+    return {
+        "status": "ok",
+        "symbols": len(universe),
+        "newsUpserted": len(rows),
+        "duplicates": sum(1 for row in rows if row["is_duplicate"]),
+        "fallbackRows": sum(1 for row in rows if row["source"] == "stale-cache"),
+        **timings.summary(),
+        "concurrency": adaptive_limits.stats(),
+    }
 
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    print(asyncio.run(run_with_clients(run)))
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import fcntl
+import json
+import multiprocessing
+import os
+import socket
+from collections.abc import AsyncIterator, Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from importlib import import_module
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+from uuid import uuid4
+
+from ..config import local_data_path, settings
+from ..http_clients import run_with_clients
+from .store import supabase_rest
+from .universe import NIFTY_UNIVERSE, load_fallback_table
+
+Universe = list[dict[str, str]]
+JobRun = Callable[..., Awaitable[dict[str, Any] | None]]
+
+SHARDABLE_JOBS = ("news_ingest", "social_ingest", "trust_recompute", "financial_sync", "history_backfill")
+
+current_shard: ContextVar[str] = ContextVar("current_shard", default="all")
+
+
+def shard_of(symbol: str, shard_count: int) -> int:
+    """Stable shard for `symbol`; the same on every machine and Python process."""
+    digest = blake2b(symbol.upper().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % shard_count
+
+
+def shard_universe(universe: Universe, shard: int, shard_count: int) -> Universe:
+    return [row for row in universe if shard_of(row["symbol"], shard_count) == shard]
+
+
+def shard_scoped(name: str) -> str:
+    """Per-shard name for local job state, so concurrent shards never share a file."""
+    shard = current_shard.get()
+    return name if shard == "all" else f"{name}.{shard}"
+
+
+async def load_job_universe() -> Universe:
+    """The active universe `market_sync` stored, or the NIFTY list without Supabase."""
+    try:
+        stocks = await supabase_rest.get_stocks()
+    except Exception:
+        stocks = []
+    return stocks or list(NIFTY_UNIVERSE)
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+def _summary_path(job: str, shard: int, shard_count: int) -> Path:
+    return local_data_path("job-runs", f"{job}.{shard}-of-{shard_count}.json")
+
+
+@dataclass
+class Lease:
+    job: str
+    shard: int
+    shard_count: int
+    owner: str = field(default_factory=_owner)
+    summary: dict[str, Any] = field(default_factory=dict)
+    # Why a renewal failed; the guarded block has been cancelled when this is set.
+    lost: str | None = None
+
+
+@asynccontextmanager
+async def shard_lease(job: str, shard: int, shard_count: int) -> AsyncIterator[Lease | None]:
+    """Hold the (job, shard) lease for the block; yields None when another worker has it.
+
+    With Supabase configured the lease is a row in `job_leases`, renewed in the
+    background until the block exits. A renewal that is refused or fails cancels the
+    block and sets `lease.lost`: past the TTL another worker may take the shard, so the
+    job must not keep running unguarded. Without Supabase, a non-blocking `flock` on a
+    local file guards against overlapping runs on the same machine.
+    """
+    lease = Lease(job=job, shard=shard, shard_count=shard_count)
+    ttl = settings.job_lease_ttl_seconds
+
+    if supabase_rest.enabled:
+        if not await supabase_rest.acquire_job_lease(job, shard, shard_count, lease.owner, ttl):
+            yield None
+            return
+
+        guarded = asyncio.current_task()
+
+        async def renew() -> None:
+            while True:
+                await asyncio.sleep(ttl / 3)
+                try:
+                    renewed = await supabase_rest.acquire_job_lease(job, shard, shard_count, lease.owner, ttl)
+                except Exception as exc:
+                    lease.lost = f"renewal failed: {str(exc) or exc.__class__.__name__}"
+                else:
+                    if renewed:
+                        continue
+                    lease.lost = "renewal refused"
+                if guarded is not None:
+                    guarded.cancel()
+                return
+
+        renewal = asyncio.get_running_loop().create_task(renew())
+        try:
+            yield lease
+        finally:
+            renewal.cancel()
+            await supabase_rest.release_job_lease(job, shard, shard_count, lease.owner, lease.summary)
+        return
+
+    lock_path = local_data_path("job-leases", f"{job}.{shard}-of-{shard_count}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield None
+            return
+        try:
+            yield lease
+        finally:
+            summary_path = _summary_path(job, shard, shard_count)
+            summary_path.parent.mkdir(parents=True, exist_ok=True)
+            summary_path.write_text(json.dumps(lease.summary))
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _job_run(job: str) -> JobRun:
+    if job not in SHARDABLE_JOBS:
+        raise ValueError(f"Unknown shardable job: {job}")
+    return import_module(f".{job}", __package__).run
+
+
+async def run_shard(
+    job: str,
+    shard: int,
+    shard_count: int,
+    universe: Universe | None = None,
+) -> dict[str, Any]:
+    started = perf_counter()
+    async with shard_lease(job, shard, shard_count) as lease:
+        if lease is None:
+            return {"shard": shard, "status": "skipped", "reason": "lease-held"}
+
+        rows = shard_universe(universe or await load_job_universe(), shard, shard_count)
+        token = current_shard.set(f"{shard}-of-{shard_count}")
+        try:
+            await load_fallback_table(rows)
+            summary = await _job_run(job)(universe=rows) or {}
+            lease.summary = {
+                "shard": shard,
+                "status": "ok",
+                "symbols": len(rows),
+                "durationSeconds": round(perf_counter() - started, 3),
+                "summary": summary,
+            }
+        except Exception as exc:
+            lease.summary = {
+                "shard": shard,
+                "status": "failed",
+                "symbols": len(rows),
+                "durationSeconds": round(perf_counter() - started, 3),
+                "error": str(exc) or exc.__class__.__name__,
+            }
+        except asyncio.CancelledError:
+            if lease.lost is None:
+                raise
+            # Cancelled by `shard_lease`, not by our caller: record it and carry on.
+            asyncio.current_task().uncancel()  # type: ignore[union-attr]
+            lease.summary = {
+                "shard": shard,
+                "status": "lease-lost",
+                "symbols": len(rows),
+                "durationSeconds": round(perf_counter() - started, 3),
+                "error": lease.lost,
+            }
+        finally:
+            current_shard.reset(token)
+        return lease.summary
+
+
+def merge_summaries(job: str, shard_count: int, shards: list[dict[str, Any]]) -> dict[str, Any]:
+    """One run summary: numeric job counters summed, list counters concatenated."""
+    totals: dict[str, Any] = {}
+    for shard in shards:
+        for key, value in (shard.get("summary") or {}).items():
+            if isinstance(value, bool) or key == "status":
+                continue
+            if isinstance(value, (int, float)):
+                totals[key] = round(totals.get(key, 0) + value, 3)
+            elif isinstance(value, list):
+                totals[key] = [*totals.get(key, []), *value]
+
+    statuses = [shard.get("status") for shard in shards]
+    if statuses and all(status == "ok" for status in statuses) and len(shards) == shard_count:
+        status = "ok"
+    elif any(status == "ok" for status in statuses):
+        status = "partial"
+    else:
+        status = "failed"
+
+    return {
+        "job": job,
+        "status": status,
+        "shardCount": shard_count,
+        "shards": sorted(
+            ({key: value for key, value in shard.items() if key != "summary"} for shard in shards),
+            key=lambda item: item["shard"],
+        ),
+        **totals,
+    }
+
+
+def _run_shard_in_process(job: str, shard: int, shard_count: int, universe: Universe) -> dict[str, Any]:
+    return asyncio.run(run_with_clients(lambda: run_shard(job, shard, shard_count, universe)))
+
+
+async def run_all(job: str, shard_count: int, workers: int) -> dict[str, Any]:
+    """Run every shard of `job` on this machine in `workers` processes and merge the results."""
+    universe = await load_job_universe()
+    loop = asyncio.get_running_loop()
+    # Spawned, not forked: a forked child would inherit this process's running event loop.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(workers, 1), mp_context=context) as pool:
+        shards = await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, _run_shard_in_process, job, shard, shard_count, universe)
+                for shard in range(shard_count)
+            )
+        )
+    return merge_summaries(job, shard_count, list(shards))
+
+
+async def report(job: str, shard_count: int) -> dict[str, Any]:
+    """Merge the last recorded summary of every shard, wherever the shard ran."""
+    if supabase_rest.enabled:
+        recorded = await supabase_rest.get_job_summaries(job, shard_count)
+    else:
+        recorded = {}
+        for shard in range(shard_count):
+            path = _summary_path(job, shard, shard_count)
+            if path.exists():
+                recorded[shard] = json.loads(path.read_text())
+    return merge_summaries(job, shard_count, list(recorded.values()))
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Run a job over deterministic symbol shards.")
+    parser.add_argument("job", choices=SHARDABLE_JOBS)
+    parser.add_argument("--shards", type=int, default=settings.job_shard_count)
+    parser.add_argument("--shard", type=int, help="Run only this shard (one worker per machine).")
+    parser.add_argument("--workers", type=int, default=settings.job_shard_workers)
+    parser.add_argument("--report", action="store_true", help="Merge recorded shard summaries.")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        return asyncio.run(run_with_clients(lambda: report(args.job, args.shards)))
+    if args.shard is not None:
+        return asyncio.run(run_with_clients(lambda: run_shard(args.job, args.shard, args.shards)))
+    return asyncio.run(run_with_clients(lambda: run_all(args.job, args.shards, args.workers)))
+
+
+if __name__ == "__main__":
+    result = main()
+    print(json.dumps(result, indent=2))
+    raise SystemExit(1 if result["status"] == "failed" else 0)
@@ -1,14 +1,57 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from datetime import datetime
+from typing import Any
+
+from ..compute import io_stage, stage_timings
+from ..concurrency import adaptive_limits
+from ..config import settings
+from ..engines.language import compliance_filter
+from ..engines.near_duplicates import NearDuplicateIndex, persistent_index
+from ..http_clients import run_with_clients
 from ..providers.reddit import fetch_social_posts
-from .store import supabase_rest
+from .runner import shard_scoped
+from .store import inserted_since, supabase_rest
 from .universe import NIFTY_UNIVERSE
 
 
-async def _load_rows_for_symbol(symbol: str, semaphore: asyncio.Semaphore) -> list[dict[str, object]]:
-    async with semaphore:
-        posts = await fetch_social_posts(symbol)
+def _mark_near_duplicates(
+    symbol: str,
+    posts: list[dict[str, object]],
+    near_duplicates: NearDuplicateIndex,
+) -> None:
+    """Flag posts that repeat one already seen for `symbol` within the window (copy-paste pumps)."""
+    for post in posts:
+        raw_json = post.get("raw_json")
+        title = raw_json.get("title") if isinstance(raw_json, dict) else None
+        if not title:
+            continue
+        match = near_duplicates.check_and_add(str(post["source_post_id"]), str(title), scope=symbol)
+        if match is not None:
+            post["is_spam"] = True
+            raw_json["near_duplicate_of"] = match
+
+
+def _sanitize_titles(posts: list[dict[str, object]]) -> None:
+    """Strip forbidden phrases from post titles before they are stored."""
+    raw_jsons = [post["raw_json"] for post in posts if isinstance(post.get("raw_json"), dict)]
+    titles = compliance_filter.sanitize_batch([str(raw_json.get("title") or "") for raw_json in raw_jsons])
+    for raw_json, title in zip(raw_jsons, titles):
+        if raw_json.get("title"):
+            raw_json["title"] = title
+
+
+async def _load_rows_for_symbol(
+    symbol: str,
+    near_duplicates: NearDuplicateIndex,
+) -> list[dict[str, object]]:
+    posts = await fetch_social_posts(symbol)
+    # Sanitized first, so the index holds titles exactly as stored and later seeded.
+    _sanitize_titles(posts)
+    _mark_near_duplicates(symbol, posts, near_duplicates)
+
     rows: list[dict[str, object]] = []
     for post in posts:
         rows.append(
@@ -28,15 +71,53 @@ async def _load_rows_for_symbol(symbol: str, semaphore: asyncio.Semaphore) -> li
     return rows
 
 
-async def run() -> None:
-    semaphore = asyncio.Semaphore(4)
-    batches = await asyncio.gather(
-        *(_load_rows_for_symbol(stock["symbol"], semaphore) for stock in NIFTY_UNIVERSE)
+async def _sync_recent_titles(symbols: list[str], near_duplicates: NearDuplicateIndex) -> None:
+    """Top the window up with post titles stored since its last sync; all of the window's
+    titles on a fresh runner, where nothing is on disk."""
+    synced_at = time.time()
+    recent = await supabase_rest.get_recent_social_titles(
+        symbols,
+        lookback_hours=settings.near_duplicate_window_hours,
+        inserted_since=inserted_since(near_duplicates.synced_at),
     )
-    rows = [row for batch in batches for row in batch]
+    for row in recent:
+        if row.get("source_post_id") and row.get("title") and row.get("symbol"):
+            created = datetime.fromisoformat(str(row["created_at"]))
+            near_duplicates.add(str(row["source_post_id"]), str(row["title"]), str(row["symbol"]), created.timestamp())
+    near_duplicates.synced_at = synced_at
+    near_duplicates.expire()
+
+
+async def run(universe: list[dict[str, str]] | None = None) -> dict[str, Any]:
+    universe = universe or NIFTY_UNIVERSE
+    # Supabase holds the window; the local file only narrows the read on a warm runner.
+    near_duplicates = persistent_index(shard_scoped("social"))
+    if supabase_rest.enabled:
+        await _sync_recent_titles([stock["symbol"] for stock in universe], near_duplicates)
+    # Upstream concurrency is set per host by the adaptive limiter on the HTTP clients.
+    with stage_timings() as timings:
+        batches = await asyncio.gather(
+            *(_load_rows_for_symbol(stock["symbol"], near_duplicates) for stock in universe)
+        )
+        rows = [row for batch in batches for row in batch]
+
+        with io_stage():
+            await supabase_rest.upsert("social_posts", rows, on_conflict="source_post_id")
+    if supabase_rest.enabled:
+        near_duplicates.save()
 
-    await supabase_rest.upsert("social_posts", rows, on_conflict="source_post_id")
+    return {
+        "status": "ok",
+        "symbols": len(universe),
+        "postsUpserted": len(rows),
+        "spamPosts": sum(1 for row in rows if row["is_spam"]),
+        "nearDuplicates": sum(
+            1 for row in rows if isinstance(row["raw_json"], dict) and "near_duplicate_of" in row["raw_json"]
+        ),
+        **timings.summary(),
+        "concurrency": adaptive_limits.stats(),
+    }
 
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    print(asyncio.run(run_with_clients(run)))
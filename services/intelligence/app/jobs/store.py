@@ -1,25 +1,92 @@
 from __future__ import annotations
 
+import asyncio
+import gzip
+import json
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Any
 
 import httpx
 
 from ..config import settings
+from ..http_clients import HttpClients, http_clients
+
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+SYNC_OVERLAP_SECONDS = 600
+
+
+@dataclass
+class UpsertResult:
+    rows: int = 0
+    bytes: int = 0
+    chunks: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+
+def _chunks(rows: Sequence, size: int) -> Iterator[list]:
+    for start in range(0, len(rows), size):
+        yield list(rows[start : start + size])
+
+
+def inserted_since(synced_at: float | None) -> str | None:
+    """Lower bound for an incremental read after a sync at `synced_at` (local clock),
+    widened by `SYNC_OVERLAP_SECONDS` for clock skew and in-flight writes."""
+    if synced_at is None:
+        return None
+    return datetime.fromtimestamp(synced_at - SYNC_OVERLAP_SECONDS, timezone.utc).isoformat()
+
+
+def _in_filter(values: Sequence[str]) -> str:
+    # Symbols contain PostgREST-reserved characters such as `.`, so every value is quoted.
+    quoted = ",".join('"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values)
+    return f"in.({quoted})"
+
+
+def _content_range_total(value: str | None) -> int | None:
+    # e.g. "0-999/5234"; the total is "*" unless `Prefer: count=exact` was sent.
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1]
+    return int(total) if total.isdigit() else None
+
+
+def _json_rows(response: httpx.Response) -> list[dict]:
+    rows = response.json()
+    if not isinstance(rows, list):
+        return []
+    return [row for row in rows if isinstance(row, dict)]
 
 
 class SupabaseRest:
-    def __init__(self) -> None:
+    def __init__(self, clients: HttpClients | None = None) -> None:
         self.base = settings.supabase_url
         self.key = settings.supabase_service_role_key
+        self.clients = clients or http_clients
 
     @property
     def enabled(self) -> bool:
         return bool(self.base and self.key)
 
-    async def upsert(self, table: str, rows: list[dict], on_conflict: str | None = None) -> None:
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self.clients.get("supabase")
+
+    async def upsert(self, table: str, rows: list[dict], on_conflict: str | None = None) -> UpsertResult:
+        """Upsert `rows` in chunks sent concurrently, each serialized and compressed on send.
+
+        Every chunk is an idempotent merge-duplicates upsert, so a chunk that fails with a
+        transport error or a retryable status is simply sent again.
+        """
+        result = UpsertResult()
         if not self.enabled or not rows:
-            return
+            return result
 
+        started = perf_counter()
         url = f"{self.base}/rest/v1/{table}"
         headers = {
             "apikey": str(self.key),
@@ -27,11 +94,54 @@ class SupabaseRest:
             "Content-Type": "application/json",
             "Prefer": "resolution=merge-duplicates,return=minimal",
         }
+        if settings.supabase_upsert_gzip:
+            headers["Content-Encoding"] = "gzip"
         params = {"on_conflict": on_conflict} if on_conflict else None
+        chunks = _chunks(rows, max(settings.supabase_upsert_chunk_size, 1))
 
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.post(url, headers=headers, params=params, json=rows)
-            response.raise_for_status()
+        async def send(chunk: list[dict]) -> None:
+            body = json.dumps(chunk, separators=(",", ":"), default=str).encode("utf-8")
+            if settings.supabase_upsert_gzip:
+                body = gzip.compress(body, compresslevel=5)
+
+            retries = settings.supabase_upsert_retries
+            for attempt in range(retries + 1):
+                try:
+                    response = await self.client.post(
+                        url,
+                        headers=headers,
+                        params=params,
+                        content=body,
+                        timeout=settings.supabase_upsert_timeout,
+                    )
+                    if response.status_code not in RETRYABLE_STATUS or attempt == retries:
+                        response.raise_for_status()
+                        break
+                except httpx.TransportError:
+                    if attempt == retries:
+                        raise
+                result.retries += 1
+                await asyncio.sleep(settings.supabase_upsert_backoff_seconds * 2**attempt)
+
+            result.rows += len(chunk)
+            result.bytes += len(body)
+            result.chunks += 1
+
+        async def worker() -> None:
+            # Workers pull from one shared iterator, so at most `concurrency` chunks are
+            # serialized and in flight at any time.
+            for chunk in chunks:
+                await send(chunk)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                for _ in range(max(settings.supabase_upsert_concurrency, 1)):
+                    group.create_task(worker())
+        except ExceptionGroup as exc:
+            raise exc.exceptions[0] from None
+
+        result.seconds = round(perf_counter() - started, 3)
+        return result
 
     async def get_source_credibility(self) -> dict[str, float]:
         if not self.enabled:
@@ -44,10 +154,9 @@ class SupabaseRest:
         }
         params = {"select": "source,reputation_weight"}
 
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            rows = response.json()
+        response = await self.client.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        rows = response.json()
 
         if not isinstance(rows, list):
             return {}
@@ -66,82 +175,286 @@ class SupabaseRest:
 
         return weights
 
-    async def get_recent_news_hashes(self, symbol: str, lookback_hours: int = 96) -> set[str]:
-        if not self.enabled:
-            return set()
+    async def _read_all(self, table: str, params: dict[str, str]) -> list[dict]:
+        """Read every row matching `params`, fetching pages after the first concurrently.
 
-        since = (datetime.now(timezone.utc) - timedelta(hours=lookback_hours)).isoformat()
-        url = f"{self.base}/rest/v1/news_items"
+        `params` must include an `order` so that pages are stable.
+        """
+        url = f"{self.base}/rest/v1/{table}"
         headers = {
             "apikey": str(self.key),
             "Authorization": f"Bearer {self.key}",
         }
+        page_size = max(settings.supabase_page_size, 1)
+
+        first = await self.client.get(
+            url,
+            headers={**headers, "Prefer": "count=exact"},
+            params={**params, "limit": str(page_size), "offset": "0"},
+        )
+        first.raise_for_status()
+        rows = _json_rows(first)
+        total = _content_range_total(first.headers.get("content-range"))
+        if total is None or total <= len(rows) or not rows:
+            return rows
+
+        # The server may cap pages below `page_size` (PostgREST `max-rows`).
+        step = len(rows)
+        semaphore = asyncio.Semaphore(max(settings.supabase_read_concurrency, 1))
+
+        async def page(offset: int) -> list[dict]:
+            async with semaphore:
+                response = await self.client.get(
+                    url,
+                    headers=headers,
+                    params={**params, "limit": str(step), "offset": str(offset)},
+                )
+            response.raise_for_status()
+            return _json_rows(response)
+
+        pages = await asyncio.gather(*(page(offset) for offset in range(step, total, step)))
+        return [*rows, *(row for items in pages for row in items)]
+
+    async def _read_in(
+        self,
+        table: str,
+        column: str,
+        values: Sequence[str],
+        params: dict[str, str],
+    ) -> list[dict]:
+        """`_read_all` with an `in.(...)` filter, split so request URLs stay short."""
+        chunks = _chunks(list(dict.fromkeys(values)), max(settings.supabase_read_chunk_size, 1))
+        results = await asyncio.gather(
+            *(self._read_all(table, {**params, column: _in_filter(chunk)}) for chunk in chunks)
+        )
+        return [row for rows in results for row in rows]
+
+    async def get_recent_news_hash_rows(
+        self,
+        symbols: Sequence[str],
+        lookback_hours: int = 96,
+        inserted_since: str | None = None,
+    ) -> list[dict]:
+        """Recent article hashes; with `inserted_since`, only rows stored from then on."""
+        if not self.enabled or not symbols:
+            return []
+
+        since = (datetime.now(timezone.utc) - timedelta(hours=lookback_hours)).isoformat()
         params = {
-            "select": "content_hash",
-            "symbol": f"eq.{symbol}",
+            "select": "symbol,content_hash,published_at",
             "published_at": f"gte.{since}",
             "content_hash": "not.is.null",
-            "order": "published_at.desc",
-            "limit": "500",
+            "order": "symbol.asc,published_at.desc,id.asc",
         }
+        if inserted_since is not None:
+            params["created_at"] = f"gte.{inserted_since}"
+        return await self._read_in("news_items", "symbol", symbols, params)
+
+    async def get_recent_news_rows(
+        self,
+        symbols: Sequence[str],
+        lookback_hours: int = 96,
+        inserted_since: str | None = None,
+    ) -> list[dict]:
+        """Recent articles with what both dedup indexes need; with `inserted_since`, only
+        rows stored from then on."""
+        if not self.enabled or not symbols:
+            return []
+
+        since = (datetime.now(timezone.utc) - timedelta(hours=lookback_hours)).isoformat()
+        params = {
+            "select": "symbol,url,title,content_hash,published_at",
+            "published_at": f"gte.{since}",
+            "order": "symbol.asc,published_at.desc,id.asc",
+        }
+        if inserted_since is not None:
+            params["created_at"] = f"gte.{inserted_since}"
+        return await self._read_in("news_items", "symbol", symbols, params)
+
+    async def get_recent_social_titles(
+        self,
+        symbols: Sequence[str],
+        lookback_hours: int = 96,
+        inserted_since: str | None = None,
+    ) -> list[dict]:
+        """Recent post titles for the near-duplicate index; with `inserted_since`, only
+        rows stored from then on."""
+        if not self.enabled or not symbols:
+            return []
 
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(url, headers=headers, params=params)
+        since = (datetime.now(timezone.utc) - timedelta(hours=lookback_hours)).isoformat()
+        params = {
+            "select": "symbol,source_post_id,created_at,title:raw_json->>title",
+            "created_at": f"gte.{since}",
+            "order": "symbol.asc,created_at.desc,id.asc",
+        }
+        if inserted_since is not None:
+            params["ingested_at"] = f"gte.{inserted_since}"
+        return await self._read_in("social_posts", "symbol", symbols, params)
+
+    async def get_recent_news_hashes_bulk(
+        self,
+        symbols: Sequence[str],
+        lookback_hours: int = 96,
+    ) -> dict[str, set[str]]:
+        hashes: dict[str, set[str]] = {}
+        for row in await self.get_recent_news_hash_rows(symbols, lookback_hours):
+            symbol = str(row.get("symbol") or "")
+            value = row.get("content_hash")
+            if symbol and value:
+                hashes.setdefault(symbol, set()).add(str(value))
+        return hashes
+
+    async def _latest_trust_rows_rpc(self, symbols: list[str]) -> list[dict]:
+        url = f"{self.base}/rest/v1/rpc/latest_trust_scores"
+        headers = {
+            "apikey": str(self.key),
+            "Authorization": f"Bearer {self.key}",
+            "Content-Type": "application/json",
+        }
+        chunks = _chunks(symbols, max(settings.supabase_rpc_chunk_size, 1))
+        semaphore = asyncio.Semaphore(max(settings.supabase_read_concurrency, 1))
+
+        async def call(chunk: list[str]) -> list[dict]:
+            async with semaphore:
+                response = await self.client.post(url, headers=headers, json={"symbols": chunk})
             response.raise_for_status()
-            rows = response.json()
+            return _json_rows(response)
 
-        if not isinstance(rows, list):
-            return set()
+        results = await asyncio.gather(*(call(chunk) for chunk in chunks))
+        return [row for rows in results for row in rows]
+
+    async def get_latest_trust_scores(self, symbols: list[str]) -> dict[str, float]:
+        if not self.enabled or not symbols:
+            return {}
 
-        hashes: set[str] = set()
+        # `latest_trust_scores` comes with migration 0003; a missing function is a deploy
+        # error and surfaces as one, rather than paging through the whole history.
+        rows = await self._latest_trust_rows_rpc(list(dict.fromkeys(symbols)))
+
+        result: dict[str, float] = {}
         for row in rows:
-            if not isinstance(row, dict):
+            symbol = str(row.get("symbol") or "")
+            if not symbol or symbol in result or row.get("trust_score") is None:
                 continue
-            value = row.get("content_hash")
-            if value:
-                hashes.add(str(value))
-        return hashes
+            try:
+                result[symbol] = float(row["trust_score"])
+            except (TypeError, ValueError):
+                continue
+        return result
 
-    async def get_latest_trust_score(self, symbol: str) -> float | None:
+    async def get_stocks(self) -> list[dict[str, str]]:
         if not self.enabled:
-            return None
+            return []
+
+        rows = await self._read_all(
+            "stocks",
+            {
+                "select": "symbol,name,sector,exchange",
+                "is_active": "is.true",
+                "order": "symbol.asc",
+            },
+        )
+        columns = ("symbol", "name", "sector", "exchange")
+        return [{key: str(row.get(key) or "") for key in columns} for row in rows]
 
-        url = f"{self.base}/rest/v1/trust_scores"
+    async def _rpc(self, function: str, payload: dict[str, Any]) -> Any:
+        url = f"{self.base}/rest/v1/rpc/{function}"
         headers = {
             "apikey": str(self.key),
             "Authorization": f"Bearer {self.key}",
+            "Content-Type": "application/json",
         }
-        params = {
-            "select": "trust_score",
-            "symbol": f"eq.{symbol}",
-            "order": "as_of_date.desc",
-            "limit": "1",
-        }
+        response = await self.client.post(url, headers=headers, json=payload)
+        response.raise_for_status()
+        return response.json() if response.content else None
 
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            rows = response.json()
+    async def acquire_job_lease(
+        self,
+        job: str,
+        shard: int,
+        shard_count: int,
+        owner: str,
+        ttl_seconds: int,
+    ) -> bool:
+        acquired = await self._rpc(
+            "acquire_job_lease",
+            {
+                "p_job": job,
+                "p_shard": shard,
+                "p_shard_count": shard_count,
+                "p_owner": owner,
+                "p_ttl_seconds": ttl_seconds,
+            },
+        )
+        return acquired is True
 
-        if not rows:
-            return None
+    async def release_job_lease(
+        self,
+        job: str,
+        shard: int,
+        shard_count: int,
+        owner: str,
+        summary: dict[str, Any],
+    ) -> None:
+        await self._rpc(
+            "release_job_lease",
+            {
+                "p_job": job,
+                "p_shard": shard,
+                "p_shard_count": shard_count,
+                "p_owner": owner,
+                "p_summary": summary,
+            },
+        )
 
-        trust_score = rows[0].get("trust_score")
-        if trust_score is None:
+    async def get_job_checkpoint(self, name: str) -> dict[str, Any] | None:
+        if not self.enabled:
             return None
 
-        try:
-            return float(trust_score)
-        except (TypeError, ValueError):
-            return None
+        rows = await self._read_all(
+            "job_checkpoints",
+            {"select": "run_key,completed,retry", "name": f"eq.{name}", "order": "name.asc"},
+        )
+        return rows[0] if rows else None
 
-    async def get_latest_trust_scores(self, symbols: list[str]) -> dict[str, float]:
-        result: dict[str, float] = {}
-        for symbol in symbols:
-            score = await self.get_latest_trust_score(symbol)
-            if score is not None:
-                result[symbol] = score
-        return result
+    async def lease_rate_limit_tokens(
+        self,
+        name: str,
+        per_minute: float,
+        burst: float,
+        reserve: float,
+        count: int,
+    ) -> tuple[int, float]:
+        """Take up to `count` tokens from the shared bucket: `(granted, seconds to wait)`."""
+        rows = await self._rpc(
+            "lease_rate_limit_tokens",
+            {"p_name": name, "p_per_minute": per_minute, "p_burst": burst, "p_reserve": reserve, "p_count": count},
+        )
+        row = rows[0] if rows else {}
+        return int(row.get("granted") or 0), float(row.get("retry_after") or 0.0)
+
+    async def observe_rate_limit(self, name: str, remaining: float | None, pause_seconds: float | None) -> None:
+        await self._rpc(
+            "observe_rate_limit",
+            {"p_name": name, "p_remaining": remaining, "p_pause_seconds": pause_seconds},
+        )
+
+    async def get_job_summaries(self, job: str, shard_count: int) -> dict[int, dict[str, Any]]:
+        if not self.enabled:
+            return {}
+
+        rows = await self._read_all(
+            "job_leases",
+            {
+                "select": "shard,summary",
+                "job": f"eq.{job}",
+                "shard_count": f"eq.{shard_count}",
+                "summary": "not.is.null",
+                "order": "shard.asc",
+            },
+        )
+        return {int(row["shard"]): row["summary"] for row in rows if isinstance(row.get("summary"), dict)}
 
 
 supabase_rest = SupabaseRest()
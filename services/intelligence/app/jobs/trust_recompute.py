@@ -4,8 +4,17 @@ import asyncio
 from datetime import date
 from typing import Any
 
-from ..engines.trust_score import compute_trust_score
-from ..providers.reddit import fetch_social_features
+from ..compute import compute_pool
+from ..concurrency import adaptive_limits
+from ..config import settings
+from ..engines.indicators import realized_volatilities
+from ..engines.portfolio import candidate_table, portfolio_index
+from ..engines.trust_score import compute_trust_score, fetch_provider_snapshot
+from ..http_clients import run_with_clients
+from ..providers.history import price_history
+from ..providers.yahoo import warm_market_indicators
+from .checkpoint import JobCheckpoint
+from .runner import shard_scoped
 from .store import supabase_rest
 from .universe import NIFTY_UNIVERSE
 
@@ -14,15 +23,17 @@ async def _compute_rows_for_symbol(
     symbol: str,
     as_of_date: date,
     previous_score: float | None,
-    semaphore: asyncio.Semaphore,
 ) -> tuple[dict[str, Any], dict[str, Any]]:
-    async with semaphore:
-        trust = await compute_trust_score(
-            symbol,
-            previous_score=previous_score,
-            as_of_date=as_of_date,
-        )
-        social = await fetch_social_features(symbol)
+    snapshot = await fetch_provider_snapshot(symbol)
+
+    # trust_scores and social_daily are both built from this one snapshot so they always agree.
+    trust = await compute_trust_score(
+        symbol,
+        previous_score=previous_score,
+        as_of_date=as_of_date,
+        snapshot=snapshot,
+    )
+    social = snapshot.social
 
     trust_row = {
         "symbol": symbol,
@@ -50,33 +61,130 @@ async def _compute_rows_for_symbol(
     return trust_row, social_row
 
 
-async def run() -> None:
+async def refresh_portfolio_index() -> bool:
+    """Rebuild the portfolio candidate index from the synced universe, the latest
+    recomputed trust scores and the realized volatility of every symbol with stored price
+    history; False (index untouched) when there is no synced universe."""
+    stocks = await supabase_rest.get_stocks()
+    if not stocks:
+        return False
+    symbols = [stock["symbol"] for stock in stocks]
+    trust_scores = await supabase_rest.get_latest_trust_scores(symbols)
+    volatilities = await compute_pool.run(realized_volatilities, symbols, price_history)
+    table = await compute_pool.run(
+        candidate_table,
+        stocks,
+        trust_scores,
+        volatilities,
+        settings.portfolio_sector_top_k,
+    )
+    portfolio_index.load(table)
+    return True
+
+
+def _ordered_symbols(symbols: list[str], retry: list[str], completed: set[str]) -> list[str]:
+    """Pending symbols, last run's failures first."""
+    universe = set(symbols)
+    first = [symbol for symbol in dict.fromkeys(retry) if symbol in universe]
+    retried = set(first)
+    rest = [symbol for symbol in symbols if symbol not in retried]
+    return [symbol for symbol in [*first, *rest] if symbol not in completed]
+
+
+async def run(universe: list[dict[str, str]] | None = None) -> dict[str, Any]:
+    """Recompute trust scores, upserting each window of finished symbols as it fills.
+
+    After every window the finished symbols are checkpointed, so a killed run resumes
+    where it stopped. Failed symbols go to a retry list that the next run starts with.
+    """
     as_of_date = date.today()
-    symbols = [stock["symbol"] for stock in NIFTY_UNIVERSE]
+    run_key = as_of_date.isoformat()
+    checkpoint = JobCheckpoint(shard_scoped("trust-recompute"))
+    symbols = list(dict.fromkeys(stock["symbol"] for stock in universe or NIFTY_UNIVERSE))
+    await checkpoint.load(run_key)
+    completed = set(checkpoint.completed)
+    retry = checkpoint.retry
+    pending = _ordered_symbols(symbols, retry, completed)
+    retrying = set(retry) & set(pending)
+
     previous_scores = (
-        await supabase_rest.get_latest_trust_scores(symbols)
-        if supabase_rest.enabled
+        await supabase_rest.get_latest_trust_scores(pending)
+        if supabase_rest.enabled and pending
         else {}
     )
 
-    semaphore = asyncio.Semaphore(4)
-    computed = await asyncio.gather(
-        *(
-            _compute_rows_for_symbol(
-                symbol,
-                as_of_date,
-                previous_scores.get(symbol),
-                semaphore,
-            )
-            for symbol in symbols
+    # One bulk history sync and one vectorized indicator pass for the whole universe, so the
+    # per-symbol market features below are table lookups.
+    if pending:
+        await warm_market_indicators(pending)
+
+    # Each symbol's provider deadline starts when it is started, so only a bounded number run
+    # at once; the rest would otherwise spend their deadline queued behind the host limits.
+    in_flight = asyncio.Semaphore(settings.trust_recompute_concurrency)
+
+    async def compute(symbol: str) -> tuple[str, tuple[dict[str, Any], dict[str, Any]] | None]:
+        async with in_flight:
+            try:
+                return symbol, await _compute_rows_for_symbol(
+                    symbol,
+                    as_of_date,
+                    previous_scores.get(symbol),
+                )
+            except Exception:
+                return symbol, None
+
+    trust_window: list[dict[str, Any]] = []
+    social_window: list[dict[str, Any]] = []
+    failed: set[str] = set()
+    succeeded: set[str] = set()
+    stats = {"trustScoresUpserted": 0, "socialRowsUpserted": 0, "windows": 0}
+
+    async def flush() -> None:
+        await supabase_rest.upsert("trust_scores", trust_window)
+        await supabase_rest.upsert("social_daily", social_window)
+        await checkpoint.mark_completed(
+            (row["symbol"] for row in trust_window),
+            retry=(retrying - succeeded) | failed,
         )
-    )
-    trust_rows = [rows[0] for rows in computed]
-    social_rows = [rows[1] for rows in computed]
+        stats["trustScoresUpserted"] += len(trust_window)
+        stats["socialRowsUpserted"] += len(social_window)
+        stats["windows"] += 1
+        trust_window.clear()
+        social_window.clear()
+
+    # Tasks are created in order and queue on the semaphore in that order, so retried
+    # symbols reach the upstreams first.
+    tasks = [asyncio.ensure_future(compute(symbol)) for symbol in pending]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            symbol, rows = await next_result
+            if rows is None:
+                failed.add(symbol)
+                continue
+            succeeded.add(symbol)
+            trust_window.append(rows[0])
+            social_window.append(rows[1])
+            if len(trust_window) >= settings.trust_recompute_upsert_window:
+                await flush()
+        if trust_window:
+            await flush()
+    finally:
+        for task in tasks:
+            task.cancel()
 
-    await supabase_rest.upsert("trust_scores", trust_rows)
-    await supabase_rest.upsert("social_daily", social_rows)
+    # The day's run is complete; only its failures carry over.
+    await checkpoint.finish(retry=failed)
+
+    return {
+        "status": "ok",
+        "symbols": len(symbols),
+        "resumedSymbols": len(completed & set(symbols)),
+        "retriedSymbols": len(retrying),
+        "failedSymbols": sorted(failed),
+        **stats,
+        "concurrency": adaptive_limits.stats(),
+    }
 
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    print(asyncio.run(run_with_clients(run)))
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import csv
-import io
+import json
 import re
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from time import perf_counter
 from urllib.parse import quote
 
 import httpx
 
+from ..compute import compute_pool
 from ..config import settings
+from ..engines.common import fallback_table, fallback_units
+from ..http_cache import http_cache, response_digest
+from ..http_clients import http_clients
 
 NIFTY_UNIVERSE = [
     {"symbol": "RELIANCE.NS", "name": "Reliance Industries", "sector": "Energy", "exchange": "NSE"},
@@ -47,11 +55,91 @@ def _logo_url(symbol: str, name: str, exchange: str) -> str:
     return f"https://api.dicebear.com/9.x/initials/svg?seed={quote(name or root_symbol)}"
 
 
-def _apply_limit(rows: list[dict[str, str]]) -> list[dict[str, str]]:
+def _limit_reached(rows: list[dict[str, str]]) -> bool:
     limit = settings.universe_limit_per_exchange
-    if limit <= 0:
-        return rows
-    return rows[:limit]
+    return limit > 0 and len(rows) >= limit
+
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[dict[str, str]]:
+    """Parse delimited text line by line as it arrives, keeping quoted newlines together."""
+    headers: list[str] | None = None
+    pending = ""
+    async for line in lines:
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+
+        cells = next(csv.reader([text]))
+        if headers is None:
+            headers = cells
+            continue
+        yield dict(zip(headers, cells))
+
+
+def _records_array_start(buffer: str, keys: tuple[str, ...]) -> int | None:
+    """Index of the `[` that opens the record list: a top-level array or one under `keys`."""
+    in_string = False
+    escaped = False
+    for index, char in enumerate(buffer):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char == "[":
+            prefix = buffer[:index].rstrip()
+            if not prefix or any(re.search(rf'"{key}"\s*:$', prefix) for key in keys):
+                return index
+    return None
+
+
+async def _iter_json_records(
+    chunks: AsyncIterator[str],
+    keys: tuple[str, ...],
+) -> AsyncIterator[dict[str, object]]:
+    """Yield the objects of a JSON record list one at a time as the body streams in."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    in_array = False
+
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            if not in_array:
+                start = _records_array_start(buffer, keys)
+                if start is None:
+                    break
+                buffer = buffer[start + 1 :]
+                in_array = True
+
+            index = 0
+            while index < len(buffer) and buffer[index] in " \t\r\n,":
+                index += 1
+            if index >= len(buffer):
+                buffer = ""
+                break
+            if buffer[index] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, index)
+            except json.JSONDecodeError:
+                # The element is still arriving; wait for the next chunk.
+                buffer = buffer[index:]
+                break
+            if isinstance(record, dict):
+                yield record
+            buffer = buffer[end:]
+
+    if in_array:
+        raise ValueError("Truncated JSON record list")
 
 
 def _normalize_rows(rows: list[dict[str, str]]) -> list[dict[str, str]]:
@@ -75,13 +163,9 @@ def _normalize_rows(rows: list[dict[str, str]]) -> list[dict[str, str]]:
     return sorted(dedupe.values(), key=lambda item: item["symbol"])
 
 
-async def _fetch_nse_universe(client: httpx.AsyncClient) -> list[dict[str, str]]:
-    response = await client.get(settings.nse_universe_url)
-    response.raise_for_status()
-
+async def _parse_nse_universe(response: httpx.Response) -> list[dict[str, str]]:
     rows: list[dict[str, str]] = []
-    reader = csv.DictReader(io.StringIO(response.text))
-    for row in reader:
+    async for row in _iter_csv_records(response.aiter_lines()):
         symbol = _pick(row, ["SYMBOL", " SYMBOL"]).upper()
         if not symbol:
             continue
@@ -100,34 +184,16 @@ async def _fetch_nse_universe(client: httpx.AsyncClient) -> list[dict[str, str]]
                 "exchange": "NSE",
             }
         )
+        if _limit_reached(rows):
+            break
 
-    return _apply_limit(rows)
+    return rows
 
 
-async def _fetch_bse_universe(client: httpx.AsyncClient) -> list[dict[str, str]]:
-    response = await client.get(
-        settings.bse_universe_url,
-        headers={
-            "Accept": "application/json, text/plain, */*",
-            "Referer": "https://www.bseindia.com/",
-            "User-Agent": settings.yahoo_user_agent,
-        },
-    )
-    response.raise_for_status()
-
-    payload = response.json()
-    records: list[dict[str, object]] = []
-    if isinstance(payload, list):
-        records = [item for item in payload if isinstance(item, dict)]
-    elif isinstance(payload, dict):
-        for key in ["Table", "table", "Data", "data", "d"]:
-            value = payload.get(key)
-            if isinstance(value, list):
-                records = [item for item in value if isinstance(item, dict)]
-                break
-
+async def _parse_bse_universe(response: httpx.Response) -> list[dict[str, str]]:
     rows: list[dict[str, str]] = []
-    for record in records:
+    records = _iter_json_records(response.aiter_text(), ("Table", "table", "Data", "data", "d"))
+    async for record in records:
         code = _pick(
             record,
             [
@@ -177,21 +243,19 @@ async def _fetch_bse_universe(client: httpx.AsyncClient) -> list[dict[str, str]]
                 "exchange": "BSE",
             }
         )
+        if _limit_reached(rows):
+            break
 
-    return _apply_limit(rows)
-
+    return rows
 
-async def _fetch_nyse_universe(client: httpx.AsyncClient) -> list[dict[str, str]]:
-    response = await client.get(settings.nyse_universe_url)
-    response.raise_for_status()
 
-    lines = response.text.splitlines()
-    if not lines:
-        return []
-
-    headers = lines[0].split("|")
+async def _parse_nyse_universe(response: httpx.Response) -> list[dict[str, str]]:
     rows: list[dict[str, str]] = []
-    for line in lines[1:]:
+    headers: list[str] | None = None
+    async for line in response.aiter_lines():
+        if headers is None:
+            headers = line.split("|")
+            continue
         if not line.strip() or line.startswith("File Creation Time"):
             continue
 
@@ -219,34 +283,116 @@ async def _fetch_nyse_universe(client: httpx.AsyncClient) -> list[dict[str, str]
                 "exchange": "NYSE",
             }
         )
+        if _limit_reached(rows):
+            break
 
-    return _apply_limit(rows)
+    return rows
 
 
-async def load_market_universe() -> list[dict[str, str]]:
-    rows: list[dict[str, str]] = []
+@dataclass(frozen=True)
+class ExchangeSource:
+    url: Callable[[], str]
+    parse: Callable[[httpx.Response], Awaitable[list[dict[str, str]]]]
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+EXCHANGE_SOURCES: dict[str, ExchangeSource] = {
+    "NSE": ExchangeSource(url=lambda: settings.nse_universe_url, parse=_parse_nse_universe),
+    "BSE": ExchangeSource(
+        url=lambda: settings.bse_universe_url,
+        parse=_parse_bse_universe,
+        headers={
+            "Accept": "application/json, text/plain, */*",
+            "Referer": "https://www.bseindia.com/",
+            "User-Agent": settings.yahoo_user_agent,
+        },
+    ),
+    "NYSE": ExchangeSource(url=lambda: settings.nyse_universe_url, parse=_parse_nyse_universe),
+}
+
+
+async def _fetch_exchange_universe(
+    exchange: str,
+    client: httpx.AsyncClient,
+) -> tuple[list[dict[str, str]], dict[str, object]]:
+    """Stream and parse one listing, reusing the previous parse when the body is unchanged."""
+    source = EXCHANGE_SOURCES[exchange]
+    async with client.stream("GET", source.url(), headers=source.headers) as response:
+        response.raise_for_status()
+        cache = response.extensions.get("http_cache", {})
+        # The limit shapes the parsed rows, so a different limit must not reuse them.
+        parse_key = f"universe-{exchange.lower()}-{settings.universe_limit_per_exchange}"
+        digest = response_digest(response)
+
+        rows = http_cache.load_parsed(parse_key, digest)
+        parse_reused = rows is not None
+        if rows is None:
+            rows = await source.parse(response)
+            # A body stored by this request only has a digest once the parse read all of it.
+            http_cache.store_parsed(parse_key, response_digest(response), rows)
+
+    return rows, {"httpCache": cache.get("status"), "parseReused": parse_reused}
+
+
+@dataclass
+class UniverseLoad:
+    rows: list[dict[str, str]]
+    exchanges: list[dict[str, object]] = field(default_factory=list)
+    nifty_fallback: bool = False
+
+    def report(self) -> dict[str, object]:
+        return {
+            "symbols": len(self.rows),
+            "exchanges": self.exchanges,
+            "niftyFallback": self.nifty_fallback,
+        }
 
-    async with httpx.AsyncClient(
-        timeout=25.0,
-        follow_redirects=True,
-        headers={"User-Agent": settings.yahoo_user_agent},
-    ) as client:
-        try:
-            rows.extend(await _fetch_nse_universe(client))
-        except Exception:
-            rows.extend(NIFTY_UNIVERSE)
-
-        try:
-            rows.extend(await _fetch_bse_universe(client))
-        except Exception:
-            pass
-
-        try:
-            rows.extend(await _fetch_nyse_universe(client))
-        except Exception:
-            pass
+
+async def _load_exchange(exchange: str) -> tuple[list[dict[str, str]], dict[str, object]]:
+    started = perf_counter()
+    client = http_clients.get(exchange.lower())
+    details: dict[str, object] = {"httpCache": None, "parseReused": False}
+    try:
+        rows, details = await _fetch_exchange_universe(exchange, client)
+        error: str | None = None
+    except Exception as exc:
+        rows = []
+        error = str(exc) or exc.__class__.__name__
+
+    # NSE is the primary listing; without it the curated NIFTY list stands in.
+    fallback = error is not None and exchange == "NSE"
+    return (NIFTY_UNIVERSE if fallback else rows), {
+        "exchange": exchange,
+        "rows": len(rows),
+        "durationMs": round((perf_counter() - started) * 1000, 2),
+        "fallback": fallback,
+        "error": error,
+        **details,
+    }
+
+
+async def load_fallback_table(rows: Sequence[dict[str, str]]) -> None:
+    """Precompute the deterministic fallback scores of `rows`, replacing the last universe's."""
+    symbols = list(dict.fromkeys(row["symbol"] for row in rows))
+    fallback_table.load(symbols, await compute_pool.run(fallback_units, symbols))
+
+
+async def load_market_universe_report() -> UniverseLoad:
+    results = await asyncio.gather(*(_load_exchange(exchange) for exchange in EXCHANGE_SOURCES))
+    rows = [row for exchange_rows, _report in results for row in exchange_rows]
 
     normalized = _normalize_rows(rows)
     if normalized:
-        return normalized
-    return _normalize_rows(NIFTY_UNIVERSE)
+        universe_load = UniverseLoad(rows=normalized, exchanges=[report for _rows, report in results])
+    else:
+        universe_load = UniverseLoad(
+            rows=_normalize_rows(NIFTY_UNIVERSE),
+            exchanges=[report for _rows, report in results],
+            nifty_fallback=True,
+        )
+    await load_fallback_table(universe_load.rows)
+    return universe_load
+
+
+async def load_market_universe() -> list[dict[str, str]]:
+    return (await load_market_universe_report()).rows
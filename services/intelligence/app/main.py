@@ -1,37 +1,106 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from datetime import date
 from time import perf_counter
+from typing import TypeVar
 
-from fastapi import Depends, FastAPI, Request, Response
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 
-from .engines.portfolio import generate_portfolio
+from .circuit import circuit_breakers
+from .compute import compute_pool
+from .concurrency import adaptive_limits
+from .config import settings
+from .engines.common import fallback_table
+from .engines.language import compliance_filter
+from .engines.portfolio import generate_portfolio, portfolio_index
 from .engines.quiz import score_quiz
 from .engines.sip import generate_sip_plan
 from .engines.trust_score import compute_trust_score
+from .http_cache import http_cache
+from .http_clients import http_client_scope
 from .jobs import market_sync
+from .jobs.runner import load_job_universe
+from .jobs.store import supabase_rest
+from .jobs.trust_recompute import refresh_portfolio_index
+from .jobs.universe import load_fallback_table
+from .providers.cache import feature_cache
 from .providers.reddit import fetch_social_features
+from .providers.yahoo import warm_market_indicators
+from .rate_limit import batch_traffic, rate_limits
 from .schemas import (
+    BatchError,
     PortfolioPlan,
     PortfolioRequest,
     QuizScoreRequest,
     RiskProfile,
     SipPlan,
     SipRequest,
+    SocialBatchResponse,
     SocialSnapshot,
+    SymbolBatchRequest,
+    TrustScoreBatchResponse,
     TrustScoreResponse,
 )
 from .security import verify_admin_sync_key, verify_internal_token
+from .singleflight import SingleFlight
 from .telemetry import schedule_event, schedule_exception
 
+background_tasks: dict[str, asyncio.Task[None]] = {}
+
+
+async def _load_fallback_table() -> None:
+    """Precompute fallback scores for the stored universe (the NIFTY list without
+    Supabase), so API fallbacks answer from the table instead of hashing per call."""
+    try:
+        await load_fallback_table(await load_job_universe())
+    except Exception as exc:
+        schedule_exception(exc, {"task": "fallback-table-load"})
+
+
+async def _refresh_portfolio_index() -> None:
+    try:
+        await refresh_portfolio_index()
+    except Exception as exc:
+        schedule_exception(exc, {"task": "portfolio-index-refresh"})
+
+
+def _refresh_portfolio_index_if_stale() -> None:
+    """Rebuild the portfolio index in the background once it is older than the refresh
+    interval; plans keep using the current index meanwhile."""
+    if not supabase_rest.enabled or portfolio_index.age() < settings.portfolio_index_refresh_seconds:
+        return
+    running = background_tasks.get("portfolio-index")
+    if running is None or running.done():
+        background_tasks["portfolio-index"] = asyncio.get_running_loop().create_task(_refresh_portfolio_index())
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    async with http_client_scope():
+        background_tasks["fallback-table"] = asyncio.get_running_loop().create_task(_load_fallback_table())
+        _refresh_portfolio_index_if_stale()
+        try:
+            yield
+        finally:
+            compute_pool.shutdown()
+
+
 app = FastAPI(
     title="Anylical Intelligence Service",
     version="0.1.0",
     description="Deterministic AI-assisted analytics engines (educational only)",
+    lifespan=lifespan,
 )
 
 SLOW_REQUEST_MS = 1200
 
+trust_score_flights = SingleFlight()
+
+T = TypeVar("T")
+
 
 @app.middleware("http")
 async def telemetry_middleware(request: Request, call_next):  # type: ignore[no-untyped-def]
@@ -75,16 +144,17 @@ def health() -> dict[str, str]:
     }
 
 
-@app.get("/v1/trust-score/{symbol}", response_model=TrustScoreResponse, dependencies=[Depends(verify_internal_token)])
-async def trust_score(symbol: str) -> TrustScoreResponse:
-    return await compute_trust_score(symbol.upper())
+async def _shared_trust_score(symbol: str, deadline_seconds: float | None) -> TrustScoreResponse:
+    return await trust_score_flights.do(
+        (symbol, deadline_seconds),
+        lambda: compute_trust_score(symbol, deadline_seconds=deadline_seconds),
+    )
 
 
-@app.get("/v1/social/{symbol}", response_model=SocialSnapshot, dependencies=[Depends(verify_internal_token)])
-async def social_snapshot(symbol: str) -> SocialSnapshot:
-    features = await fetch_social_features(symbol.upper())
+async def _social_snapshot(symbol: str) -> SocialSnapshot:
+    features = await fetch_social_features(symbol)
     return SocialSnapshot(
-        symbol=symbol.upper(),
+        symbol=symbol,
         asOfDate=date.today().isoformat(),
         bullishPct=float(features["bullish_pct"]),
         bearishPct=float(features["bearish_pct"]),
@@ -95,6 +165,93 @@ async def social_snapshot(symbol: str) -> SocialSnapshot:
     )
 
 
+def _batch_symbols(payload: SymbolBatchRequest) -> list[str]:
+    symbols = list(dict.fromkeys(item.strip().upper() for item in payload.symbols if item.strip()))
+    if len(symbols) > settings.batch_max_symbols:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.batch_max_symbols} symbols are allowed per batch",
+        )
+    return symbols
+
+
+async def _run_batch(
+    symbols: list[str],
+    worker: Callable[[str], Awaitable[T]],
+) -> tuple[list[T], list[BatchError]]:
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+    async def run_one(symbol: str) -> T | BatchError:
+        async with semaphore:
+            try:
+                return await worker(symbol)
+            except Exception as exc:
+                return BatchError(symbol=symbol, error=str(exc) or exc.__class__.__name__)
+
+    outcomes = await asyncio.gather(*(run_one(symbol) for symbol in symbols))
+    results = [item for item in outcomes if not isinstance(item, BatchError)]
+    errors = [item for item in outcomes if isinstance(item, BatchError)]
+    return results, errors
+
+
+@app.get("/v1/trust-score/{symbol}", response_model=TrustScoreResponse, dependencies=[Depends(verify_internal_token)])
+async def trust_score(
+    symbol: str,
+    deadline_ms: int | None = Query(default=None, alias="deadlineMs", ge=100, le=30_000),
+) -> TrustScoreResponse:
+    deadline_seconds = deadline_ms / 1000 if deadline_ms is not None else None
+    return await _shared_trust_score(symbol.upper(), deadline_seconds)
+
+
+@app.post(
+    "/v1/trust-score/batch",
+    response_model=TrustScoreBatchResponse,
+    dependencies=[Depends(verify_internal_token)],
+)
+async def trust_score_batch(payload: SymbolBatchRequest) -> TrustScoreBatchResponse:
+    deadline_seconds = payload.deadlineMs / 1000 if payload.deadlineMs is not None else None
+    symbols = _batch_symbols(payload)
+    # One history sync and one indicator pass for the batch; per-symbol lookups then hit the table.
+    try:
+        await warm_market_indicators(symbols)
+    except Exception as exc:
+        schedule_exception(exc, {"task": "warm-market-indicators"})
+    results, errors = await _run_batch(
+        symbols,
+        lambda symbol: _shared_trust_score(symbol, deadline_seconds),
+    )
+    return TrustScoreBatchResponse(results=results, errors=errors)
+
+
+@app.get("/v1/social/{symbol}", response_model=SocialSnapshot, dependencies=[Depends(verify_internal_token)])
+async def social_snapshot(symbol: str) -> SocialSnapshot:
+    return await _social_snapshot(symbol.upper())
+
+
+@app.post("/v1/social/batch", response_model=SocialBatchResponse, dependencies=[Depends(verify_internal_token)])
+async def social_batch(payload: SymbolBatchRequest) -> SocialBatchResponse:
+    results, errors = await _run_batch(_batch_symbols(payload), _social_snapshot)
+    return SocialBatchResponse(results=results, errors=errors)
+
+
+@app.get("/v1/metrics", dependencies=[Depends(verify_internal_token)])
+def metrics() -> dict[str, object]:
+    return {
+        "featureCache": feature_cache.stats(),
+        "httpCache": http_cache.stats(),
+        "concurrency": adaptive_limits.stats(),
+        "rateLimits": rate_limits.stats(),
+        "circuitBreakers": circuit_breakers.stats(),
+        "portfolioIndex": portfolio_index.stats(),
+        "fallbackTable": fallback_table.stats(),
+        "compliance": compliance_filter.stats(),
+        "coalescing": {
+            "trustScore": trust_score_flights.stats(),
+            "providers": feature_cache.flights.stats(),
+        },
+    }
+
+
 @app.post("/v1/quiz/score", response_model=RiskProfile, dependencies=[Depends(verify_internal_token)])
 def quiz_score(payload: QuizScoreRequest) -> RiskProfile:
     normalized = [answer.model_dump() for answer in payload.answers]
@@ -102,13 +259,15 @@ def quiz_score(payload: QuizScoreRequest) -> RiskProfile:
 
 
 @app.post("/v1/portfolio/generate", response_model=PortfolioPlan, dependencies=[Depends(verify_internal_token)])
-def portfolio_generate(payload: PortfolioRequest) -> PortfolioPlan:
+async def portfolio_generate(payload: PortfolioRequest) -> PortfolioPlan:
+    _refresh_portfolio_index_if_stale()
     data = generate_portfolio(payload.riskPersona, payload.amount, payload.horizonMonths)
     return PortfolioPlan(**data)
 
 
 @app.post("/v1/sip/generate", response_model=SipPlan, dependencies=[Depends(verify_internal_token)])
-def sip_generate(payload: SipRequest) -> SipPlan:
+async def sip_generate(payload: SipRequest) -> SipPlan:
+    _refresh_portfolio_index_if_stale()
     data = generate_sip_plan(payload.monthlyBudget, payload.riskPersona, payload.horizonMonths)
     return SipPlan(**data)
 
@@ -118,7 +277,8 @@ def sip_generate(payload: SipRequest) -> SipPlan:
     dependencies=[Depends(verify_internal_token), Depends(verify_admin_sync_key)],
 )
 async def admin_market_sync() -> dict[str, object]:
-    result = await market_sync.run()
+    with batch_traffic():
+        result = await market_sync.run()
     return {
         "status": "ok",
         "job": "market_sync",
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import zlib
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from functools import wraps
+from hashlib import sha1
+from pathlib import Path
+
+from ..config import local_data_path, settings, write_atomic
+from ..singleflight import SingleFlight
+
+FeatureMap = dict[str, float | int | bool]
+Fetcher = Callable[[str], Awaitable[FeatureMap]]
+
+
+@dataclass
+class CacheEntry:
+    value: FeatureMap
+    stored_at: float
+
+
+class FeatureCache:
+    """Two-tier (memory LRU + zlib-compressed disk) cache of real provider features.
+
+    Only non-stale results are stored. Entries older than the provider TTL are served
+    while a background refresh runs, and once a provider fails the newest stored entry
+    is returned marked stale before falling back to synthetic values. Concurrent misses
+    for the same (provider, symbol) share one upstream fetch.
+    """
+
+    def __init__(self, max_entries: int, directory: Path | None) -> None:
+        self.max_entries = max_entries
+        self.directory = directory
+        self._memory: OrderedDict[tuple[str, str], CacheEntry] = OrderedDict()
+        self._refreshing: dict[tuple[str, str], asyncio.Task[FeatureMap]] = {}
+        self._counters: Counter[str] = Counter()
+        self.flights = SingleFlight()
+
+    def _path(self, provider: str, symbol: str) -> Path | None:
+        if self.directory is None:
+            return None
+        return self.directory / provider / f"{sha1(symbol.encode('utf-8')).hexdigest()}.json.z"
+
+    def _load(self, provider: str, symbol: str) -> CacheEntry | None:
+        key = (provider, symbol)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+
+        path = self._path(provider, symbol)
+        if path is None or not path.exists():
+            return None
+        try:
+            payload = json.loads(zlib.decompress(path.read_bytes()))
+            entry = CacheEntry(value=payload["value"], stored_at=float(payload["stored_at"]))
+        except (OSError, ValueError, KeyError, zlib.error):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: tuple[str, str], entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _store(self, provider: str, symbol: str, value: FeatureMap) -> None:
+        entry = CacheEntry(value=dict(value), stored_at=time.time())
+        self._remember((provider, symbol), entry)
+
+        path = self._path(provider, symbol)
+        if path is None:
+            return
+        try:
+            write_atomic(
+                path,
+                zlib.compress(json.dumps({"value": entry.value, "stored_at": entry.stored_at}).encode("utf-8")),
+            )
+        except OSError:
+            # The disk tier is an optimization; memory still holds the entry.
+            return
+
+    def _settle(self, provider: str, symbol: str, value: FeatureMap) -> FeatureMap:
+        if not value.get("stale"):
+            self._store(provider, symbol, value)
+            return value
+
+        known_good = self.last_known_good(provider, symbol)
+        if known_good is not None:
+            return known_good
+        self._counters["fallback"] += 1
+        return value
+
+    def last_known_good(self, provider: str, symbol: str) -> FeatureMap | None:
+        entry = self._load(provider, symbol)
+        if entry is None:
+            return None
+        if time.time() - entry.stored_at > settings.feature_cache_last_known_good_seconds:
+            return None
+        self._counters["last_known_good"] += 1
+        return {**entry.value, "stale": True}
+
+    def _refresh(self, provider: str, symbol: str, fetch: Fetcher) -> None:
+        key = (provider, symbol)
+        running = self._refreshing.get(key)
+        if running is not None and not running.done():
+            return
+
+        async def refresh() -> FeatureMap:
+            try:
+                return await self._fetch(provider, symbol, fetch)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._counters["refresh"] += 1
+        self._refreshing[key] = asyncio.get_running_loop().create_task(refresh())
+
+    async def get_or_fetch(self, provider: str, symbol: str, fetch: Fetcher) -> FeatureMap:
+        entry = self._load(provider, symbol)
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            ttl = settings.feature_cache_ttl_seconds.get(provider, 0)
+            if age <= ttl:
+                self._counters["hit"] += 1
+                return dict(entry.value)
+            if age <= ttl + settings.feature_cache_stale_grace_seconds:
+                self._counters["stale"] += 1
+                self._refresh(provider, symbol, fetch)
+                return dict(entry.value)
+
+        self._counters["miss"] += 1
+        return dict(await self._fetch(provider, symbol, fetch))
+
+    async def _fetch(self, provider: str, symbol: str, fetch: Fetcher) -> FeatureMap:
+        async def fetch_and_settle() -> FeatureMap:
+            return self._settle(provider, symbol, await fetch(symbol))
+
+        return await self.flights.do((provider, symbol), fetch_and_settle)
+
+    def clear(self) -> None:
+        self._memory.clear()
+        self._refreshing.clear()
+        self._counters.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self._counters["hit"],
+            "misses": self._counters["miss"],
+            "stale": self._counters["stale"],
+            "refreshes": self._counters["refresh"],
+            "lastKnownGood": self._counters["last_known_good"],
+            "fallbacks": self._counters["fallback"],
+            "memoryEntries": len(self._memory),
+        }
+
+
+feature_cache = FeatureCache(
+    max_entries=settings.feature_cache_max_entries,
+    directory=local_data_path("feature-cache"),
+)
+
+
+def cached_features(provider: str) -> Callable[[Fetcher], Fetcher]:
+    def decorator(fetch: Fetcher) -> Fetcher:
+        @wraps(fetch)
+        async def wrapper(symbol: str) -> FeatureMap:
+            return await feature_cache.get_or_fetch(provider, symbol, fetch)
+
+        return wrapper
+
+    return decorator
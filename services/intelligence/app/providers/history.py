@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import fcntl
+import json
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+
+from ..config import local_data_path, settings
+
+BAR_DTYPE = np.dtype(
+    [
+        ("ts", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("adj_close", "<f8"),
+        ("volume", "<i8"),
+    ]
+)
+
+
+def bar_date(ts: int) -> date:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).date()
+
+
+def trading_days_between(start: date, end: date) -> list[date]:
+    """Weekdays in the half-open range (start, end]."""
+    days: list[date] = []
+    current = start + timedelta(days=1)
+    while current <= end:
+        if current.weekday() < 5:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+class PriceHistoryStore:
+    """Append-only daily OHLCV bars, one fixed-width binary file per symbol.
+
+    Reads are memory-mapped, so feature and indicator code can scan years of bars without
+    copying them. A small sidecar records the last session a symbol was synced through,
+    which keeps exchange holidays from being re-requested as gaps.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def _path(self, symbol: str) -> Path:
+        return self.directory / f"{quote(symbol, safe='')}.ohlcv"
+
+    def _meta_path(self, symbol: str) -> Path:
+        return self.directory / f"{quote(symbol, safe='')}.meta.json"
+
+    def read(self, symbol: str) -> np.ndarray:
+        path = self._path(symbol)
+        if not path.exists() or path.stat().st_size < BAR_DTYPE.itemsize:
+            return np.empty(0, dtype=BAR_DTYPE)
+        count = path.stat().st_size // BAR_DTYPE.itemsize
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+
+    def last_timestamp(self, symbol: str) -> int | None:
+        bars = self.read(symbol)
+        return int(bars["ts"][-1]) if len(bars) else None
+
+    def synced_through(self, symbol: str) -> date | None:
+        try:
+            payload = json.loads(self._meta_path(symbol).read_text())
+            return date.fromisoformat(str(payload["synced_through"]))
+        except (OSError, ValueError, KeyError):
+            last = self.last_timestamp(symbol)
+            return bar_date(last) if last is not None else None
+
+    def mark_synced(self, symbol: str, through: date) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._meta_path(symbol).write_text(json.dumps({"synced_through": through.isoformat()}))
+
+    def missing_sessions(self, symbol: str, through: date) -> list[date]:
+        """Trading days after the last sync up to `through` that have no stored bar yet."""
+        synced = self.synced_through(symbol)
+        if synced is None:
+            synced = through - timedelta(days=365 * settings.history_years)
+        return trading_days_between(synced, through)
+
+    def append(self, symbol: str, bars: np.ndarray) -> int:
+        if not len(bars):
+            return 0
+        bars = np.sort(np.asarray(bars, dtype=BAR_DTYPE), order="ts")
+        _, unique_index = np.unique(bars["ts"], return_index=True)
+        bars = bars[unique_index]
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._path(symbol).open("ab") as handle:
+            # Job shards in other processes sync the shared benchmark symbol too; the
+            # lock makes the "newer than the last stored bar" check and the write atomic.
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            last = self.last_timestamp(symbol)
+            if last is not None:
+                bars = bars[bars["ts"] > last]
+            if len(bars):
+                handle.write(bars.tobytes())
+        return int(len(bars))
+
+
+price_history = PriceHistoryStore(local_data_path("price-history"))
@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import json
 from collections import Counter
 from datetime import datetime, timedelta, timezone
 from hashlib import sha256
 from urllib.parse import quote_plus, urlparse
 
-import httpx
-
+from ..compute import compute_pool, io_stage
 from ..config import settings
 from ..engines.common import clamp, stable_score
+from ..engines.lexicon import Lexicon
+from ..engines.near_duplicates import NearDuplicateIndex
+from ..http_clients import http_clients
+from .cache import cached_features
 
 POSITIVE_TERMS = {"growth", "beat", "record", "strong", "profit", "upgrade", "expands"}
 NEGATIVE_TERMS = {"fraud", "loss", "downgrade", "fall", "decline", "investigation", "debt"}
+NEWS_LEXICON = Lexicon({"positive": POSITIVE_TERMS, "negative": NEGATIVE_TERMS})
 
 SOURCE_WEIGHT = {
     "moneycontrol.com": 0.85,
@@ -48,11 +53,8 @@ def _source_weight_for(domain: str, source_name: str, source_weights: dict[str,
     return float(source_weights.get("unknown", 0.5))
 
 
-def _score_text(title: str, description: str) -> float:
-    text = f"{title} {description}".lower()
-    positive = sum(1 for term in POSITIVE_TERMS if term in text)
-    negative = sum(1 for term in NEGATIVE_TERMS if term in text)
-    return float(clamp((positive - negative) / 3, -1, 1))
+def _sentiment(hits: Counter[str]) -> float:
+    return float(clamp((hits["positive"] - hits["negative"]) / 3, -1, 1))
 
 
 def _article_confidence(credibility_weight: float, published_at: datetime, now: datetime) -> float:
@@ -70,18 +72,26 @@ def _summarize_articles(articles: list[dict[str, str | float]]) -> dict[str, flo
     now = datetime.now(timezone.utc)
     weighted_signal = 0.0
     total_weight = 0.0
-    content_hashes: list[str] = []
+    seen_hashes: set[str] = set()
+    near_duplicates = NearDuplicateIndex()
+    duplicates = 0
     sources: set[str] = set()
     article_confidences: list[float] = []
     last_hour_count = 0
 
-    for article in articles:
+    for idx, article in enumerate(articles):
         sentiment = float(article["sentiment"])
         credibility = float(article["credibility_weight"])
         article_confidences.append(float(article["confidence"]))
-        content_hashes.append(str(article["content_hash"]))
         sources.add(str(article["source"]))
 
+        # Syndicated copies differ in source or a word or two, so exact hashes miss them.
+        content_hash = str(article["content_hash"])
+        near_match = near_duplicates.check_and_add(str(idx), str(article.get("title") or ""))
+        if content_hash in seen_hashes or near_match is not None:
+            duplicates += 1
+        seen_hashes.add(content_hash)
+
         published_raw = str(article["published_at"])
         try:
             published_at = datetime.fromisoformat(published_raw)
@@ -102,8 +112,7 @@ def _summarize_articles(articles: list[dict[str, str | float]]) -> dict[str, flo
             last_hour_count += 1
 
     normalized_signal = weighted_signal / total_weight if total_weight else 0.0
-    duplicates = sum(count - 1 for count in Counter(content_hashes).values() if count > 1)
-    duplication_factor = max(0.5, 1.0 - duplicates / max(len(content_hashes), 1))
+    duplication_factor = max(0.5, 1.0 - duplicates / max(len(articles), 1))
 
     raw_news_score = (60 + normalized_signal * 20) * duplication_factor
     news_score = float(clamp(raw_news_score, 0, 100))
@@ -131,91 +140,111 @@ def _summarize_articles(articles: list[dict[str, str | float]]) -> dict[str, flo
     }
 
 
-async def fetch_news_articles(
-    symbol: str,
-    source_weights: dict[str, float] | None = None,
-) -> list[dict[str, str | float]]:
-    if not settings.news_api_key:
+def parse_news_articles(raw: bytes, source_weights: dict[str, float]) -> list[dict[str, str | float]]:
+    """Article rows from one raw NewsAPI response; pure, so it can run in a worker."""
+    payload = json.loads(raw)
+    raw_articles = payload.get("articles")
+    if not isinstance(raw_articles, list) or not raw_articles:
         return []
 
-    merged_source_weights = {**SOURCE_WEIGHT, **(source_weights or {})}
+    now = datetime.now(timezone.utc)
+    articles: list[dict[str, str | float]] = []
+    texts: list[str] = []
+
+    for article in raw_articles:
+        if not isinstance(article, dict):
+            continue
+
+        title = str(article.get("title") or "").strip()
+        description = str(article.get("description") or "").strip()
+        url_value = str(article.get("url") or "").strip()
+        if not title or not url_value:
+            continue
+
+        source_object = article.get("source")
+        source_name = (
+            str(source_object.get("name") or "unknown")
+            if isinstance(source_object, dict)
+            else "unknown"
+        )
+        source_domain = _source_domain(url_value)
+
+        published_raw = str(article.get("publishedAt") or "")
+        try:
+            published_at = datetime.fromisoformat(published_raw.replace("Z", "+00:00"))
+            if published_at.tzinfo is None:
+                published_at = published_at.replace(tzinfo=timezone.utc)
+            else:
+                published_at = published_at.astimezone(timezone.utc)
+        except ValueError:
+            published_at = now
+
+        credibility_weight = clamp(
+            _source_weight_for(source_domain, source_name, source_weights),
+            0.1,
+            1.0,
+        )
+        texts.append(f"{title} {description}")
+        articles.append(
+            {
+                "source": source_domain,
+                "title": title,
+                "url": url_value,
+                "published_at": published_at.isoformat(),
+                "sentiment": 0.0,
+                "confidence": _article_confidence(credibility_weight, published_at, now),
+                "credibility_weight": round(float(credibility_weight), 2),
+                "content_hash": _article_hash(title, description, source_domain),
+            }
+        )
+
+    for article, hits in zip(articles, NEWS_LEXICON.scan_batch(texts)):
+        article["sentiment"] = round(_sentiment(hits), 2)
+    return articles
+
+
+def parse_news_features(raw: bytes, source_weights: dict[str, float]) -> dict[str, float | bool] | None:
+    articles = parse_news_articles(raw, source_weights)
+    return _summarize_articles(articles) if articles else None
+
+
+async def _fetch_news_payload(symbol: str) -> bytes:
     query = quote_plus(f"{symbol.replace('.NS', '').replace('.BO', '')} stock India")
     from_date = (datetime.now(timezone.utc) - timedelta(days=3)).strftime("%Y-%m-%d")
     url = (
         "https://newsapi.org/v2/everything?"
         f"q={query}&from={from_date}&sortBy=publishedAt&pageSize=30&apiKey={settings.news_api_key}"
     )
+    with io_stage():
+        response = await http_clients.get("newsapi").get(url)
+        response.raise_for_status()
+    return response.content
+
 
+async def fetch_news_articles(
+    symbol: str,
+    source_weights: dict[str, float] | None = None,
+) -> list[dict[str, str | float]]:
+    if not settings.news_api_key:
+        return []
+
+    merged_source_weights = {**SOURCE_WEIGHT, **(source_weights or {})}
     try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-        payload = response.json()
-        raw_articles = payload.get("articles")
-        if not isinstance(raw_articles, list) or not raw_articles:
-            return []
-
-        now = datetime.now(timezone.utc)
-        articles: list[dict[str, str | float]] = []
-
-        for article in raw_articles:
-            if not isinstance(article, dict):
-                continue
-
-            title = str(article.get("title") or "").strip()
-            description = str(article.get("description") or "").strip()
-            url_value = str(article.get("url") or "").strip()
-            if not title or not url_value:
-                continue
-
-            source_object = article.get("source")
-            source_name = (
-                str(source_object.get("name") or "unknown")
-                if isinstance(source_object, dict)
-                else "unknown"
-            )
-            source_domain = _source_domain(url_value)
-
-            published_raw = str(article.get("publishedAt") or "")
-            try:
-                published_at = datetime.fromisoformat(published_raw.replace("Z", "+00:00"))
-                if published_at.tzinfo is None:
-                    published_at = published_at.replace(tzinfo=timezone.utc)
-                else:
-                    published_at = published_at.astimezone(timezone.utc)
-            except ValueError:
-                published_at = now
-
-            credibility_weight = clamp(
-                _source_weight_for(source_domain, source_name, merged_source_weights),
-                0.1,
-                1.0,
-            )
-            sentiment = round(_score_text(title, description), 2)
-
-            articles.append(
-                {
-                    "source": source_domain,
-                    "title": title,
-                    "url": url_value,
-                    "published_at": published_at.isoformat(),
-                    "sentiment": sentiment,
-                    "confidence": _article_confidence(credibility_weight, published_at, now),
-                    "credibility_weight": round(float(credibility_weight), 2),
-                    "content_hash": _article_hash(title, description, source_domain),
-                }
-            )
-
-        return articles
+        raw = await _fetch_news_payload(symbol)
+        return await compute_pool.run(parse_news_articles, raw, merged_source_weights)
     except Exception:
         return []
 
 
+@cached_features("news")
 async def fetch_news_features(symbol: str) -> dict[str, float | bool]:
     if not settings.news_api_key:
         return fallback_news_features(symbol)
 
-    articles = await fetch_news_articles(symbol)
-    if not articles:
-        return fallback_news_features(symbol)
-    return _summarize_articles(articles)
+    try:
+        raw = await _fetch_news_payload(symbol)
+        # One small response on the request path: parsing inline beats a round trip to the pool.
+        features = parse_news_features(raw, SOURCE_WEIGHT)
+    except Exception:
+        features = None
+    return features or fallback_news_features(symbol)
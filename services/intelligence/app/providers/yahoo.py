@@ -1,120 +1,191 @@
 from __future__ import annotations
 
+import asyncio
 import math
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
-import httpx
+import numpy as np
 
 from ..config import settings
 from ..engines.common import stable_score
+from ..engines.indicators import indicator_engine
+from ..http_clients import http_clients
+from ..singleflight import SingleFlight
+from .cache import cached_features
+from .history import BAR_DTYPE, price_history
+
+CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+
+history_flights = SingleFlight()
+
+
+def fallback_market_features(symbol: str) -> dict[str, float | int | bool]:
+    latest_close = stable_score(symbol, 25, 3800, "latest-close")
+    previous_close = latest_close * (1 - stable_score(symbol, -0.03, 0.03, "trend"))
+    return {
+        "historical_score": stable_score(symbol, 48, 82, "historical"),
+        "market_score": stable_score(symbol, 45, 80, "market"),
+        "volatility": stable_score(symbol, 8, 42, "volatility"),
+        "history_years": round(stable_score(symbol, 1, 6, "years"), 2),
+        "latest_close": round(latest_close, 2),
+        "previous_close": round(previous_close, 2),
+        "stale": True,
+    }
 
 
-def _compute_volatility(closes: list[float]) -> float:
-    if len(closes) < 2:
-        return 0.0
-    returns: list[float] = []
-    for idx in range(1, len(closes)):
-        if closes[idx - 1] <= 0:
-            continue
-        returns.append((closes[idx] - closes[idx - 1]) / closes[idx - 1])
-
-    if len(returns) < 2:
-        return 0.0
+async def request_latest_quotes(symbols: list[str]) -> dict[str, dict[str, float | bool]]:
+    """Fetch one quote batch, raising on transport or payload errors."""
+    if not symbols:
+        return {}
 
-    mean = sum(returns) / len(returns)
-    variance = sum((item - mean) ** 2 for item in returns) / max(len(returns) - 1, 1)
-    return math.sqrt(variance)
+    response = await http_clients.get("yahoo").get(
+        "https://query1.finance.yahoo.com/v7/finance/quote",
+        params={"symbols": ",".join(symbols)},
+        timeout=10.0,
+    )
+    response.raise_for_status()
+
+    payload = response.json()
+    results = payload.get("quoteResponse", {}).get("result", [])
+    if not isinstance(results, list):
+        raise ValueError("Malformed quote payload")
+
+    mapped: dict[str, dict[str, float | bool]] = {}
+    for row in results:
+        if not isinstance(row, dict):
+            continue
+        symbol = str(row.get("symbol") or "").strip().upper()
+        latest = row.get("regularMarketPrice")
+        previous = row.get("regularMarketPreviousClose")
+        if not symbol or not isinstance(latest, (int, float)):
+            continue
+        latest_value = float(latest)
+        previous_value = float(previous) if isinstance(previous, (int, float)) and float(previous) > 0 else latest_value
+        mapped[symbol] = {
+            "latest_close": round(latest_value, 4),
+            "previous_close": round(previous_value, 4),
+            "stale": False,
+        }
+    return mapped
 
 
 async def fetch_latest_quotes(symbols: list[str]) -> dict[str, dict[str, float | bool]]:
-    if not symbols:
-        return {}
-
     try:
-        async with httpx.AsyncClient(timeout=10.0, headers={"User-Agent": settings.yahoo_user_agent}) as client:
-            response = await client.get(
-                "https://query1.finance.yahoo.com/v7/finance/quote",
-                params={"symbols": ",".join(symbols)},
-            )
-            response.raise_for_status()
-
-        payload = response.json()
-        results = payload.get("quoteResponse", {}).get("result", [])
-        if not isinstance(results, list):
-            return {}
-
-        mapped: dict[str, dict[str, float | bool]] = {}
-        for row in results:
-            if not isinstance(row, dict):
-                continue
-            symbol = str(row.get("symbol") or "").strip().upper()
-            latest = row.get("regularMarketPrice")
-            previous = row.get("regularMarketPreviousClose")
-            if not symbol or not isinstance(latest, (int, float)):
-                continue
-            latest_value = float(latest)
-            previous_value = float(previous) if isinstance(previous, (int, float)) and float(previous) > 0 else latest_value
-            mapped[symbol] = {
-                "latest_close": round(latest_value, 4),
-                "previous_close": round(previous_value, 4),
-                "stale": False,
-            }
-        return mapped
+        return await request_latest_quotes(symbols)
     except Exception:
         return {}
 
 
-async def fetch_market_features(symbol: str) -> dict[str, float | int | bool]:
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-    params = {
-        "range": "5y",
-        "interval": "1d",
-    }
-
-    try:
-        async with httpx.AsyncClient(timeout=8.0, headers={"User-Agent": settings.yahoo_user_agent}) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
+def _series_value(series: object, idx: int) -> float | None:
+    if not isinstance(series, list) or idx >= len(series):
+        return None
+    value = series[idx]
+    return float(value) if isinstance(value, (int, float)) else None
 
-        payload = response.json()
-        result = payload.get("chart", {}).get("result", [])[0]
-        timestamps = result.get("timestamp", [])
-        closes = result.get("indicators", {}).get("quote", [])[0].get("close", [])
 
-        closes_clean = [float(item) for item in closes if isinstance(item, (float, int))]
-        timestamps_clean = [int(item) for item in timestamps if isinstance(item, int)]
+def _chart_bars(payload: dict) -> np.ndarray:
+    result = payload.get("chart", {}).get("result", [])[0]
+    timestamps = result.get("timestamp") or []
+    indicators = result.get("indicators", {})
+    quote = (indicators.get("quote") or [{}])[0]
+    adjclose = ((indicators.get("adjclose") or [{}])[0]).get("adjclose")
 
-        if len(closes_clean) < 50 or not timestamps_clean:
+    rows: list[tuple[int, float, float, float, float, float, int]] = []
+    for idx, ts in enumerate(timestamps):
+        close = _series_value(quote.get("close"), idx)
+        if not isinstance(ts, int) or close is None:
+            continue
+        open_price = _series_value(quote.get("open"), idx) or close
+        rows.append(
+            (
+                ts,
+                open_price,
+                _series_value(quote.get("high"), idx) or max(open_price, close),
+                _series_value(quote.get("low"), idx) or min(open_price, close),
+                close,
+                _series_value(adjclose, idx) or close,
+                int(_series_value(quote.get("volume"), idx) or 0),
+            )
+        )
+    return np.array(rows, dtype=BAR_DTYPE)
+
+
+async def _sync_symbol_history(symbol: str, through: date) -> int:
+    if not price_history.missing_sessions(symbol, through):
+        return 0
+
+    last = price_history.last_timestamp(symbol)
+    params: dict[str, str] = {"interval": "1d"}
+    if last is None:
+        params["range"] = f"{settings.history_years}y"
+    else:
+        params["period1"] = str(last + 1)
+        params["period2"] = str(int(datetime.now(timezone.utc).timestamp()))
+
+    response = await http_clients.get("yahoo").get(CHART_URL.format(symbol=symbol), params=params)
+    response.raise_for_status()
+
+    bars = _chart_bars(response.json())
+    # Only completed sessions are appended; today's bar is still moving.
+    session_end = int(datetime.combine(through + timedelta(days=1), datetime.min.time(), timezone.utc).timestamp())
+    appended = price_history.append(symbol, bars[bars["ts"] < session_end])
+    price_history.mark_synced(symbol, through)
+    return appended
+
+
+async def sync_price_history(symbols: list[str], through: date | None = None) -> dict[str, int]:
+    """Fetch only the missing sessions for each symbol, concurrently across the batch.
+
+    Returns bars appended per symbol, or -1 where the delta fetch failed.
+    """
+    through = through or datetime.now(timezone.utc).date() - timedelta(days=1)
+    semaphore = asyncio.Semaphore(settings.history_sync_concurrency)
+
+    async def sync_one(symbol: str) -> tuple[str, int]:
+        async with semaphore:
+            try:
+                appended = await history_flights.do(
+                    (symbol, through),
+                    lambda: _sync_symbol_history(symbol, through),
+                )
+            except Exception:
+                return symbol, -1
+        return symbol, appended
+
+    results = await asyncio.gather(*(sync_one(symbol) for symbol in dict.fromkeys(symbols)))
+    return dict(results)
+
+
+async def warm_market_indicators(symbols: list[str]) -> dict[str, int]:
+    """Sync `symbols` and the benchmark in one concurrent pass and compute their indicators
+    together, so per-symbol `fetch_market_features` calls that follow are table lookups
+    instead of one matrix rebuild each. Returns `sync_price_history`'s result."""
+    synced = await sync_price_history([*symbols, settings.benchmark_symbol])
+    indicator_engine.lookup_many(symbols)
+    return synced
+
+
+@cached_features("market")
+async def fetch_market_features(symbol: str) -> dict[str, float | int | bool]:
+    try:
+        synced = await sync_price_history([symbol, settings.benchmark_symbol])
+        indicators = indicator_engine.lookup(symbol)
+        if int(indicators["observations"]) < 50:
             raise ValueError("Insufficient data")
 
-        first_date = datetime.fromtimestamp(timestamps_clean[0], tz=timezone.utc)
-        years = max((datetime.now(timezone.utc) - first_date).days / 365.0, 0.0)
-
-        volatility = _compute_volatility(closes_clean)
-        market_score = max(0.0, min(100.0, 80 - volatility * 400))
-        historical_return = (closes_clean[-1] - closes_clean[0]) / closes_clean[0]
-        historical_score = max(0.0, min(100.0, 50 + historical_return * 40 - volatility * 200))
-        latest_close = closes_clean[-1]
-        previous_close = closes_clean[-2] if len(closes_clean) > 1 else closes_clean[-1]
-
-        return {
-            "historical_score": round(historical_score, 2),
-            "market_score": round(market_score, 2),
-            "volatility": round(volatility * 100, 2),
-            "history_years": round(years, 2),
-            "latest_close": round(latest_close, 2),
-            "previous_close": round(previous_close, 2),
-            "stale": False,
+        features: dict[str, float | int | bool] = {
+            "historical_score": round(float(indicators["historical_score"]), 2),
+            "market_score": round(float(indicators["market_score"]), 2),
+            "volatility": round(float(indicators["daily_volatility"]) * 100, 2),
+            "history_years": round(float(indicators["history_years"]), 2),
+            "latest_close": round(float(indicators["latest_close"]), 2),
+            "previous_close": round(float(indicators["previous_close"]), 2),
+            "stale": synced.get(symbol, 0) < 0,
         }
+        for name in ("vol_30d", "vol_90d", "vol_1y", "max_drawdown", "cagr", "beta"):
+            value = float(indicators[name])
+            if math.isfinite(value):
+                features[name] = round(value, 4)
+        return features
     except Exception:
-        latest_close = stable_score(symbol, 25, 3800, "latest-close")
-        previous_close = latest_close * (1 - stable_score(symbol, -0.03, 0.03, "trend"))
-        return {
-            "historical_score": stable_score(symbol, 48, 82, "historical"),
-            "market_score": stable_score(symbol, 45, 80, "market"),
-            "volatility": stable_score(symbol, 8, 42, "volatility"),
-            "history_years": round(stable_score(symbol, 1, 6, "years"), 2),
-            "latest_close": round(latest_close, 2),
-            "previous_close": round(previous_close, 2),
-            "stale": True,
-        }
+        return fallback_market_features(symbol)
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from time import monotonic, time
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from .config import settings
+
+if TYPE_CHECKING:
+    from .jobs.store import SupabaseRest
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# API handlers run in the interactive lane; `run_with_clients` moves job runs to batch.
+traffic_lane: ContextVar[str] = ContextVar("traffic_lane", default=INTERACTIVE)
+
+# Used when a 429 names no reset time at all.
+_DEFAULT_RETRY_AFTER = 5.0
+# `X-RateLimit-Reset` above this is an epoch timestamp rather than seconds from now.
+_EPOCH_THRESHOLD = 1_000_000_000
+
+
+@contextmanager
+def batch_traffic() -> Iterator[None]:
+    token = traffic_lane.set(BATCH)
+    try:
+        yield
+    finally:
+        traffic_lane.reset(token)
+
+
+class RateLimited(httpx.TransportError):
+    """No token became available within `RATE_LIMIT_MAX_WAIT_SECONDS`."""
+
+
+def _retry_after_seconds(value: str) -> float | None:
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _reset_seconds(value: str | None) -> float | None:
+    try:
+        reset = float(value or "")
+    except ValueError:
+        return None
+    return max(reset - time() if reset > _EPOCH_THRESHOLD else reset, 0.0)
+
+
+def quota_hints(response: httpx.Response) -> tuple[float | None, float | None]:
+    """`(remaining, pause_seconds)` from `Retry-After` / `X-RateLimit-*`, or None where absent."""
+    headers = response.headers
+    pause = _retry_after_seconds(headers["retry-after"]) if "retry-after" in headers else None
+    remaining: float | None = None
+    if "x-ratelimit-remaining" in headers:
+        try:
+            remaining = max(float(headers["x-ratelimit-remaining"]), 0.0)
+        except ValueError:
+            remaining = None
+        if remaining is not None and remaining < 1 and pause is None:
+            pause = _reset_seconds(headers.get("x-ratelimit-reset"))
+    if response.status_code == 429 and pause is None:
+        pause = _reset_seconds(headers.get("x-ratelimit-reset")) or _DEFAULT_RETRY_AFTER
+    return remaining, pause
+
+
+class TokenBucket:
+    """Token bucket for one upstream's request quota.
+
+    Tokens refill at `per_minute / 60` per second up to `burst`. The batch lane must leave
+    `interactive_reserve` of the burst untouched, so API requests still find tokens while
+    an ingest job drains the bucket. Upstream hints (`Retry-After`, `X-RateLimit-*`) pause
+    or shrink the bucket.
+
+    With Supabase configured the bucket lives in `rate_limit_buckets` and every API worker
+    and job runner draws from it through the `lease_rate_limit_tokens` RPC. One round trip
+    leases up to `RATE_LIMIT_LEASE_TOKENS` per lane, and the next requests spend the lease
+    locally. Unspent tokens lapse after the time the shared bucket takes to refill them, and
+    an upstream pause or `X-RateLimit-Remaining` cap drops or trims them. The in-process
+    state is the fallback when Supabase is off or unreachable.
+    """
+
+    def __init__(self, name: str, per_minute: float | None, burst: int, remote: SupabaseRest | None = None) -> None:
+        self.name = name
+        self.per_minute = per_minute
+        self.rate = per_minute / 60 if per_minute else None
+        self.burst = float(max(burst, 1))
+        self.remote = remote
+        self._tokens = self.burst
+        self._updated = monotonic()
+        self._blocked_until = 0.0
+        # Per lane: tokens leased from the shared bucket and when they lapse.
+        self._leases: dict[str, tuple[int, float]] = {}
+        self._counters: Counter[str] = Counter()
+
+    def _reserve(self, lane: str) -> float:
+        return self.burst * settings.rate_limit_interactive_reserve if lane == BATCH else 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self._tokens = min(self.burst, self._tokens + max(now - self._updated, 0.0) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, lane: str) -> float:
+        """Take a local token and return 0, or return how long to wait before trying again."""
+        now = monotonic()
+        self._refill(now)
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self.rate is None:
+            return 0.0
+        reserve = self._reserve(lane)
+        if self._tokens >= 1 + reserve:
+            self._tokens -= 1
+            return 0.0
+        return (1 + reserve - self._tokens) / self.rate
+
+    def _leased(self, lane: str, now: float) -> int:
+        leased, expires = self._leases.get(lane, (0, 0.0))
+        return leased if now < expires else 0
+
+    async def _take(self, lane: str) -> float:
+        if self.remote is not None and self.remote.enabled and self.rate is not None:
+            now = monotonic()
+            leased = self._leased(lane, now)
+            if leased and now >= self._blocked_until:
+                self._leases[lane] = (leased - 1, self._leases[lane][1])
+                return 0.0
+            try:
+                granted, delay = await self.remote.lease_rate_limit_tokens(
+                    self.name,
+                    self.per_minute or 0.0,
+                    self.burst,
+                    self._reserve(lane),
+                    settings.rate_limit_lease_tokens,
+                )
+            except Exception:
+                self._counters["remote_errors"] += 1
+            else:
+                self._counters["remote_leases"] += 1
+                if granted <= 0:
+                    return delay
+                now = monotonic()
+                self._leases[lane] = (self._leased(lane, now) + granted - 1, now + granted / self.rate)
+                return 0.0
+        return self.try_acquire(lane)
+
+    async def acquire(self, lane: str) -> None:
+        waited = 0.0
+        while True:
+            delay = await self._take(lane)
+            if delay <= 0:
+                self._counters[f"granted_{lane}"] += 1
+                if waited:
+                    self._counters["waits"] += 1
+                    self._counters["waited_ms"] += round(waited * 1000)
+                return
+            if waited + delay > settings.rate_limit_max_wait_seconds:
+                self._counters["rejected"] += 1
+                raise RateLimited(f"{self.name} rate limit: next token in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def observe(self, response: httpx.Response) -> None:
+        """Fold the upstream's own quota headers into the bucket."""
+        if response.status_code == 429:
+            self._counters["throttled"] += 1
+        remaining, pause = quota_hints(response)
+        if remaining is None and pause is None:
+            return
+
+        now = monotonic()
+        self._refill(now)
+        if remaining is not None:
+            self._tokens = min(self._tokens, remaining)
+            self._leases = {
+                lane: (min(leased, int(remaining)), expires) for lane, (leased, expires) in self._leases.items()
+            }
+        if pause:
+            self._blocked_until = max(self._blocked_until, now + pause)
+            self._leases.clear()
+
+        # Only hints that tighten the shared bucket are worth a round trip.
+        tightens = bool(pause) or (remaining is not None and remaining < self.burst)
+        if tightens and self.remote is not None and self.remote.enabled:
+            try:
+                await self.remote.observe_rate_limit(self.name, remaining, pause)
+            except Exception:
+                self._counters["remote_errors"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "perMinute": self.per_minute,
+            "grantedInteractive": self._counters[f"granted_{INTERACTIVE}"],
+            "grantedBatch": self._counters[f"granted_{BATCH}"],
+            "waits": self._counters["waits"],
+            "waitedMs": self._counters["waited_ms"],
+            "throttled": self._counters["throttled"],
+            "rejected": self._counters["rejected"],
+            "remoteLeases": self._counters["remote_leases"],
+            "remoteErrors": self._counters["remote_errors"],
+        }
+
+
+class RateLimits:
+    """Per-upstream `TokenBucket`s, created on first use from the current settings."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def _remote() -> SupabaseRest:
+        # Imported here: jobs.store builds on http_clients, which wraps clients in this module.
+        from .jobs.store import supabase_rest
+
+        return supabase_rest
+
+    def get(self, name: str) -> TokenBucket:
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = TokenBucket(
+                name,
+                per_minute=settings.rate_limit_per_minute.get(name),
+                burst=settings.rate_limit_burst,
+                remote=self._remote(),
+            )
+            self._buckets[name] = bucket
+        return bucket
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {name: bucket.stats() for name, bucket in sorted(self._buckets.items())}
+
+
+rate_limits = RateLimits()
+
+
+class RateLimitTransport(httpx.AsyncBaseTransport):
+    """Take a token from the upstream's bucket before each request is sent."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, name: str, limits: RateLimits | None = None) -> None:
+        self.transport = transport
+        self.name = name
+        self.limits = limits or rate_limits
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        bucket = self.limits.get(self.name)
+        await bucket.acquire(traffic_lane.get())
+        response = await self.transport.handle_async_request(request)
+        await bucket.observe(response)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
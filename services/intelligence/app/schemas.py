@@ -29,6 +29,8 @@ class TrustScoreResponse(BaseModel):
     staleData: bool
     components: TrustComponents
     explanations: list[str]
+    providersCompleted: list[str] = Field(default_factory=list)
+    providersTimedOut: list[str] = Field(default_factory=list)
     disclaimers: list[str] = Field(default_factory=lambda: MANDATORY_DISCLAIMERS.copy())
 
 
@@ -43,6 +45,26 @@ class SocialSnapshot(BaseModel):
     staleData: bool = False
 
 
+class SymbolBatchRequest(BaseModel):
+    symbols: list[str] = Field(min_length=1)
+    deadlineMs: int | None = Field(default=None, ge=100, le=30_000)
+
+
+class BatchError(BaseModel):
+    symbol: str
+    error: str
+
+
+class TrustScoreBatchResponse(BaseModel):
+    results: list[TrustScoreResponse]
+    errors: list[BatchError] = Field(default_factory=list)
+
+
+class SocialBatchResponse(BaseModel):
+    results: list[SocialSnapshot]
+    errors: list[BatchError] = Field(default_factory=list)
+
+
 class QuizAnswer(BaseModel):
     section: str
     value: float = Field(ge=0, le=100)
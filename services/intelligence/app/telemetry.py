@@ -7,9 +7,8 @@ from typing import Any
 from urllib.parse import urlparse
 from uuid import uuid4
 
-import httpx
-
 from .config import settings
+from .http_clients import http_clients
 
 
 def _parse_sentry_dsn() -> tuple[str, str, str] | None:
@@ -44,8 +43,7 @@ async def _posthog_capture(event: str, properties: dict[str, Any]) -> None:
         },
     }
 
-    async with httpx.AsyncClient(timeout=3.0) as client:
-        await client.post(f"{host}/capture/", json=payload)
+    await http_clients.get("posthog").post(f"{host}/capture/", json=payload)
 
 
 async def _sentry_capture(error: Exception, context: dict[str, Any]) -> None:
@@ -84,8 +82,11 @@ async def _sentry_capture(error: Exception, context: dict[str, Any]) -> None:
         "x-sentry-auth": f"Sentry sentry_version=7, sentry_key={public_key}",
     }
 
-    async with httpx.AsyncClient(timeout=3.0) as client:
-        await client.post(f"{host}/api/{project_id}/envelope/", content=envelope, headers=headers)
+    await http_clients.get("sentry").post(
+        f"{host}/api/{project_id}/envelope/",
+        content=envelope,
+        headers=headers,
+    )
 
 
 async def _guard(coro: Any) -> None:
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from app.circuit import circuit_breakers
+from app.compute import compute_pool
+from app.concurrency import adaptive_limits
+from app.config import settings
+from app.engines.common import fallback_table
+from app.engines.indicators import indicator_engine
+from app.engines.language import compliance_filter
+from app.http_cache import http_cache
+from app.jobs.news_dedup import news_dedup_index
+from app.providers.cache import feature_cache
+from app.providers.history import price_history
+from app.rate_limit import rate_limits
+
+
+@pytest.fixture(autouse=True)
+def isolated_local_data(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(settings, "local_data_dir", str(tmp_path))
+    monkeypatch.setattr(feature_cache, "directory", tmp_path / "feature-cache")
+    monkeypatch.setattr(price_history, "directory", tmp_path / "price-history")
+    monkeypatch.setattr(http_cache, "directory", tmp_path / "http-cache")
+    monkeypatch.setattr(news_dedup_index, "directory", tmp_path / "news-dedup")
+    # Quotas would only slow the mocked upstreams down; test_rate_limit sets its own.
+    monkeypatch.setattr(settings, "rate_limit_per_minute", {})
+    # Stages run inline so monkeypatches apply; test_compute_pool covers the real pool.
+    monkeypatch.setattr(compute_pool, "workers", 0)
+    feature_cache.clear()
+    indicator_engine.clear()
+    adaptive_limits.clear()
+    rate_limits.clear()
+    circuit_breakers.clear()
+    compliance_filter.clear()
+    fallback_table.clear()
+    yield
+    feature_cache.clear()
+    indicator_engine.clear()
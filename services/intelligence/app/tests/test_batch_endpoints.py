@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import settings
+from app.schemas import TrustScoreResponse
+
+HEADERS = {"x-internal-token": settings.api_internal_token}
+
+
+def test_trust_score_batch_returns_partial_results(monkeypatch: pytest.MonkeyPatch) -> None:
+    real_compute = main.compute_trust_score
+
+    async def flaky_compute(symbol: str, **kwargs: object) -> TrustScoreResponse:
+        if symbol == "BROKEN.NS":
+            raise RuntimeError("provider exploded")
+        return await real_compute(symbol, previous_score=60, deadline_seconds=0.5)
+
+    warmed: list[list[str]] = []
+
+    async def warm(symbols: list[str]) -> dict[str, int]:
+        warmed.append(symbols)
+        return {}
+
+    monkeypatch.setattr(main, "compute_trust_score", flaky_compute)
+    monkeypatch.setattr(main, "warm_market_indicators", warm)
+
+    with TestClient(main.app) as client:
+        response = client.post(
+            "/v1/trust-score/batch",
+            json={"symbols": ["tcs.ns", "TCS.NS", "BROKEN.NS", "INFY.NS"]},
+            headers=HEADERS,
+        )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["symbol"] for item in body["results"]] == ["TCS.NS", "INFY.NS"]
+    assert body["errors"] == [{"symbol": "BROKEN.NS", "error": "provider exploded"}]
+    # The whole batch is warmed in one pass before the per-symbol fan-out.
+    assert warmed == [["TCS.NS", "BROKEN.NS", "INFY.NS"]]
+
+
+def test_social_batch_rejects_oversized_batches(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "batch_max_symbols", 2)
+
+    with TestClient(main.app) as client:
+        response = client.post(
+            "/v1/social/batch",
+            json={"symbols": ["TCS.NS", "INFY.NS", "ITC.NS"]},
+            headers=HEADERS,
+        )
+
+    assert response.status_code == 422
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app import circuit
+from app.circuit import CircuitBreaker, CircuitOpen, circuit_breakers
+from app.config import settings
+from app.http_clients import http_client_scope, http_clients
+from app.providers import reddit
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_short_circuits_and_recovers_through_a_probe(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = Clock()
+    monkeypatch.setattr(circuit, "monotonic", clock)
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 3)
+    monkeypatch.setattr(settings, "circuit_open_seconds", 30.0)
+    healthy = {"value": False}
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if not healthy["value"]:
+            raise httpx.ConnectTimeout("upstream down", request=request)
+        return httpx.Response(200, json={})
+
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        client = http_clients.get("newsapi")
+        for _ in range(3):
+            with pytest.raises(httpx.ConnectTimeout):
+                await client.get("https://newsapi.org/v2/everything")
+        with pytest.raises(CircuitOpen):
+            await client.get("https://newsapi.org/v2/everything")
+        assert len(seen) == 3
+
+        clock.now += 31
+        healthy["value"] = True
+        response = await client.get("https://newsapi.org/v2/everything")
+
+    assert response.status_code == 200
+    stats = circuit_breakers.stats()["newsapi"]
+    assert stats["state"] == "closed"
+    assert stats["opened"] == 1
+    assert stats["probes"] == 1
+    assert stats["shortCircuited"] == 1
+
+
+def test_failed_probe_reopens_and_only_one_probe_runs(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = Clock()
+    monkeypatch.setattr(circuit, "monotonic", clock)
+    breaker = CircuitBreaker("reddit", failure_threshold=1, open_seconds=10, multiplier=1.5, floor=1.0, min_samples=1)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += 11
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_timeout_follows_observed_p99() -> None:
+    breaker = CircuitBreaker("yahoo", failure_threshold=5, open_seconds=30, multiplier=1.5, floor=0.5, min_samples=20)
+    for _ in range(10):
+        breaker.record_success(0.2)
+    assert breaker.timeout(8.0) == 8.0
+
+    for _ in range(89):
+        breaker.record_success(0.2)
+    breaker.record_success(2.0)
+    breaker.record_success(2.0)
+    assert breaker.timeout(8.0) == pytest.approx(3.0)
+    assert breaker.timeout(2.5) == 2.5
+
+    request = httpx.Request("GET", "https://query1.finance.yahoo.com", extensions={"timeout": {"read": 8.0}})
+    circuit._with_timeout(request, breaker)
+    assert request.extensions["timeout"]["read"] == pytest.approx(3.0)
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_serves_fallback_without_the_network(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 2)
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(503)
+
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        for symbol in ("TCS.NS", "INFY.NS", "ITC.NS", "HDFCBANK.NS"):
+            posts = await reddit.fetch_social_posts(symbol)
+            assert {post["raw_json"]["ingestion"] for post in posts} == {"fallback-deterministic"}
+
+    assert len(calls) == 2
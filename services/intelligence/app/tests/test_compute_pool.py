@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+import time
+
+import httpx
+import pytest
+
+from app.compute import ComputePool, stage_timings
+from app.http_clients import http_client_scope
+from app.jobs import social_ingest
+from app.providers.reddit import parse_social_payload
+
+
+def _reddit_payload(posts: int) -> bytes:
+    now = time.time()
+    children = [
+        {
+            "data": {
+                "id": f"post-{idx}",
+                "title": f"Thread {idx} on quarterly numbers",
+                "selftext": f"Breakout and upside for segment {idx}, long term accumulate",
+                "author": f"investor{idx}",
+                "score": 40 + idx,
+                "created_utc": now - idx * 3_600,
+                "author_created_utc": now - 900 * 86_400,
+            }
+        }
+        for idx in range(posts)
+    ]
+    return json.dumps({"data": {"children": children}}).encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_process_pool_matches_inline_parse() -> None:
+    raw = _reddit_payload(100)
+    pool = ComputePool(workers=1)
+    try:
+        with stage_timings() as timings:
+            pooled = await pool.run(parse_social_payload, "TCS.NS", raw)
+    finally:
+        pool.shutdown()
+
+    inline_features, inline_posts = parse_social_payload("TCS.NS", raw)
+    pooled_features, pooled_posts = pooled
+    assert pooled_features == inline_features
+    assert [post["post_hash"] for post in pooled_posts] == [post["post_hash"] for post in inline_posts]
+    assert timings.compute_batches == 1
+    assert timings.cpu_seconds > 0
+
+
+@pytest.mark.asyncio
+async def test_social_ingest_reports_cpu_and_io_time() -> None:
+    raw = _reddit_payload(30)
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=raw, headers={"content-type": "application/json"})
+
+    universe = [{"symbol": symbol, "name": symbol} for symbol in ("TCS.NS", "INFY.NS")]
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        summary = await social_ingest.run(universe=universe)
+
+    assert summary["postsUpserted"] == 60
+    assert summary["computeBatches"] == 2
+    assert summary["cpuSeconds"] >= 0
+    assert summary["ioSeconds"] >= 0
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.engines.common import FALLBACK_SALTS, fallback_table, stable_score, stable_unit
+from app.jobs.universe import NIFTY_UNIVERSE, load_fallback_table
+from app.providers import newsapi, reddit, yahoo
+
+SYMBOLS = [f"SYM{idx}.NS" for idx in range(500)] + [stock["symbol"] for stock in NIFTY_UNIVERSE]
+RANGES = [(25, 3800), (1_000_000, 18_000_000), (0.55, 0.9), (-0.03, 0.03), (0, 1), (-1, 1), (-5, 25)]
+
+
+def _legacy_unit(symbol: str, salt: str) -> float:
+    digest = hashlib.sha256(f"{symbol}:{salt}".encode("utf-8")).hexdigest()
+    return (int(digest[:8], 16) % 10000) / 10000.0
+
+
+def _legacy_score(symbol: str, floor: float, ceiling: float, salt: str) -> float:
+    return round(floor + (ceiling - floor) * _legacy_unit(symbol, salt), 2)
+
+
+def _features(symbol: str) -> list[object]:
+    fields = ("karma", "account_age_days", "sentiment")
+    posts = [{key: post[key] for key in fields} for post in reddit._fallback_posts(symbol)]
+    return [
+        reddit.fallback_social_features(symbol),
+        newsapi.fallback_news_features(symbol),
+        yahoo.fallback_market_features(symbol),
+        posts,
+    ]
+
+
+def test_table_returns_exactly_the_hashed_scores() -> None:
+    fallback_table.build(SYMBOLS)
+
+    for symbol in SYMBOLS:
+        for salt in FALLBACK_SALTS:
+            assert stable_unit(symbol, salt) == _legacy_unit(symbol, salt)
+            for floor, ceiling in RANGES:
+                assert fallback_table.score(symbol, floor, ceiling, salt) == _legacy_score(symbol, floor, ceiling, salt)
+
+
+def test_fallback_features_are_unchanged_by_the_table() -> None:
+    symbols = SYMBOLS[:50]
+    hashed = [_features(symbol) for symbol in symbols]
+
+    fallback_table.build(symbols)
+
+    assert [_features(symbol) for symbol in symbols] == hashed
+    assert fallback_table.stats()["columns"] > 20
+
+
+def test_unknown_symbols_and_salts_fall_back_to_hashing() -> None:
+    fallback_table.build(["TCS.NS"])
+
+    assert fallback_table.score("INFY.NS", 0, 1, "news") is None
+    assert fallback_table.score("TCS.NS", 0, 1, "author-age") is None
+    assert stable_score("INFY.NS", 40, 85, "news") == _legacy_score("INFY.NS", 40, 85, "news")
+    assert stable_score("TCS.NS", 30, 1_500, "author-age") == _legacy_score("TCS.NS", 30, 1_500, "author-age")
+
+
+@pytest.mark.asyncio
+async def test_universe_load_replaces_the_table() -> None:
+    fallback_table.build(["OLD.NS"])
+
+    await load_fallback_table(NIFTY_UNIVERSE)
+
+    assert fallback_table.stats() == {"symbols": len(NIFTY_UNIVERSE), "salts": len(FALLBACK_SALTS), "columns": 0}
+    assert fallback_table.score("OLD.NS", 0, 1, "news") is None
+
+
+def test_api_startup_loads_the_table_for_the_known_universe() -> None:
+    async def loaded() -> None:
+        await main.background_tasks["fallback-table"]
+
+    with TestClient(main.app) as client:
+        client.portal.call(loaded)
+        metrics = client.get("/v1/metrics", headers={"x-internal-token": main.settings.api_internal_token})
+
+    assert metrics.json()["fallbackTable"]["symbols"] == len(NIFTY_UNIVERSE)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.providers import cache as cache_module
+from app.providers.cache import FeatureCache
+
+
+def _features(score: float, stale: bool = False) -> dict[str, float | bool]:
+    return {"news_score": score, "stale": stale}
+
+
+@pytest.mark.asyncio
+async def test_hit_after_real_fetch_and_disk_tier_survives_restart(tmp_path: Path) -> None:
+    calls: list[str] = []
+
+    async def fetch(symbol: str) -> dict[str, float | bool]:
+        calls.append(symbol)
+        return _features(71.0)
+
+    cache = FeatureCache(max_entries=8, directory=tmp_path)
+    assert await cache.get_or_fetch("news", "TCS.NS", fetch) == _features(71.0)
+    assert await cache.get_or_fetch("news", "TCS.NS", fetch) == _features(71.0)
+    assert calls == ["TCS.NS"]
+
+    restarted = FeatureCache(max_entries=8, directory=tmp_path)
+    assert await restarted.get_or_fetch("news", "TCS.NS", fetch) == _features(71.0)
+    assert calls == ["TCS.NS"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_provider_failure_returns_last_known_good_marked_stale(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setitem(cache_module.settings.feature_cache_ttl_seconds, "news", 0)
+    monkeypatch.setattr(cache_module.settings, "feature_cache_stale_grace_seconds", 0)
+    responses = [_features(64.0), _features(50.0, stale=True)]
+
+    async def fetch(_symbol: str) -> dict[str, float | bool]:
+        return responses.pop(0)
+
+    cache = FeatureCache(max_entries=8, directory=tmp_path)
+    await cache.get_or_fetch("news", "INFY.NS", fetch)
+    await asyncio.sleep(0.01)
+    result = await cache.get_or_fetch("news", "INFY.NS", fetch)
+
+    assert result == _features(64.0, stale=True)
+    assert cache.stats()["lastKnownGood"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_served_while_refreshing(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(cache_module.settings.feature_cache_ttl_seconds, "news", 0)
+    responses = [_features(60.0), _features(66.0)]
+
+    async def fetch(_symbol: str) -> dict[str, float | bool]:
+        return responses.pop(0)
+
+    cache = FeatureCache(max_entries=8, directory=None)
+    await cache.get_or_fetch("news", "ITC.NS", fetch)
+    await asyncio.sleep(0.01)
+
+    assert await cache.get_or_fetch("news", "ITC.NS", fetch) == _features(60.0)
+    await asyncio.sleep(0.01)
+    assert cache.last_known_good("news", "ITC.NS") == _features(66.0, stale=True)
+    assert cache.stats()["stale"] == 1
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+
+import httpx
+import pytest
+
+from app.http_cache import http_cache, response_digest
+from app.http_clients import http_client_scope, http_clients
+from app.jobs import universe
+
+NSE_CSV = "SYMBOL,NAME OF COMPANY, SERIES\nTCS,Tata Consultancy Services,EQ\nINFY,Infosys,EQ\n"
+
+
+class ConditionalOrigin:
+    def __init__(self, body: str) -> None:
+        self.body = body
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        etag = f'"{len(self.body)}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, headers={"ETag": etag}, text=self.body)
+
+
+@pytest.mark.asyncio
+async def test_not_modified_is_served_from_disk() -> None:
+    origin = ConditionalOrigin('{"ok": true}')
+    async with http_client_scope(transport=httpx.MockTransport(origin)):
+        first = await http_clients.get("reddit").get("https://www.reddit.com/r/stocks.json")
+        second = await http_clients.get("reddit").get("https://www.reddit.com/r/stocks.json")
+
+    assert "if-none-match" not in origin.requests[0].headers
+    assert origin.requests[1].headers["if-none-match"] == '"12"'
+    assert second.status_code == 200
+    assert second.json() == first.json() == {"ok": True}
+    assert second.extensions["http_cache"]["status"] == "revalidated"
+
+
+@pytest.mark.asyncio
+async def test_responses_without_validators_are_not_stored() -> None:
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={"ok": True})
+
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        await http_clients.get("yahoo").get("https://query1.finance.yahoo.com/v7/finance/quote")
+        await http_clients.get("yahoo").get("https://query1.finance.yahoo.com/v7/finance/quote")
+
+    assert all("if-none-match" not in request.headers for request in seen)
+    assert not (http_cache.directory / "responses").exists()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_universe_skips_parsing(monkeypatch: pytest.MonkeyPatch) -> None:
+    origin = ConditionalOrigin(NSE_CSV)
+    parses: list[str] = []
+    original_parse = universe.EXCHANGE_SOURCES["NSE"].parse
+
+    async def counting_parse(response: httpx.Response) -> list[dict[str, str]]:
+        parses.append("NSE")
+        return await original_parse(response)
+
+    monkeypatch.setitem(
+        universe.EXCHANGE_SOURCES,
+        "NSE",
+        universe.ExchangeSource(url=lambda: universe.settings.nse_universe_url, parse=counting_parse),
+    )
+
+    async with http_client_scope(transport=httpx.MockTransport(origin)):
+        first, _ = await universe._fetch_exchange_universe("NSE", http_clients.get("nse"))
+        second, details = await universe._fetch_exchange_universe("NSE", http_clients.get("nse"))
+
+    assert parses == ["NSE"]
+    assert second == first
+    assert [row["symbol"] for row in second] == ["TCS.NS", "INFY.NS"]
+    assert details == {"httpCache": "revalidated", "parseReused": True}
+
+
+@pytest.mark.asyncio
+async def test_bodies_stream_to_disk_and_partial_reads_are_not_stored() -> None:
+    body = "line\n" * 50_000
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"ETag": '"v1"'}, stream=httpx.ByteStream(body.encode()))
+
+    responses = http_cache.directory / "responses"
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        client = http_clients.get("nse")
+        async with client.stream("GET", "https://archives.nseindia.com/EQUITY_L.csv") as response:
+            async for _ in response.aiter_lines():
+                break
+        assert response_digest(response) is None
+        assert not list(responses.glob("*"))
+
+        async with client.stream("GET", "https://archives.nseindia.com/EQUITY_L.csv") as response:
+            lines = [line async for line in response.aiter_lines()]
+
+    assert len(lines) == 50_000
+    assert response_digest(response) == hashlib.sha256(body.encode()).hexdigest()
+    assert sorted(path.suffix for path in responses.glob("*")) == [".body", ".json"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_of_one_url_store_one_complete_body() -> None:
+    bodies = iter(["a" * 70_000, "b" * 70_000])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"ETag": '"v1"'}, text=next(bodies))
+
+    responses = http_cache.directory / "responses"
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        client = http_clients.get("nse")
+        first, second = await asyncio.gather(
+            client.get("https://archives.nseindia.com/EQUITY_L.csv"),
+            client.get("https://archives.nseindia.com/EQUITY_L.csv"),
+        )
+
+    cached = http_cache.load("https://archives.nseindia.com/EQUITY_L.csv")
+    assert cached is not None
+    assert cached.body_path.read_text() in {first.text, second.text}
+    assert hashlib.sha256(cached.body_path.read_bytes()).hexdigest() == cached.sha256
+    assert sorted(path.suffix for path in responses.glob("*")) == [".body", ".json"]
+
+
+@pytest.mark.asyncio
+async def test_windowed_chart_requests_are_not_cached() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json={"chart": {"result": []}})
+
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        await http_clients.get("yahoo").get(
+            "https://query1.finance.yahoo.com/v8/finance/chart/TCS.NS",
+            params={"interval": "1d", "period1": "1", "period2": "2"},
+        )
+
+    assert not (http_cache.directory / "responses").exists()
+
+
+@pytest.mark.asyncio
+async def test_prune_drops_expired_then_least_recently_used_entries() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"ETag": '"v1"'}, text="x" * 1000)
+
+    urls = [f"https://archives.nseindia.com/{name}.csv" for name in ("old", "used", "fresh")]
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        for url in urls:
+            await http_clients.get("nse").get(url)
+
+    now = time.time()
+    for url, age in zip(urls, (30 * 86_400, 3600, 60)):
+        for path in (http_cache.directory / "responses").glob(f"{hashlib.sha1(url.encode()).hexdigest()}.*"):
+            os.utime(path, (now - age, now - age))
+
+    assert http_cache.prune(max_bytes=10**9, max_age_seconds=86_400) == 1
+    assert http_cache.load(urls[0]) is None
+    assert http_cache.prune(max_bytes=1500, max_age_seconds=86_400) == 1
+    assert http_cache.load(urls[1]) is None
+    assert http_cache.load(urls[2]) is not None
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.concurrency import AdaptiveLimit, adaptive_limits
+from app.config import settings
+from app.http_clients import http_client_scope, http_clients
+from app.providers import yahoo
+
+
+def _chart_payload(points: int) -> dict[str, object]:
+    start = int(time.time()) - (points + 3) * 86_400
+    return {
+        "chart": {
+            "result": [
+                {
+                    "timestamp": [start + idx * 86_400 for idx in range(points)],
+                    "indicators": {"quote": [{"close": [100.0 + idx for idx in range(points)]}]},
+                }
+            ]
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_providers_use_injected_transport() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host)
+        return httpx.Response(200, json=_chart_payload(120))
+
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        features = await yahoo.fetch_market_features("TCS.NS")
+
+    assert set(seen) == {"query1.finance.yahoo.com"}
+    assert features["stale"] is False
+    assert features["latest_close"] == 219.0
+
+
+@pytest.mark.asyncio
+async def test_clients_are_pooled_per_upstream() -> None:
+    async with http_client_scope(transport=httpx.MockTransport(lambda _request: httpx.Response(204))):
+        first = http_clients.get("reddit")
+        assert http_clients.get("reddit") is first
+        assert http_clients.get("yahoo") is not first
+
+    assert first.is_closed
+
+
+def test_adaptive_limit_grows_additively_and_backs_off_once_per_burst() -> None:
+    limit = AdaptiveLimit(floor=2, ceiling=6, initial=4, backoff=0.5, latency_tolerance=2.0)
+    for _ in range(40):
+        limit.record(time.perf_counter(), 0.05, overloaded=False)
+    assert limit.limit == 6
+
+    burst_started = time.perf_counter()
+    for _ in range(5):
+        limit.record(burst_started, 0.05, overloaded=True)
+    assert limit.limit == 3
+    assert limit.decreases == 1
+
+    limit.record(time.perf_counter(), 0.05, overloaded=True)
+    assert limit.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limit_caps_in_flight_requests_per_host(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "adaptive_concurrency_ceiling", 4)
+    active = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(429 if request.url.params.get("busy") else 200, json={})
+
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        client = http_clients.get("reddit")
+        await asyncio.gather(*(client.get("https://www.reddit.com/r/x.json") for _ in range(12)))
+        assert peak <= 4
+        await client.get("https://www.reddit.com/r/x.json?busy=1")
+
+    stats = adaptive_limits.stats()["www.reddit.com"]
+    assert stats["inFlight"] == 0
+    assert stats["decreases"] == 1
+    assert stats["limit"] < 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_do_not_break_the_queue() -> None:
+    limit = AdaptiveLimit(floor=1, ceiling=1, initial=1, backoff=0.5, latency_tolerance=2.0)
+    await limit.acquire()
+    waiters = [asyncio.ensure_future(limit.acquire()) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    # The release hands the slot on before the cancelled task has run its cleanup.
+    waiters[0].cancel()
+    limit.release()
+    waiters[2].cancel()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1] is None
+    assert isinstance(results[2], asyncio.CancelledError)
+    assert limit.in_flight == 1
+    assert limit.stats()["queued"] == 0
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import math
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from app.config import settings
+from app.engines.indicators import IndicatorEngine, compute_indicators, realized_volatilities
+from app.providers.history import BAR_DTYPE, PriceHistoryStore
+
+
+def _reference_volatility(closes: list[float]) -> float:
+    returns = [
+        (closes[idx] - closes[idx - 1]) / closes[idx - 1]
+        for idx in range(1, len(closes))
+        if closes[idx - 1] > 0
+    ]
+    if len(returns) < 2:
+        return 0.0
+    mean = sum(returns) / len(returns)
+    return math.sqrt(sum((item - mean) ** 2 for item in returns) / (len(returns) - 1))
+
+
+def test_ragged_rows_match_per_symbol_reference() -> None:
+    rng = np.random.default_rng(7)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.02, size=(4, 300)), axis=1)
+    closes[1, :120] = np.nan
+    closes[2, rng.choice(300, size=40, replace=False)] = np.nan
+    closes[3, 250:] = np.nan
+    days = np.arange(20_000, 20_300)
+
+    result = compute_indicators(days, closes, benchmark=closes[0], now_day=20_300)
+
+    for row in range(4):
+        clean = [float(value) for value in closes[row] if not np.isnan(value)]
+        assert math.isclose(result["daily_volatility"][row], _reference_volatility(clean), rel_tol=1e-9)
+        assert math.isclose(result["total_return"][row], clean[-1] / clean[0] - 1, rel_tol=1e-9)
+        assert result["latest_close"][row] == clean[-1]
+        assert result["previous_close"][row] == clean[-2]
+        assert result["observations"][row] == len(clean)
+        assert result["max_drawdown"][row] <= 0
+
+    assert math.isclose(result["beta"][0], 1.0, rel_tol=1e-9)
+    assert np.isnan(result["vol_30d"][3])
+
+
+def test_max_drawdown_and_cagr() -> None:
+    closes = np.array([[100.0, 120.0, 60.0, 90.0, 121.0]])
+    days = np.array([0, 1, 2, 3, 730])
+
+    result = compute_indicators(days, closes, benchmark=None, now_day=730)
+
+    assert math.isclose(result["max_drawdown"][0], -0.5)
+    assert math.isclose(result["cagr"][0], 1.21 ** (365.25 / 730) - 1)
+    assert np.isnan(result["beta"][0])
+
+
+def test_engine_refreshes_misses_in_one_pass_and_tracks_the_benchmark(tmp_path, monkeypatch) -> None:
+    store = PriceHistoryStore(tmp_path)
+    start = int(datetime.now(timezone.utc).timestamp()) - 120 * 86_400
+    rng = np.random.default_rng(3)
+    for symbol in ["A.NS", "B.NS", "C.NS", settings.benchmark_symbol]:
+        closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, size=100))
+        bars = [(start + idx * 86_400, close, close, close, close, close, 1) for idx, close in enumerate(closes)]
+        store.append(symbol, np.array(bars, dtype=BAR_DTYPE))
+
+    engine = IndicatorEngine(store)
+    refreshed: list[list[str]] = []
+    original = engine.refresh
+
+    def counting_refresh(symbols: list[str], as_of: date | None = None) -> dict:
+        refreshed.append(symbols)
+        return original(symbols, as_of)
+
+    monkeypatch.setattr(engine, "refresh", counting_refresh)
+
+    first = engine.lookup_many(["A.NS", "B.NS", "C.NS"])
+    engine.lookup("B.NS")
+    assert refreshed == [["A.NS", "B.NS", "C.NS"]]
+
+    # A benchmark sync invalidates every row, since beta depends on it.
+    store.mark_synced(settings.benchmark_symbol, date.today())
+    engine.lookup_many(["A.NS", "C.NS"])
+    assert refreshed[-1] == ["A.NS", "C.NS"]
+    assert engine.lookup("A.NS") == first["A.NS"]
+
+
+def test_realized_volatilities_cover_only_symbols_with_enough_history(tmp_path) -> None:
+    store = PriceHistoryStore(tmp_path)
+    start = int(datetime.now(timezone.utc).timestamp()) - 120 * 86_400
+    rng = np.random.default_rng(5)
+    for symbol, sessions in (("LONG.NS", 100), ("SHORT.NS", 20)):
+        closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, size=sessions))
+        bars = [(start + idx * 86_400, close, close, close, close, close, 1) for idx, close in enumerate(closes)]
+        store.append(symbol, np.array(bars, dtype=BAR_DTYPE))
+
+    volatilities = realized_volatilities(["LONG.NS", "SHORT.NS", "NONE.NS"], store)
+
+    clean = [float(value) for value in store.read("LONG.NS")["close"]]
+    expected = _reference_volatility(clean) * math.sqrt(252) * 100
+    assert volatilities == {"LONG.NS": round(expected, 2)}
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from app.jobs import runner
+
+UNIVERSE = [
+    {"symbol": f"S{idx}.NS", "name": f"Stock {idx}", "sector": "Unclassified", "exchange": "NSE"}
+    for idx in range(40)
+]
+
+
+def test_shards_partition_the_universe_deterministically() -> None:
+    shards = [runner.shard_universe(UNIVERSE, shard, 4) for shard in range(4)]
+
+    assert sorted(row["symbol"] for rows in shards for row in rows) == sorted(row["symbol"] for row in UNIVERSE)
+    assert all(rows for rows in shards)
+    assert runner.shard_of("TCS.NS", 4) == runner.shard_of("tcs.ns", 4)
+
+
+@pytest.mark.asyncio
+async def test_run_shard_holds_lease_and_records_summary(monkeypatch: pytest.MonkeyPatch) -> None:
+    seen: list[tuple[str, list[str]]] = []
+
+    async def fake_run(universe: list[dict[str, str]]) -> dict[str, Any]:
+        shard = runner.current_shard.get()
+        seen.append((shard, [row["symbol"] for row in universe]))
+        # A second worker on the same shard is turned away while the lease is held.
+        overlapping = await runner.run_shard("financial_sync", int(shard.split("-")[0]), 4, UNIVERSE)
+        assert overlapping["status"] == "skipped"
+        return {"status": "ok", "financialsUpserted": len(universe), "failedSymbols": ["S1.NS"]}
+
+    monkeypatch.setattr(runner, "_job_run", lambda _job: fake_run)
+
+    results = [await runner.run_shard("financial_sync", shard, 4, UNIVERSE) for shard in range(4)]
+    merged = runner.merge_summaries("financial_sync", 4, results)
+
+    assert [shard for shard, _symbols in seen] == ["0-of-4", "1-of-4", "2-of-4", "3-of-4"]
+    assert merged["status"] == "ok"
+    assert merged["financialsUpserted"] == len(UNIVERSE)
+    assert merged["failedSymbols"] == ["S1.NS"] * 4
+
+    reported = await runner.report("financial_sync", 4)
+    assert reported["financialsUpserted"] == len(UNIVERSE)
+    assert [shard["status"] for shard in reported["shards"]] == ["ok"] * 4
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_cancels_the_shard_and_is_recorded(monkeypatch: pytest.MonkeyPatch) -> None:
+    renewals: list[str] = []
+    released: list[dict[str, Any]] = []
+
+    async def acquire(job: str, shard: int, shard_count: int, owner: str, ttl: float) -> bool:
+        renewals.append(owner)
+        return len(renewals) == 1
+
+    async def release(job: str, shard: int, shard_count: int, owner: str, summary: dict[str, Any]) -> None:
+        released.append(summary)
+
+    async def slow_run(universe: list[dict[str, str]]) -> dict[str, Any]:
+        await asyncio.sleep(10)
+        return {"status": "ok"}
+
+    monkeypatch.setattr(type(runner.supabase_rest), "enabled", property(lambda _self: True))
+    monkeypatch.setattr(runner.supabase_rest, "acquire_job_lease", acquire)
+    monkeypatch.setattr(runner.supabase_rest, "release_job_lease", release)
+    monkeypatch.setattr(runner.settings, "job_lease_ttl_seconds", 0.03)
+    monkeypatch.setattr(runner, "load_fallback_table", lambda rows: asyncio.sleep(0))
+    monkeypatch.setattr(runner, "_job_run", lambda _job: slow_run)
+
+    result = await asyncio.wait_for(runner.run_shard("financial_sync", 0, 4, UNIVERSE), timeout=2)
+
+    assert len(renewals) == 2
+    assert result["status"] == "lease-lost"
+    assert result["error"] == "renewal refused"
+    assert released == [result]
+    assert runner.merge_summaries("financial_sync", 1, [result])["status"] == "failed"
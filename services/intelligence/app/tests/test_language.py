@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.engines.language import (
+    FORBIDDEN_PHRASES,
+    REPLACEMENT,
+    ComplianceFilter,
+    compliance_filter,
+    sanitize_text,
+)
+from app.jobs import news_ingest
+
+
+def _legacy_sanitize(text: str) -> str:
+    output = text
+    for phrase in FORBIDDEN_PHRASES:
+        output = output.replace(phrase, REPLACEMENT)
+        output = output.replace(phrase.title(), REPLACEMENT)
+    return output
+
+
+def _texts(count: int, seed: int) -> list[str]:
+    generator = random.Random(seed)
+    words = ["stock", "sure", "shot", "you", "buy", "profit", "now", "will", "go", "up", "the"]
+    texts = []
+    for _ in range(count):
+        parts = [
+            generator.choice(FORBIDDEN_PHRASES) if generator.random() < 0.2 else generator.choice(words)
+            for _ in range(generator.randint(0, 15))
+        ]
+        texts.append(" ".join(parts))
+    return texts
+
+
+def test_replaces_every_casing_in_one_pass_and_counts_per_phrase() -> None:
+    cleaned = sanitize_text("SURE SHOT! Guaranteed Profit, you Should buy. sure shot")
+
+    assert cleaned == f"{REPLACEMENT}! {REPLACEMENT}, {REPLACEMENT}. {REPLACEMENT}"
+    assert compliance_filter.stats() == {
+        "texts": 1,
+        "matches": {"guaranteed profit": 1, "sure shot": 2, "you should buy": 1},
+    }
+
+
+def test_covers_the_legacy_casings() -> None:
+    for text in _texts(500, seed=3):
+        for variant in (text, text.title()):
+            assert sanitize_text(variant) == _legacy_sanitize(variant)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stream_matches_whole_text_across_any_chunking(seed: int) -> None:
+    generator = random.Random(seed)
+    text = " ".join(_texts(40, seed=seed)).upper()
+    expected = ComplianceFilter(FORBIDDEN_PHRASES).sanitize(text)
+
+    engine = ComplianceFilter(FORBIDDEN_PHRASES)
+    stream = engine.stream()
+    output = []
+    position = 0
+    while position < len(text):
+        size = generator.randint(1, 9)
+        output.append(stream.feed(text[position : position + size]))
+        position += size
+    output.append(stream.close())
+
+    assert "".join(output) == expected
+    assert sum(stream.counts.values()) == expected.count(REPLACEMENT)
+    assert engine.counts == stream.counts
+
+
+def test_stream_holds_back_less_than_the_longest_phrase() -> None:
+    stream = ComplianceFilter(["sure shot"]).stream()
+
+    assert stream.feed("a sure") == ""
+    assert stream.feed(" sh") == "a"
+    assert stream.feed("ot today") == f" {REPLACEMENT}"
+    assert stream.close() == " today"
+
+
+@pytest.mark.asyncio
+async def test_news_titles_are_sanitized_before_storage(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def articles(symbol: str, source_weights: dict[str, float]) -> list[dict[str, str | float]]:
+        return [
+            {
+                "source": "example.com",
+                "title": "Analyst says YOU SHOULD BUY this sure shot",
+                "url": "https://example.com/a",
+                "published_at": "2026-10-16T00:00:00+00:00",
+                "sentiment": 0.0,
+                "confidence": 50.0,
+                "credibility_weight": 0.5,
+                "content_hash": "a",
+            }
+        ]
+
+    monkeypatch.setattr(news_ingest, "fetch_news_articles", articles)
+    index = news_ingest.NearDuplicateIndex()
+
+    rows = await news_ingest._build_rows_for_stock({"symbol": "TCS.NS", "name": "TCS"}, {}, set(), index)
+
+    assert rows[0]["title"] == f"Analyst says {REPLACEMENT} this {REPLACEMENT}"
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import random
+import time
+
+import pytest
+
+from app.engines.common import clamp
+from app.engines.lexicon import Lexicon
+from app.providers import newsapi, reddit
+
+CATEGORIES = {
+    "bullish": reddit.BULLISH_TERMS,
+    "bearish": reddit.BEARISH_TERMS,
+    "meme": reddit.MEME_TERMS,
+    "positive": newsapi.POSITIVE_TERMS,
+    "negative": newsapi.NEGATIVE_TERMS,
+}
+FILLER = "abdeghilnorstuy "
+
+
+def _per_term(terms: set[str], text: str) -> int:
+    low = text.lower()
+    return sum(1 for term in terms if term in low)
+
+
+def _texts(count: int, seed: int) -> list[str]:
+    """Term fragments glued to random filler, so terms overlap and straddle each other."""
+    generator = random.Random(seed)
+    fragments = sorted(set().union(*CATEGORIES.values()))
+    texts = []
+    for _ in range(count):
+        parts = []
+        for _ in range(generator.randint(0, 12)):
+            if generator.random() < 0.4:
+                fragment = generator.choice(fragments)
+                parts.append(fragment.upper() if generator.random() < 0.1 else fragment)
+            else:
+                parts.append("".join(generator.choice(FILLER) for _ in range(generator.randint(1, 8))))
+        texts.append("".join(parts))
+    return texts
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_scan_counts_match_the_per_term_scan(compiled: bool) -> None:
+    lexicon = Lexicon(CATEGORIES, compiled=compiled)
+    texts = _texts(2_000, seed=11)
+
+    for text, hits in zip(texts, lexicon.scan_batch(texts)):
+        for category, terms in CATEGORIES.items():
+            assert hits[category] == _per_term(terms, text), (category, text)
+
+
+def test_overlapping_and_nested_terms_are_all_counted() -> None:
+    lexicon = Lexicon({"a": {"bull", "long", "bullish"}, "b": {"ish", "short", "sh"}}, compiled=True)
+
+    assert lexicon.scan("BULLONG bullishort") == {"a": 3, "b": 3}
+
+
+def test_social_sentiment_and_meme_hits_are_unchanged() -> None:
+    texts = [f"post {idx} {text}" for idx, text in enumerate(_texts(60, seed=5))]
+    now = time.time()
+    children = [
+        {
+            "data": {
+                "id": str(idx),
+                "title": text,
+                "author": f"user{idx}",
+                "score": 50,
+                "created_utc": now - idx * 600,
+                "author_created_utc": now - 400 * 86_400,
+            }
+        }
+        for idx, text in enumerate(texts)
+    ]
+
+    _, posts = reddit.parse_social_payload("TCS.NS", json.dumps({"data": {"children": children}}).encode())
+
+    assert len(posts) > 40
+    for post in posts:
+        merged = texts[int(post["source_post_id"])].lower()
+        expected = clamp((_per_term(reddit.BULLISH_TERMS, merged) - _per_term(reddit.BEARISH_TERMS, merged)) / 2, -1, 1)
+        assert post["sentiment"] == round(float(expected), 2)
+    meme_posts = sum(1 for text in texts if any(term in text.lower() for term in reddit.MEME_TERMS))
+    assert meme_posts == sum(1 for hits in reddit.SOCIAL_LEXICON.scan_batch(texts) if hits["meme"])
+
+
+def test_news_sentiment_is_unchanged() -> None:
+    texts = _texts(200, seed=3)
+    articles = [
+        {"title": f"Update {idx} {text}", "description": text[::-1], "url": f"https://example.com/{idx}"}
+        for idx, text in enumerate(texts)
+    ]
+
+    rows = newsapi.parse_news_articles(json.dumps({"articles": articles}).encode(), {})
+
+    assert len(rows) == len(articles)
+    for article, row in zip(articles, rows):
+        text = f"{article['title'].strip()} {article['description'].strip()}"
+        positive = _per_term(newsapi.POSITIVE_TERMS, text)
+        negative = _per_term(newsapi.NEGATIVE_TERMS, text)
+        assert row["sentiment"] == round(float(clamp((positive - negative) / 3, -1, 1)), 2)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+
+from app.jobs import market_sync
+from app.jobs.universe import UniverseLoad
+
+
+@pytest.mark.asyncio
+async def test_pipeline_bisects_failed_batches_and_reports_fallbacks(monkeypatch: pytest.MonkeyPatch) -> None:
+    universe = [
+        {"symbol": f"S{idx}.NS", "name": f"Stock {idx}", "sector": "Unclassified", "exchange": "NSE"}
+        for idx in range(10)
+    ]
+    universe[6]["symbol"] = "BAD.NS"
+    upserts: list[tuple[str, int]] = []
+
+    async def load_universe() -> UniverseLoad:
+        return UniverseLoad(rows=universe)
+
+    async def quotes(symbols: list[str]) -> dict[str, dict[str, float | bool]]:
+        if "BAD.NS" in symbols:
+            raise ValueError("Malformed quote payload")
+        return {symbol: {"latest_close": 100.0, "previous_close": 99.0, "stale": False} for symbol in symbols}
+
+    async def upsert(table: str, rows: list[dict], on_conflict: str | None = None) -> None:
+        upserts.append((table, len(rows)))
+
+    monkeypatch.setattr(market_sync, "load_market_universe_report", load_universe)
+    monkeypatch.setattr(market_sync, "request_latest_quotes", quotes)
+    monkeypatch.setattr(market_sync.supabase_rest, "upsert", upsert)
+    monkeypatch.setattr(market_sync.settings, "market_sync_quote_batch_size", 4)
+    monkeypatch.setattr(market_sync.settings, "market_sync_upsert_window", 4)
+
+    result = await market_sync.run()
+
+    assert result["quotesResolved"] == 9
+    assert result["fallbackSymbols"] == 1
+    assert result["failedQuoteSymbols"] == 1
+    assert result["stocksUpserted"] == result["pricesUpserted"] == 10
+    assert sum(count for table, count in upserts if table == "stocks") == 10
+    assert upserts[0][0] == "stocks"
+
+
+@pytest.mark.asyncio
+async def test_overloaded_upstream_is_retried_not_bisected(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[int] = []
+
+    async def quotes(symbols: list[str]) -> dict[str, dict[str, float | bool]]:
+        calls.append(len(symbols))
+        request = httpx.Request("GET", "https://query1.finance.yahoo.com/v7/finance/quote")
+        raise httpx.HTTPStatusError("throttled", request=request, response=httpx.Response(429, request=request))
+
+    monkeypatch.setattr(market_sync, "request_latest_quotes", quotes)
+    monkeypatch.setattr(market_sync.settings, "market_sync_quote_retries", 2)
+    monkeypatch.setattr(market_sync.settings, "market_sync_quote_backoff_seconds", 0.0)
+    stats: Counter[str] = Counter()
+
+    result = await market_sync._fetch_quotes_bisecting([f"S{idx}" for idx in range(8)], asyncio.Semaphore(2), stats)
+
+    assert result == {}
+    assert calls == [8, 8, 8]
+    assert stats["bisections"] == 0
+    assert stats["failedQuoteSymbols"] == 8
+
+
+@pytest.mark.asyncio
+async def test_auth_failure_fails_whole_batch_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[int] = []
+
+    async def quotes(symbols: list[str]) -> dict[str, dict[str, float | bool]]:
+        calls.append(len(symbols))
+        request = httpx.Request("GET", "https://query1.finance.yahoo.com/v7/finance/quote")
+        raise httpx.HTTPStatusError("no crumb", request=request, response=httpx.Response(401, request=request))
+
+    monkeypatch.setattr(market_sync, "request_latest_quotes", quotes)
+    stats: Counter[str] = Counter()
+
+    result = await market_sync._fetch_quotes_bisecting([f"S{idx}" for idx in range(150)], asyncio.Semaphore(2), stats)
+
+    assert result == {}
+    assert calls == [150]
+    assert stats["bisections"] == 0
+    assert stats["quoteRetries"] == 0
+    assert stats["failedQuoteSymbols"] == 150
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.config import local_data_path
+from app.engines.near_duplicates import NearDuplicateIndex, persistent_index
+from app.jobs import social_ingest
+from app.providers.newsapi import _summarize_articles
+
+HEADLINE = "Reliance Industries posts record quarterly profit as retail arm expands"
+SYNDICATED = "Reliance Industries posts record quarterly profit as retail unit expands"
+UNRELATED = "Infosys wins large deal from European bank"
+
+
+def test_index_matches_near_duplicates_within_scope() -> None:
+    index = NearDuplicateIndex(threshold=0.75)
+    index.add("a", HEADLINE, scope="RELIANCE.NS")
+
+    assert index.query(SYNDICATED, scope="RELIANCE.NS") == "a"
+    assert index.query(UNRELATED, scope="RELIANCE.NS") is None
+    assert index.query(SYNDICATED, scope="TCS.NS") is None
+    assert index.check_and_add("a", HEADLINE, scope="RELIANCE.NS") is None
+
+
+def test_index_expires_and_persists_window(tmp_path) -> None:
+    index = NearDuplicateIndex(threshold=0.75, window_seconds=60, path=tmp_path / "news.npz")
+    index.add("old", UNRELATED, added_at=1_000.0)
+    index.add("new", HEADLINE)
+    index.save()
+
+    reloaded = NearDuplicateIndex(threshold=0.75, window_seconds=60, path=tmp_path / "news.npz")
+    assert reloaded.load() is True
+    assert len(reloaded) == 1
+    assert reloaded.query(SYNDICATED) == "new"
+
+
+def test_persistent_index_lives_under_local_data_dir() -> None:
+    index = persistent_index("news")
+    assert index.path == local_data_path("near-duplicates", "news.npz")
+    assert len(index) == 0
+
+
+def test_syndicated_headlines_count_as_duplicates() -> None:
+    now = datetime.now(timezone.utc).isoformat()
+
+    def article(title: str, source: str) -> dict[str, str | float]:
+        return {
+            "source": source,
+            "title": title,
+            "published_at": now,
+            "sentiment": 0.5,
+            "confidence": 80.0,
+            "credibility_weight": 0.8,
+            "content_hash": f"{source}:{title}",
+        }
+
+    distinct = _summarize_articles([article(HEADLINE, "livemint.com"), article(UNRELATED, "moneycontrol.com")])
+    syndicated = _summarize_articles([article(HEADLINE, "livemint.com"), article(SYNDICATED, "moneycontrol.com")])
+
+    assert syndicated["news_score"] < distinct["news_score"]
+
+
+@pytest.mark.asyncio
+async def test_social_ingest_seeds_window_from_supabase(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    stored: list[dict] = []
+
+    async def recent(symbols: list[str], lookback_hours: int, inserted_since: str | None) -> list[dict]:
+        return [{"symbol": "RELIANCE.NS", "source_post_id": "t3_prev", "created_at": now, "title": HEADLINE}]
+
+    async def posts(symbol: str) -> list[dict[str, object]]:
+        return [
+            {
+                "source_post_id": "t3_new",
+                "created_at": now,
+                "karma": 10,
+                "account_age_days": 400,
+                "sentiment": 0.4,
+                "is_bot": False,
+                "is_spam": False,
+                "post_hash": "hash-new",
+                "raw_json": {"title": SYNDICATED},
+            }
+        ]
+
+    async def upsert(table: str, rows: list[dict], on_conflict: str | None = None) -> None:
+        stored.extend(rows)
+
+    monkeypatch.setattr(type(social_ingest.supabase_rest), "enabled", property(lambda _self: True))
+    monkeypatch.setattr(social_ingest.supabase_rest, "get_recent_social_titles", recent)
+    monkeypatch.setattr(social_ingest.supabase_rest, "upsert", upsert)
+    monkeypatch.setattr(social_ingest, "fetch_social_posts", posts)
+
+    result = await social_ingest.run([{"symbol": "RELIANCE.NS", "name": "Reliance", "sector": "Energy"}])
+
+    assert result["nearDuplicates"] == 1
+    assert stored[0]["raw_json"]["near_duplicate_of"] == "t3_prev"
+    assert persistent_index("social").synced_at is not None
@@ -1,5 +1,11 @@
 from __future__ import annotations
 
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.jobs import news_ingest
+from app.jobs.news_dedup import NewsDedupIndex, news_dedup_index
 from app.jobs.news_ingest import _mark_duplicate_hashes
 
 
@@ -26,3 +32,75 @@ def test_duplicate_hash_detection_uses_existing_and_batch_state() -> None:
     assert result[1]["is_duplicate"] is True
     assert result[2]["is_duplicate"] is True
     assert result[3]["is_duplicate"] is False
+
+
+def test_dedup_index_persists_and_expires_entries() -> None:
+    now = datetime.now(timezone.utc)
+    index = NewsDedupIndex(news_dedup_index.directory, retention_hours=96)
+    index.seed(
+        [
+            {"symbol": "RELIANCE.NS", "content_hash": "hash-b", "published_at": now.isoformat()},
+            {
+                "symbol": "RELIANCE.NS",
+                "content_hash": "hash-old",
+                "published_at": (now - timedelta(hours=97)).isoformat(),
+            },
+        ]
+    )
+    index.add([_row("hash-c") | {"published_at": now.isoformat()}])
+
+    reloaded = NewsDedupIndex(news_dedup_index.directory, retention_hours=96)
+    assert reloaded.load() is True
+    assert len(reloaded) == 2
+
+    rows = [_row("hash-b"), _row("hash-c"), _row("hash-old")]
+    result = _mark_duplicate_hashes(rows, reloaded.hashes_for("RELIANCE.NS"))
+    assert [row["is_duplicate"] for row in result] == [True, True, False]
+    assert "hash-b" not in reloaded.hashes_for("TCS.NS")
+
+
+def test_dedup_index_needs_seeding_without_a_file() -> None:
+    assert NewsDedupIndex(news_dedup_index.directory, retention_hours=96).load() is False
+
+
+@pytest.mark.asyncio
+async def test_fresh_runner_seeds_indexes_from_supabase(monkeypatch: pytest.MonkeyPatch) -> None:
+    reads: list[str | None] = []
+    stored: list[dict] = []
+    now = datetime.now(timezone.utc).isoformat()
+
+    async def recent(symbols: list[str], lookback_hours: int, inserted_since: str | None) -> list[dict]:
+        reads.append(inserted_since)
+        return [
+            {
+                "symbol": "RELIANCE.NS",
+                "url": "https://example.com/prev",
+                "title": "Reliance update",
+                "content_hash": "hash-prev",
+                "published_at": now,
+            }
+        ]
+
+    async def articles(symbol: str, source_weights: dict[str, float]) -> list[dict]:
+        return [_row("hash-prev") | {"url": f"https://example.com/{len(reads)}", "published_at": now}]
+
+    async def upsert(table: str, rows: list[dict], on_conflict: str | None = None) -> None:
+        stored.extend(rows)
+
+    async def credibility() -> dict[str, float]:
+        return {}
+
+    monkeypatch.setattr(type(news_ingest.supabase_rest), "enabled", property(lambda _self: True))
+    monkeypatch.setattr(news_ingest.supabase_rest, "get_recent_news_rows", recent)
+    monkeypatch.setattr(news_ingest.supabase_rest, "get_source_credibility", credibility)
+    monkeypatch.setattr(news_ingest.supabase_rest, "upsert", upsert)
+    monkeypatch.setattr(news_ingest, "fetch_news_articles", articles)
+    universe = [{"symbol": "RELIANCE.NS", "name": "Reliance", "sector": "Energy", "exchange": "NSE"}]
+
+    await news_ingest.run(universe)
+    await news_ingest.run(universe)
+
+    # No local file on the first run: the whole window is read; the second run reads a delta.
+    assert reads[0] is None
+    assert reads[1] is not None
+    assert [row["is_duplicate"] for row in stored] == [True, True]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+
 import pytest
 
 from app.providers import newsapi
@@ -13,3 +15,32 @@ async def test_fetch_news_features_fallback_without_api_key(monkeypatch: pytest.
     assert result["stale"] is True
     assert 0 <= float(result["news_score"]) <= 100
     assert 0 <= float(result["confidence"]) <= 100
+
+
+@pytest.mark.asyncio
+async def test_fetch_news_features_parses_inline_on_the_request_path(monkeypatch: pytest.MonkeyPatch) -> None:
+    payload = {
+        "articles": [
+            {
+                "title": "Infosys posts record profit",
+                "description": "Strong growth in deal wins",
+                "url": "https://www.livemint.com/infy",
+                "source": {"name": "Mint"},
+                "publishedAt": "2026-01-05T09:00:00Z",
+            }
+        ]
+    }
+
+    async def fetch_payload(_symbol: str) -> bytes:
+        return json.dumps(payload).encode()
+
+    async def no_pool(*_args: object) -> None:
+        raise AssertionError("request-path parsing went to the compute pool")
+
+    monkeypatch.setattr(newsapi.settings, "news_api_key", "key")
+    monkeypatch.setattr(newsapi, "_fetch_news_payload", fetch_payload)
+    monkeypatch.setattr(newsapi.compute_pool, "run", no_pool)
+    result = await newsapi.fetch_news_features("INFY.NS")
+
+    assert result["stale"] is False
+    assert float(result["news_score"]) > 50
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from app.engines import portfolio
+from app.engines.portfolio import (
+    PERSONA_CAP,
+    PERSONA_TARGET_RISK,
+    SECTOR_CAP,
+    PortfolioIndex,
+    _greedy_fill,
+    candidate_table,
+    generate_portfolio,
+    optimize_weights,
+)
+from app.jobs import trust_recompute
+
+SECTORS = [f"Sector {idx}" for idx in range(12)]
+
+
+def _universe(size: int, seed: int) -> tuple[list[dict[str, str]], dict[str, float], dict[str, float]]:
+    generator = random.Random(seed)
+    stocks = [
+        {"symbol": f"SYM{idx}.NS", "name": f"Stock {idx}", "sector": generator.choice(SECTORS)} for idx in range(size)
+    ]
+    trust_scores = {stock["symbol"]: round(generator.uniform(20, 95), 2) for stock in stocks}
+    volatilities = {stock["symbol"]: round(generator.uniform(12, 45), 2) for stock in stocks}
+    return stocks, trust_scores, volatilities
+
+
+@pytest.mark.parametrize("persona", list(PERSONA_CAP))
+def test_plans_over_a_large_universe_respect_every_cap(persona: str) -> None:
+    stocks, trust_scores, volatilities = _universe(3_000, seed=1)
+    index = PortfolioIndex()
+    index.build(stocks, trust_scores, volatilities, top_k=8)
+
+    plan = generate_portfolio(persona, 100_000, 60, index=index)
+
+    weights = [item["weightPct"] for item in plan["allocations"]]
+    assert round(sum(weights), 2) == 100
+    assert max(weights) <= PERSONA_CAP[persona]
+    per_sector: dict[str, float] = {}
+    for item in plan["allocations"]:
+        per_sector[item["sector"]] = per_sector.get(item["sector"], 0) + item["weightPct"]
+    assert max(per_sector.values()) <= SECTOR_CAP
+    assert plan["volatilityEstimate"] <= PERSONA_TARGET_RISK[persona] + 0.01
+    assert plan["warnings"] == []
+
+
+def test_index_keeps_the_per_sector_top_k_by_trust_and_by_measured_volatility() -> None:
+    stocks, trust_scores, volatilities = _universe(2_000, seed=2)
+    # A third of the universe has no price history yet.
+    measured = {symbol: value for idx, (symbol, value) in enumerate(volatilities.items()) if idx % 3}
+
+    table = candidate_table(stocks, trust_scores, measured, top_k=5)
+
+    expected: set[str] = set()
+    for sector in SECTORS:
+        rows = [
+            (trust_scores[stock["symbol"]], measured.get(stock["symbol"], portfolio.UNMEASURED_VOLATILITY), stock["symbol"])
+            for stock in stocks
+            if stock["sector"] == sector
+        ]
+        expected |= {symbol for _t, _v, symbol in sorted(rows, key=lambda row: (-row[0], row[1]))[:5]}
+        calm = sorted((row for row in rows if row[2] in measured), key=lambda row: (row[1], -row[0]))
+        expected |= {symbol for _t, _v, symbol in calm[:5]}
+    assert set(table["symbols"]) == expected
+    assert table["eligible"] == 2_000
+    assert all(table["measured"][idx] == (symbol in measured) for idx, symbol in enumerate(table["symbols"]))
+
+
+def test_unmeasured_holdings_are_flagged() -> None:
+    plan = generate_portfolio("OWL", 50_000, 60, index=PortfolioIndex())
+
+    assert all(item["expectedVolatility"] == portfolio.UNMEASURED_VOLATILITY for item in plan["allocations"])
+    assert plan["warnings"] == [
+        f"{len(plan['allocations'])} holding(s) have no price history yet; their volatility is a flat 24% estimate."
+    ]
+
+
+def test_greedy_fill_matches_a_sequential_fill() -> None:
+    generator = np.random.default_rng(3)
+    priority = generator.uniform(0, 50, size=60)
+    sectors = generator.integers(0, 5, size=60)
+
+    weights = _greedy_fill(priority, sectors, cap=20.0, sector_cap=SECTOR_CAP)
+
+    expected = np.zeros(60)
+    sector_used: dict[int, float] = {}
+    remaining = 100.0
+    for idx in np.argsort(-priority, kind="stable"):
+        room = min(20.0, SECTOR_CAP - sector_used.get(int(sectors[idx]), 0.0), remaining)
+        expected[idx] = max(room, 0.0)
+        sector_used[int(sectors[idx])] = sector_used.get(int(sectors[idx]), 0.0) + expected[idx]
+        remaining -= expected[idx]
+    np.testing.assert_allclose(weights, expected)
+
+
+def test_risk_limit_binds_at_the_best_feasible_objective() -> None:
+    generator = np.random.default_rng(4)
+    signal = generator.uniform(10, 80, size=80)
+    volatility = generator.uniform(12, 36, size=80) + signal / 10
+    sectors = generator.integers(0, 6, size=80)
+
+    weights, feasible = optimize_weights(signal, volatility, sectors, cap=25.0, risk_limit=20.0)
+
+    assert feasible
+    assert weights.sum() == pytest.approx(100)
+    assert float(weights @ volatility) / 100 == pytest.approx(20.0)
+    # No feasible greedy fill, whatever its ordering, does better.
+    for _ in range(500):
+        other = _greedy_fill(generator.normal(size=80), sectors, 25.0, SECTOR_CAP)
+        if float(other @ volatility) / 100 <= 20.0:
+            assert float(other @ signal) <= float(weights @ signal) + 1e-6
+
+
+def test_unreachable_risk_limit_falls_back_to_the_least_volatile_fill() -> None:
+    stocks = [{"symbol": f"V{idx}.NS", "name": f"V{idx}", "sector": SECTORS[idx % 6]} for idx in range(30)]
+    index = PortfolioIndex()
+    index.build(stocks, volatilities={stock["symbol"]: 72.0 + idx for idx, stock in enumerate(stocks)}, top_k=5)
+
+    plan = generate_portfolio("TURTLE", 10_000, 12, index=index)
+
+    assert plan["warnings"] == ["Portfolio risk exceeded persona tolerance; lowest-volatility allocation applied."]
+    assert round(sum(item["weightPct"] for item in plan["allocations"]), 2) == 100
+    chosen = {item["symbol"] for item in plan["allocations"]}
+    least_volatile = [index.symbols[idx] for idx in np.argsort(index.volatility)[:4]]
+    assert set(least_volatile) <= chosen
+
+
+@pytest.mark.asyncio
+async def test_refresh_loads_the_synced_universe_with_latest_trust(monkeypatch: pytest.MonkeyPatch) -> None:
+    stocks, trust_scores, volatilities = _universe(500, seed=5)
+    history = {symbol: value for symbol, value in list(volatilities.items())[:100]}
+
+    async def get_stocks() -> list[dict[str, str]]:
+        return stocks
+
+    async def get_latest_trust_scores(symbols: list[str]) -> dict[str, float]:
+        return {symbol: trust_scores[symbol] for symbol in symbols}
+
+    monkeypatch.setattr(trust_recompute.supabase_rest, "get_stocks", get_stocks)
+    monkeypatch.setattr(trust_recompute.supabase_rest, "get_latest_trust_scores", get_latest_trust_scores)
+    monkeypatch.setattr(trust_recompute, "realized_volatilities", lambda symbols, _store: history)
+    index = PortfolioIndex()
+    monkeypatch.setattr(trust_recompute, "portfolio_index", index)
+
+    assert await trust_recompute.refresh_portfolio_index() is True
+
+    assert index.stats()["eligible"] == 500
+    assert all(index.trust[idx] == trust_scores[symbol] for idx, symbol in enumerate(index.symbols))
+    assert all(
+        index.volatility[idx] == history[symbol] for idx, symbol in enumerate(index.symbols) if index.measured[idx]
+    )
+    assert 0 < index.stats()["measuredVolatility"] <= 100
+    assert index.age() < 5
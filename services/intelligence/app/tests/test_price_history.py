@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pytest
+
+from app.http_clients import http_client_scope
+from app.jobs import history_backfill
+from app.providers import yahoo
+from app.providers.history import BAR_DTYPE, PriceHistoryStore, price_history
+
+
+def _bars(timestamps: list[int]) -> np.ndarray:
+    return np.array([(ts, 10.0, 11.0, 9.0, 10.5, 10.5, 1_000) for ts in timestamps], dtype=BAR_DTYPE)
+
+
+def test_append_is_ordered_and_skips_known_bars(tmp_path: Path) -> None:
+    store = PriceHistoryStore(tmp_path)
+
+    assert store.append("TCS.NS", _bars([300, 100, 200, 200])) == 3
+    assert store.append("TCS.NS", _bars([200, 400])) == 1
+    assert store.read("TCS.NS")["ts"].tolist() == [100, 200, 300, 400]
+
+
+def test_missing_sessions_skip_weekends(tmp_path: Path) -> None:
+    store = PriceHistoryStore(tmp_path)
+    store.mark_synced("INFY.NS", date(2026, 3, 5))
+
+    assert store.missing_sessions("INFY.NS", date(2026, 3, 9)) == [date(2026, 3, 6), date(2026, 3, 9)]
+    assert store.missing_sessions("INFY.NS", date(2026, 3, 5)) == []
+
+
+@pytest.mark.asyncio
+async def test_sync_fetches_full_history_once_then_only_the_delta() -> None:
+    requests: list[dict[str, str]] = []
+    start = int(time.time()) - 200 * 86_400
+    through = date.today() - timedelta(days=7)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(dict(request.url.params))
+        timestamps = [start + idx * 86_400 for idx in range(150)]
+        closes = [100.0 + idx for idx in range(150)]
+        return httpx.Response(
+            200,
+            json={"chart": {"result": [{"timestamp": timestamps, "indicators": {"quote": [{"close": closes}]}}]}},
+        )
+
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        first = await yahoo.sync_price_history(["ITC.NS"], through=through)
+        second = await yahoo.sync_price_history(["ITC.NS"], through=through)
+        third = await yahoo.sync_price_history(["ITC.NS"], through=through + timedelta(days=3))
+
+    assert first == {"ITC.NS": 150}
+    assert second == {"ITC.NS": 0}
+    assert third == {"ITC.NS": 0}
+    assert "range" in requests[0]
+    assert len(requests) == 2
+    assert int(requests[1]["period1"]) == int(price_history.read("ITC.NS")["ts"][-1]) + 1
+
+
+@pytest.mark.asyncio
+async def test_backfill_upserts_only_appended_bars_in_windows(monkeypatch: pytest.MonkeyPatch) -> None:
+    price_history.append("TCS.NS", _bars([86_400 * day for day in range(1, 6)]))
+    upserts: list[list[dict]] = []
+
+    async def sync(symbols: list[str]) -> dict[str, int]:
+        price_history.append("TCS.NS", _bars([86_400 * 6, 86_400 * 7]))
+        price_history.append("INFY.NS", _bars([86_400 * 7]))
+        return {"TCS.NS": 2, "INFY.NS": 1, "ITC.NS": 0}
+
+    async def upsert(table: str, rows: list[dict], on_conflict: str | None = None) -> None:
+        upserts.append(list(rows))
+
+    monkeypatch.setattr(history_backfill, "sync_price_history", sync)
+    monkeypatch.setattr(history_backfill.supabase_rest, "upsert", upsert)
+    monkeypatch.setattr(history_backfill.settings, "history_backfill_upsert_window", 2)
+
+    result = await history_backfill.run(symbols=["TCS.NS", "INFY.NS", "ITC.NS"])
+
+    assert result["pricesUpserted"] == 3
+    assert [len(rows) for rows in upserts] == [2, 1]
+    assert [row["trading_date"] for row in upserts[0]] == ["1970-01-07", "1970-01-08"]
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+
+from app import rate_limit
+from app.config import settings
+from app.http_clients import http_client_scope, http_clients
+from app.jobs.store import SupabaseRest
+from app.rate_limit import BATCH, INTERACTIVE, RateLimited, TokenBucket, rate_limits
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "monotonic", clock)
+    return clock
+
+
+def test_tokens_refill_at_the_configured_rate(clock: Clock) -> None:
+    bucket = TokenBucket("reddit", per_minute=60, burst=2)
+    assert bucket.try_acquire(INTERACTIVE) == 0
+    assert bucket.try_acquire(INTERACTIVE) == 0
+    assert bucket.try_acquire(INTERACTIVE) == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert bucket.try_acquire(INTERACTIVE) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_acquire(INTERACTIVE) == 0
+
+
+def test_batch_lane_leaves_the_interactive_reserve(clock: Clock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "rate_limit_interactive_reserve", 0.5)
+    bucket = TokenBucket("newsapi", per_minute=60, burst=4)
+
+    granted = 0
+    while bucket.try_acquire(BATCH) == 0:
+        granted += 1
+    assert granted == 2
+    assert bucket.try_acquire(INTERACTIVE) == 0
+    assert bucket.try_acquire(INTERACTIVE) == 0
+    assert bucket.try_acquire(INTERACTIVE) > 0
+
+
+@pytest.mark.asyncio
+async def test_retry_after_and_remaining_headers_pause_the_bucket(clock: Clock) -> None:
+    bucket = TokenBucket("reddit", per_minute=600, burst=10)
+    request = httpx.Request("GET", "https://www.reddit.com/r/x.json")
+
+    await bucket.observe(httpx.Response(200, headers={"X-RateLimit-Remaining": "2"}, request=request))
+    assert bucket.try_acquire(INTERACTIVE) == 0
+    assert bucket.try_acquire(INTERACTIVE) == 0
+    assert bucket.try_acquire(INTERACTIVE) > 0
+
+    await bucket.observe(httpx.Response(429, headers={"Retry-After": "30"}, request=request))
+    clock.now += 10
+    assert bucket.try_acquire(INTERACTIVE) == pytest.approx(20.0)
+
+    clock.now += 25
+    headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "12"}
+    await bucket.observe(httpx.Response(200, headers=headers, request=request))
+    assert bucket.try_acquire(INTERACTIVE) == pytest.approx(12.0)
+    assert bucket.stats()["throttled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_waits_longer_than_the_cap_are_rejected(clock: Clock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "rate_limit_max_wait_seconds", 5.0)
+    monkeypatch.setattr(settings, "rate_limit_per_minute", {"reddit": 6})
+    monkeypatch.setattr(settings, "rate_limit_burst", 1)
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(200, json={})
+
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        client = http_clients.get("reddit")
+        await client.get("https://www.reddit.com/r/x.json")
+        with pytest.raises(RateLimited):
+            await client.get("https://www.reddit.com/r/y.json")
+
+    assert len(calls) == 1
+    assert rate_limits.stats()["reddit"]["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_buckets_are_shared_through_supabase_when_configured(clock: Clock) -> None:
+    rest = SupabaseRest()
+    rest.base = "https://example.supabase.co"
+    rest.key = "service-role"
+    rpcs: list[tuple[str, dict]] = []
+    grants = [3, 0]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        rpcs.append((request.url.path.rsplit("/", 1)[-1], json.loads(request.content)))
+        if request.url.path.endswith("lease_rate_limit_tokens"):
+            granted = grants.pop(0)
+            return httpx.Response(200, json=[{"granted": granted, "retry_after": 0 if granted else 2.5}])
+        return httpx.Response(204)
+
+    bucket = TokenBucket("newsapi", per_minute=60, burst=10, remote=rest)
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        for _ in range(3):
+            await bucket.acquire(BATCH)
+        assert await bucket._take(BATCH) == 2.5
+        response = httpx.Response(429, headers={"Retry-After": "7"}, request=httpx.Request("GET", "https://x"))
+        await bucket.observe(response)
+
+    assert [name for name, _ in rpcs] == ["lease_rate_limit_tokens", "lease_rate_limit_tokens", "observe_rate_limit"]
+    assert rpcs[0][1] == {
+        "p_name": "newsapi",
+        "p_per_minute": 60,
+        "p_burst": 10.0,
+        "p_reserve": 3.0,
+        "p_count": settings.rate_limit_lease_tokens,
+    }
+    assert rpcs[-1] == ("observe_rate_limit", {"p_name": "newsapi", "p_remaining": None, "p_pause_seconds": 7.0})
+    assert bucket.stats()["remoteLeases"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unspent_leases_lapse_and_are_dropped_on_a_pause(clock: Clock) -> None:
+    rest = SupabaseRest()
+    rest.base = "https://example.supabase.co"
+    rest.key = "service-role"
+    leases: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("lease_rate_limit_tokens"):
+            leases.append(json.loads(request.content)["p_name"])
+            return httpx.Response(200, json=[{"granted": 5, "retry_after": 0}])
+        return httpx.Response(204)
+
+    bucket = TokenBucket("reddit", per_minute=60, burst=10, remote=rest)
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        await bucket.acquire(INTERACTIVE)
+        await bucket.acquire(INTERACTIVE)
+        assert len(leases) == 1
+
+        # Five tokens refill the shared bucket in five seconds; after that the lease lapses.
+        clock.now += 5
+        await bucket.acquire(INTERACTIVE)
+        assert len(leases) == 2
+
+        response = httpx.Response(429, headers={"Retry-After": "3"}, request=httpx.Request("GET", "https://x"))
+        await bucket.observe(response)
+        await bucket.acquire(INTERACTIVE)
+        assert len(leases) == 3
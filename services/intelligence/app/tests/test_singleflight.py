@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_upstream_call() -> None:
+    flights = SingleFlight()
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "shared"
+
+    results = await asyncio.gather(*(flights.do(("social", "RELIANCE.NS"), fetch) for _ in range(10)))
+
+    assert results == ["shared"] * 10
+    assert calls == 1
+    assert flights.stats() == {"calls": 10, "coalesced": 9, "inFlight": 0}
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_keeps_the_shared_call_alive() -> None:
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch() -> int:
+        await release.wait()
+        return 42
+
+    first = asyncio.create_task(flights.do("TCS.NS", fetch))
+    second = asyncio.create_task(flights.do("TCS.NS", fetch))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    release.set()
+
+    assert await second == 42
+    with pytest.raises(asyncio.CancelledError):
+        await first
@@ -11,7 +11,7 @@ def test_social_hype_penalty_capped_and_non_negative() -> None:
 
 
 def test_fallback_social_features_shape() -> None:
-    fallback = reddit._fallback_features("RELIANCE.NS")
+    fallback = reddit.fallback_social_features("RELIANCE.NS")
 
     assert 0 <= float(fallback["bullish_pct"]) <= 100
     assert 0 <= float(fallback["bearish_pct"]) <= 100
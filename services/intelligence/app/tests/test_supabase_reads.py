@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+
+from app.http_clients import http_client_scope
+from app.jobs.store import SupabaseRest
+
+TRUST_ROWS = [
+    {"symbol": f"S{idx}.NS", "as_of_date": f"2026-01-0{day}", "trust_score": float(idx * 10 + day)}
+    for idx in range(5)
+    for day in (3, 2, 1)
+]
+
+
+def _rest(monkeypatch: pytest.MonkeyPatch) -> SupabaseRest:
+    rest = SupabaseRest()
+    monkeypatch.setattr(rest, "base", "https://example.supabase.co")
+    monkeypatch.setattr(rest, "key", "service-role")
+    return rest
+
+
+class FakePostgrest:
+    def __init__(self, rpc: bool) -> None:
+        self.rpc = rpc
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path.endswith("/rpc/latest_trust_scores"):
+            if not self.rpc:
+                return httpx.Response(404, json={"code": "PGRST202"})
+            wanted = json.loads(request.content)["symbols"]
+            latest: dict[str, dict] = {}
+            for row in TRUST_ROWS:
+                if row["symbol"] in wanted:
+                    latest.setdefault(row["symbol"], row)
+            return httpx.Response(200, json=list(latest.values()))
+        return httpx.Response(404)
+
+
+@pytest.mark.asyncio
+async def test_latest_trust_scores_use_rpc(monkeypatch: pytest.MonkeyPatch) -> None:
+    rest = _rest(monkeypatch)
+    server = FakePostgrest(rpc=True)
+    async with http_client_scope(transport=httpx.MockTransport(server)):
+        scores = await rest.get_latest_trust_scores([f"S{idx}.NS" for idx in range(5)])
+
+    assert scores == {f"S{idx}.NS": float(idx * 10 + 3) for idx in range(5)}
+    assert len(server.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_latest_trust_scores_fail_loudly_without_rpc(monkeypatch: pytest.MonkeyPatch) -> None:
+    rest = _rest(monkeypatch)
+    server = FakePostgrest(rpc=False)
+    async with http_client_scope(transport=httpx.MockTransport(server)):
+        with pytest.raises(httpx.HTTPStatusError):
+            await rest.get_latest_trust_scores([f"S{idx}.NS" for idx in range(5)])
+
+    # No fallback read of the trust_scores history.
+    assert all(request.method == "POST" for request in server.requests)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+import httpx
+import pytest
+
+from app.http_clients import http_client_scope
+from app.jobs.store import SupabaseRest
+
+
+def _rest(monkeypatch: pytest.MonkeyPatch) -> SupabaseRest:
+    rest = SupabaseRest()
+    monkeypatch.setattr(rest, "base", "https://example.supabase.co")
+    monkeypatch.setattr(rest, "key", "service-role")
+    monkeypatch.setattr("app.jobs.store.settings.supabase_upsert_chunk_size", 3)
+    monkeypatch.setattr("app.jobs.store.settings.supabase_upsert_concurrency", 2)
+    monkeypatch.setattr("app.jobs.store.settings.supabase_upsert_backoff_seconds", 0.0)
+    return rest
+
+
+@pytest.mark.asyncio
+async def test_upsert_sends_gzip_chunks_and_retries_failed_chunk(monkeypatch: pytest.MonkeyPatch) -> None:
+    rest = _rest(monkeypatch)
+    received: list[list[dict]] = []
+    failures = {"remaining": 1}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["content-encoding"] == "gzip"
+        assert request.url.params["on_conflict"] == "symbol"
+        chunk = json.loads(gzip.decompress(request.content))
+        if chunk[0]["symbol"] == "S3" and failures["remaining"]:
+            failures["remaining"] -= 1
+            return httpx.Response(503)
+        received.append(chunk)
+        return httpx.Response(201)
+
+    rows = [{"symbol": f"S{idx}", "price": idx} for idx in range(8)]
+    async with http_client_scope(transport=httpx.MockTransport(handler)):
+        result = await rest.upsert("stocks", rows, on_conflict="symbol")
+
+    assert sorted(row["symbol"] for chunk in received for row in chunk) == sorted(row["symbol"] for row in rows)
+    assert [len(chunk) for chunk in sorted(received, key=lambda chunk: chunk[0]["price"])] == [3, 3, 2]
+    assert (result.rows, result.chunks, result.retries) == (8, 3, 1)
+    assert result.bytes > 0
+
+
+@pytest.mark.asyncio
+async def test_upsert_raises_after_retries_are_exhausted(monkeypatch: pytest.MonkeyPatch) -> None:
+    rest = _rest(monkeypatch)
+    monkeypatch.setattr("app.jobs.store.settings.supabase_upsert_retries", 1)
+
+    async with http_client_scope(transport=httpx.MockTransport(lambda _request: httpx.Response(503))):
+        with pytest.raises(httpx.HTTPStatusError):
+            await rest.upsert("stocks", [{"symbol": "TCS.NS"}])
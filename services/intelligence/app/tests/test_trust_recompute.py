@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from app.engines import trust_score
+from app.engines.social import social_hype_penalty
+from app.jobs import trust_recompute
+from app.jobs.checkpoint import JobCheckpoint
+from app.jobs.store import SupabaseRest
+from app.jobs.trust_recompute import _compute_rows_for_symbol
+
+
+@pytest.mark.asyncio
+async def test_rows_share_one_social_fetch(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+    fallback = trust_score.PROVIDERS["social"][1]
+
+    async def counting_social(symbol: str) -> dict[str, float | bool]:
+        calls.append(symbol)
+        return {**fallback(symbol), "stale": False}
+
+    monkeypatch.setitem(trust_score.PROVIDERS, "social", (counting_social, fallback))
+
+    trust_row, social_row = await _compute_rows_for_symbol(
+        "ITC.NS",
+        date(2026, 3, 2),
+        previous_score=61.0,
+    )
+
+    assert calls == ["ITC.NS"]
+    assert trust_row["hype_penalty"] == social_hype_penalty(
+        float(social_row["hype_velocity"]),
+        bool(social_row["meme_risk_flag"]),
+        float(social_row["confidence"]),
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_resumes_from_checkpoint_and_retries_failures_first(monkeypatch: pytest.MonkeyPatch) -> None:
+    universe = [{"symbol": symbol, "name": symbol} for symbol in ("A.NS", "B.NS", "C.NS", "D.NS", "BAD.NS")]
+    calls: list[str] = []
+    upserted: list[str] = []
+    crash_on_window = {"index": 2}
+
+    async def fake_rows(symbol: str, *_args: object) -> tuple[dict[str, str], dict[str, str]]:
+        calls.append(symbol)
+        if symbol == "BAD.NS":
+            raise RuntimeError("provider exploded")
+        return {"symbol": symbol}, {"symbol": symbol}
+
+    async def fake_upsert(table: str, rows: list[dict[str, str]], on_conflict: str | None = None) -> None:
+        if table != "trust_scores":
+            return
+        crash_on_window["index"] -= 1
+        if crash_on_window["index"] == 0:
+            raise RuntimeError("killed mid-run")
+        upserted.extend(row["symbol"] for row in rows)
+
+    async def no_sync(_symbols: list[str]) -> None:
+        return None
+
+    monkeypatch.setattr(trust_recompute, "_compute_rows_for_symbol", fake_rows)
+    monkeypatch.setattr(trust_recompute.supabase_rest, "upsert", fake_upsert)
+    monkeypatch.setattr(trust_recompute, "warm_market_indicators", no_sync)
+    monkeypatch.setattr(trust_recompute.settings, "trust_recompute_upsert_window", 2)
+
+    with pytest.raises(RuntimeError, match="killed mid-run"):
+        await trust_recompute.run(universe=universe)
+    first_window = list(upserted)
+    assert len(first_window) == 2
+
+    calls.clear()
+    resumed = await trust_recompute.run(universe=universe)
+    assert resumed["resumedSymbols"] == 2
+    assert set(calls) == {row["symbol"] for row in universe} - set(first_window)
+    assert resumed["failedSymbols"] == ["BAD.NS"]
+    assert sorted(upserted) == ["A.NS", "B.NS", "C.NS", "D.NS"]
+
+    calls.clear()
+    retried = await trust_recompute.run(universe=universe)
+    assert calls[0] == "BAD.NS"
+    assert retried["retriedSymbols"] == 1
+    assert retried["resumedSymbols"] == 0
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_round_trips_through_supabase(monkeypatch: pytest.MonkeyPatch) -> None:
+    rows: dict[str, dict] = {}
+
+    async def fake_upsert(table: str, payload: list[dict], on_conflict: str | None = None) -> None:
+        assert (table, on_conflict) == ("job_checkpoints", "name")
+        rows[payload[0]["name"]] = payload[0]
+
+    async def fake_get(name: str) -> dict | None:
+        return rows.get(name)
+
+    rest = SupabaseRest()
+    rest.base, rest.key = "https://example.supabase.co", "service-role"
+    monkeypatch.setattr(rest, "upsert", fake_upsert)
+    monkeypatch.setattr(rest, "get_job_checkpoint", fake_get)
+
+    first = JobCheckpoint("trust-recompute.0-of-4", remote=rest)
+    await first.load("2026-03-02")
+    await first.mark_completed(["A.NS", "B.NS"], retry=["BAD.NS"])
+
+    # A later run on a fresh machine sees the same state.
+    resumed = JobCheckpoint("trust-recompute.0-of-4", remote=rest)
+    await resumed.load("2026-03-02")
+    assert resumed.completed == {"A.NS", "B.NS"}
+    assert resumed.retry == ["BAD.NS"]
+
+    next_day = JobCheckpoint("trust-recompute.0-of-4", remote=rest)
+    await next_day.load("2026-03-03")
+    assert next_day.completed == set()
+    assert next_day.retry == ["BAD.NS"]
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 
+from app.engines import trust_score
 from app.engines.common import stable_score
 from app.engines.trust_score import compute_trust_score
 
@@ -39,3 +42,22 @@ async def test_default_previous_score_is_stable() -> None:
     delta = result.trustScore - previous
 
     assert -10 <= delta <= 10
+
+
+@pytest.mark.asyncio
+async def test_slow_provider_falls_back_at_deadline(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fast(symbol: str) -> dict[str, float | bool]:
+        return {**trust_score.PROVIDERS["social"][1](symbol), "stale": False}
+
+    async def slow(_symbol: str) -> dict[str, float | bool]:
+        await asyncio.sleep(5)
+        raise AssertionError("deadline was not enforced")
+
+    monkeypatch.setitem(trust_score.PROVIDERS, "market", (slow, trust_score.PROVIDERS["market"][1]))
+    monkeypatch.setitem(trust_score.PROVIDERS, "social", (fast, trust_score.PROVIDERS["social"][1]))
+
+    result = await compute_trust_score("TCS.NS", previous_score=60, deadline_seconds=0.05)
+
+    assert "market" in result.providersTimedOut
+    assert "social" in result.providersCompleted
+    assert result.staleData is True
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+
+from app.http_clients import http_client_scope
+from app.jobs import universe
+
+NSE_CSV = (
+    "SYMBOL,NAME OF COMPANY, SERIES\n"
+    'TCS,"Tata Consultancy\nServices",EQ\n'
+    "INFY,Infosys,EQ\n"
+    "GOLDBEES,Gold ETF,BE\n"
+)
+BSE_JSON = json.dumps(
+    {
+        "meta": {"note": "[not the records]"},
+        "Table": [
+            {"SCRIP_CD": "500325", "SCRIP_NM": "Reliance Industries", "Industry": "Energy"},
+            {"SCRIP_CD": "532540", "SCRIP_NM": "TCS [BSE]", "Industry": ""},
+        ],
+    }
+)
+NYSE_TXT = (
+    "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
+    "IBM|International Business Machines|N|IBM|N|100|N|IBM\n"
+    "ZTEST|Test Issue|N|ZTEST|N|100|Y|ZTEST\n"
+    "File Creation Time: 0101202600:00|||||||\n"
+)
+
+
+class ChunkedStream(httpx.AsyncByteStream):
+    def __init__(self, body: str, size: int = 7) -> None:
+        self.body = body.encode("utf-8")
+        self.size = size
+
+    async def __aiter__(self):
+        for idx in range(0, len(self.body), self.size):
+            yield self.body[idx : idx + self.size]
+
+
+def _handler(bodies: dict[str, str | None]):
+    def handler(request: httpx.Request) -> httpx.Response:
+        for host, body in bodies.items():
+            if host in request.url.host:
+                if body is None:
+                    return httpx.Response(503)
+                return httpx.Response(200, stream=ChunkedStream(body))
+        return httpx.Response(404)
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_streams_every_exchange_and_reports_rows() -> None:
+    bodies = {"nseindia": NSE_CSV, "bseindia": BSE_JSON, "nasdaqtrader": NYSE_TXT}
+    async with http_client_scope(transport=httpx.MockTransport(_handler(bodies))):
+        loaded = await universe.load_market_universe_report()
+
+    assert [row["symbol"] for row in loaded.rows] == ["500325.BO", "532540.BO", "IBM", "INFY.NS", "TCS.NS"]
+    assert next(row for row in loaded.rows if row["symbol"] == "TCS.NS")["name"] == "Tata Consultancy\nServices"
+    report = {item["exchange"]: item for item in loaded.exchanges}
+    assert {name: item["rows"] for name, item in report.items()} == {"NSE": 2, "BSE": 2, "NYSE": 1}
+    assert not any(item["fallback"] for item in loaded.exchanges)
+    assert loaded.nifty_fallback is False
+
+
+@pytest.mark.asyncio
+async def test_nse_failure_falls_back_to_nifty(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(universe.settings, "universe_limit_per_exchange", 1)
+    bodies = {"nseindia": None, "bseindia": BSE_JSON, "nasdaqtrader": NYSE_TXT}
+    async with http_client_scope(transport=httpx.MockTransport(_handler(bodies))):
+        loaded = await universe.load_market_universe_report()
+
+    report = {item["exchange"]: item for item in loaded.exchanges}
+    assert report["NSE"]["fallback"] is True
+    assert report["NSE"]["error"]
+    assert report["BSE"]["rows"] == 1
+    assert {row["symbol"] for row in loaded.rows} >= {"500325.BO", "IBM", "TCS.NS"}
@@ -0,0 +1,49 @@
+"""Deterministic fallback features for a 10k-symbol universe: precomputed table vs hashing per call.
+
+    python -m benchmarks.bench_fallback_table
+"""
+
+from __future__ import annotations
+
+import time
+
+from app.engines.common import FALLBACK_SALTS, fallback_table, stable_score
+from app.providers import newsapi, reddit, yahoo
+
+SYMBOLS = [f"SYM{idx}.NS" for idx in range(10_000)]
+
+
+def _scores(symbols: list[str]) -> float:
+    started = time.perf_counter()
+    for symbol in symbols:
+        for salt in FALLBACK_SALTS:
+            stable_score(symbol, 25, 3800, salt)
+    return time.perf_counter() - started
+
+
+def _fallbacks(symbols: list[str]) -> float:
+    started = time.perf_counter()
+    for symbol in symbols:
+        reddit.fallback_social_features(symbol)
+        reddit._fallback_posts(symbol)
+        newsapi.fallback_news_features(symbol)
+        yahoo.fallback_market_features(symbol)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    fallback_table.clear()
+    hashed = {"stable_score": _scores(SYMBOLS), "fallback features": _fallbacks(SYMBOLS)}
+
+    started = time.perf_counter()
+    fallback_table.build(SYMBOLS)
+    print(f"table build for {len(SYMBOLS)} symbols x {len(FALLBACK_SALTS)} salts: {time.perf_counter() - started:.3f}s")
+
+    table = {"stable_score": _scores(SYMBOLS), "fallback features": _fallbacks(SYMBOLS)}
+    print(f"{'workload':>18} {'hashed s':>9} {'table s':>8}")
+    for name, seconds in hashed.items():
+        print(f"{name:>18} {seconds:>9.3f} {table[name]:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
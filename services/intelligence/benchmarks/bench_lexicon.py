@@ -0,0 +1,51 @@
+"""Term matching cost as the lexicon grows: compiled alternation vs one substring scan per term.
+
+    python -m benchmarks.bench_lexicon
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from app.engines.lexicon import Lexicon
+from app.providers import newsapi, reddit
+
+SOCIAL_TERMS = {"bullish": reddit.BULLISH_TERMS, "bearish": reddit.BEARISH_TERMS, "meme": reddit.MEME_TERMS}
+NEWS_TERMS = {"positive": newsapi.POSITIVE_TERMS, "negative": newsapi.NEGATIVE_TERMS}
+VOCABULARY = [f"word{idx}" for idx in range(2_000)]
+EXTRA_TERMS = [0, 10, 20, 40, 100, 200, 400]
+TEXTS = 2_000
+
+
+def _post(generator: random.Random, terms: list[str]) -> str:
+    words = [generator.choice(VOCABULARY) for _ in range(80)]
+    for _ in range(3):
+        words[generator.randrange(len(words))] = generator.choice(terms)
+    return " ".join(words)
+
+
+def _timed(lexicon: Lexicon, texts: list[str]) -> float:
+    started = time.perf_counter()
+    lexicon.scan_batch(texts)
+    return (time.perf_counter() - started) / len(texts) * 1e6
+
+
+def main() -> None:
+    generator = random.Random(7)
+    print(f"{'terms':>6} {'compiled us/text':>17} {'per-term us/text':>17} {'default':>9}")
+    lexicons = [NEWS_TERMS, SOCIAL_TERMS] + [
+        {**SOCIAL_TERMS, **NEWS_TERMS, "extra": {f"zz{idx}term" for idx in range(extra)}} for extra in EXTRA_TERMS
+    ]
+    for categories in lexicons:
+        terms = sorted(set().union(*categories.values()))
+        texts = [_post(generator, terms) for _ in range(TEXTS)]
+
+        compiled = _timed(Lexicon(categories, compiled=True), texts)
+        per_term = _timed(Lexicon(categories, compiled=False), texts)
+        default = "compiled" if Lexicon(categories).compiled else "per-term"
+        print(f"{len(terms):>6} {compiled:>17.1f} {per_term:>17.1f} {default:>9}")
+
+
+if __name__ == "__main__":
+    main()
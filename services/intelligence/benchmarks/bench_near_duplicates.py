@@ -0,0 +1,51 @@
+"""Near-duplicate lookup cost as the window grows: LSH index vs a linear Jaccard scan.
+
+    python -m benchmarks.bench_near_duplicates
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from app.engines.near_duplicates import NearDuplicateIndex, tokens
+
+VOCABULARY = [f"word{idx}" for idx in range(5_000)]
+WINDOWS = [1_000, 10_000, 50_000]
+QUERIES = 200
+
+
+def _headline(generator: random.Random) -> str:
+    return " ".join(generator.choice(VOCABULARY) for _ in range(12))
+
+
+def _linear_scan(corpus: list[set[str]], query: set[str], threshold: float) -> bool:
+    return any(len(query & other) / len(query | other) >= threshold for other in corpus)
+
+
+def main() -> None:
+    generator = random.Random(7)
+    print(f"{'window':>8} {'lsh us/query':>14} {'scan us/query':>14}")
+    for window in WINDOWS:
+        texts = [_headline(generator) for _ in range(window)]
+        index = NearDuplicateIndex(threshold=0.75, window_seconds=float("inf"))
+        for idx, text in enumerate(texts):
+            index.add(str(idx), text)
+        queries = [_headline(generator) for _ in range(QUERIES)]
+
+        started = time.perf_counter()
+        for query in queries:
+            index.query(query)
+        lsh = (time.perf_counter() - started) / QUERIES * 1e6
+
+        corpus = [tokens(text) for text in texts]
+        started = time.perf_counter()
+        for query in queries[:20]:
+            _linear_scan(corpus, tokens(query), 0.75)
+        scan = (time.perf_counter() - started) / 20 * 1e6
+
+        print(f"{window:>8} {lsh:>14.1f} {scan:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Portfolio generation latency as the eligible universe grows: index build and per-plan cost.
+
+    python -m benchmarks.bench_portfolio
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from app.engines.portfolio import PERSONA_CAP, PortfolioIndex, generate_portfolio
+
+UNIVERSES = [1_000, 5_000, 20_000]
+SECTORS = [f"Sector {idx}" for idx in range(25)]
+PLANS = 50
+
+
+def main() -> None:
+    generator = random.Random(7)
+    print(f"{'symbols':>8} {'candidates':>11} {'build ms':>9} {'ms/plan':>8} {'worst ms/plan':>14}")
+    for size in UNIVERSES:
+        stocks = [
+            {"symbol": f"SYM{idx}.NS", "name": f"Stock {idx}", "sector": generator.choice(SECTORS)}
+            for idx in range(size)
+        ]
+        trust_scores = {stock["symbol"]: generator.uniform(20, 95) for stock in stocks}
+        volatilities = {stock["symbol"]: generator.uniform(12, 45) for stock in stocks}
+
+        started = time.perf_counter()
+        index = PortfolioIndex()
+        index.build(stocks, trust_scores, volatilities)
+        build = (time.perf_counter() - started) * 1000
+
+        timings = []
+        for persona in PERSONA_CAP:
+            for _ in range(PLANS):
+                started = time.perf_counter()
+                generate_portfolio(persona, 100_000, 60, index=index)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        mean = sum(timings) / len(timings)
+        print(f"{size:>8} {len(index.symbols):>11} {build:>9.1f} {mean:>8.2f} {max(timings):>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
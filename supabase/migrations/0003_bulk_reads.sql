@@ -0,0 +1,16 @@
+-- 0003_bulk_reads.sql
+-- Latest trust score per symbol for a whole symbol list in one round trip
+
+create or replace function public.latest_trust_scores(symbols text[])
+returns table (symbol text, as_of_date date, trust_score numeric)
+language sql
+stable
+as $$
+  select distinct on (t.symbol) t.symbol, t.as_of_date, t.trust_score
+  from public.trust_scores t
+  where t.symbol = any(symbols)
+  order by t.symbol, t.as_of_date desc, t.created_at desc;
+$$;
+
+revoke all on function public.latest_trust_scores(text[]) from public, anon, authenticated;
+grant execute on function public.latest_trust_scores(text[]) to service_role;
@@ -0,0 +1,59 @@
+-- 0004_job_leases.sql
+-- Shard leases for the job runner, so overlapping runs never process a shard twice
+
+create table if not exists public.job_leases (
+  job text not null,
+  shard integer not null,
+  shard_count integer not null,
+  owner text not null,
+  expires_at timestamptz not null,
+  summary jsonb,
+  updated_at timestamptz not null default now(),
+  primary key (job, shard, shard_count)
+);
+
+alter table public.job_leases enable row level security;
+
+create or replace function public.acquire_job_lease(
+  p_job text,
+  p_shard integer,
+  p_shard_count integer,
+  p_owner text,
+  p_ttl_seconds integer
+)
+returns boolean
+language plpgsql
+as $$
+begin
+  insert into public.job_leases as l (job, shard, shard_count, owner, expires_at)
+  values (p_job, p_shard, p_shard_count, p_owner, now() + make_interval(secs => p_ttl_seconds))
+  on conflict (job, shard, shard_count) do update
+    set owner = excluded.owner,
+        expires_at = excluded.expires_at,
+        updated_at = now()
+    where l.expires_at < now() or l.owner = excluded.owner;
+  return found;
+end;
+$$;
+
+create or replace function public.release_job_lease(
+  p_job text,
+  p_shard integer,
+  p_shard_count integer,
+  p_owner text,
+  p_summary jsonb
+)
+returns void
+language sql
+as $$
+  update public.job_leases
+  set expires_at = now(), summary = p_summary, updated_at = now()
+  where job = p_job and shard = p_shard and shard_count = p_shard_count and owner = p_owner;
+$$;
+
+revoke all on function public.acquire_job_lease(text, integer, integer, text, integer)
+  from public, anon, authenticated;
+revoke all on function public.release_job_lease(text, integer, integer, text, jsonb)
+  from public, anon, authenticated;
+grant execute on function public.acquire_job_lease(text, integer, integer, text, integer) to service_role;
+grant execute on function public.release_job_lease(text, integer, integer, text, jsonb) to service_role;
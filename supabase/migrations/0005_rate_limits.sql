@@ -0,0 +1,94 @@
+-- 0005_rate_limits.sql
+-- Shared token buckets for upstream quotas (NewsAPI, Reddit), drawn on by every API worker
+-- and job runner
+
+create table if not exists public.rate_limit_buckets (
+  name text primary key,
+  tokens double precision not null,
+  blocked_until timestamptz,
+  updated_at timestamptz not null default now()
+);
+
+alter table public.rate_limit_buckets enable row level security;
+
+-- Leases up to p_count tokens in one round trip: `granted` is how many were taken (0 to
+-- p_count), `retry_after` the seconds to wait before asking again when none were.
+-- p_reserve is the part of the burst the caller must leave for interactive traffic.
+create or replace function public.lease_rate_limit_tokens(
+  p_name text,
+  p_per_minute double precision,
+  p_burst double precision,
+  p_reserve double precision,
+  p_count integer
+)
+returns table (granted integer, retry_after double precision)
+language plpgsql
+as $$
+declare
+  v_rate double precision := p_per_minute / 60.0;
+  v_bucket public.rate_limit_buckets%rowtype;
+  v_tokens double precision;
+  v_granted integer;
+begin
+  insert into public.rate_limit_buckets (name, tokens)
+  values (p_name, p_burst)
+  on conflict (name) do nothing;
+
+  select * into v_bucket from public.rate_limit_buckets where name = p_name for update;
+
+  v_tokens := least(
+    p_burst,
+    v_bucket.tokens + greatest(extract(epoch from clock_timestamp() - v_bucket.updated_at), 0) * v_rate
+  );
+
+  if v_bucket.blocked_until is not null and v_bucket.blocked_until > clock_timestamp() then
+    update public.rate_limit_buckets
+    set tokens = v_tokens, updated_at = clock_timestamp()
+    where name = p_name;
+    return query select 0, extract(epoch from v_bucket.blocked_until - clock_timestamp())::double precision;
+    return;
+  end if;
+
+  v_granted := greatest(least(p_count, floor(v_tokens - p_reserve)::integer), 0);
+
+  update public.rate_limit_buckets
+  set tokens = v_tokens - v_granted, updated_at = clock_timestamp()
+  where name = p_name;
+
+  if v_granted > 0 then
+    return query select v_granted, 0::double precision;
+  else
+    return query select 0, (1 + p_reserve - v_tokens) / v_rate;
+  end if;
+end;
+$$;
+
+-- Applies the upstream's own hints: X-RateLimit-Remaining caps the tokens, and
+-- Retry-After / X-RateLimit-Reset pause the bucket for every caller.
+create or replace function public.observe_rate_limit(
+  p_name text,
+  p_remaining double precision,
+  p_pause_seconds double precision
+)
+returns void
+language sql
+as $$
+  update public.rate_limit_buckets
+  set tokens = case when p_remaining is null then tokens else least(tokens, p_remaining) end,
+      blocked_until = case
+        when p_pause_seconds is null or p_pause_seconds <= 0 then blocked_until
+        else greatest(
+          coalesce(blocked_until, clock_timestamp()),
+          clock_timestamp() + make_interval(secs => p_pause_seconds)
+        )
+      end
+  where name = p_name;
+$$;
+
+revoke all on function public.lease_rate_limit_tokens(text, double precision, double precision, double precision, integer)
+  from public, anon, authenticated;
+revoke all on function public.observe_rate_limit(text, double precision, double precision)
+  from public, anon, authenticated;
+grant execute on function public.lease_rate_limit_tokens(text, double precision, double precision, double precision, integer)
+  to service_role;
+grant execute on function public.observe_rate_limit(text, double precision, double precision) to service_role;
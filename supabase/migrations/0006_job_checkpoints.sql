@@ -0,0 +1,12 @@
+-- 0006_job_checkpoints.sql
+-- Resume state for long job runs (finished symbols, retry list), kept off the runner's disk
+
+create table if not exists public.job_checkpoints (
+  name text primary key,
+  run_key text,
+  completed text[] not null default '{}',
+  retry text[] not null default '{}',
+  updated_at timestamptz not null default now()
+);
+
+alter table public.job_checkpoints enable row level security;